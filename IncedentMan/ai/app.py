@@ -1,39 +1,330 @@
-from flask import Flask, request, jsonify
-import joblib
-from incident_classifier import IncidentClassifier
+from flask import Flask, request, jsonify, g
+from contextlib import nullcontext
 import json
+import os
+import threading
+import time
 
 app = Flask(__name__)
 
+# Upper bound on the number of descriptions accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+# 'eager' loads the models before the server starts; 'background' starts
+# serving immediately and answers 503 until the models are ready
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'eager')
+
+# (IncidentClassifier, metadata) pair; replaced as a whole on reload so a
+# request always sees a classifier together with its own metadata
+current_models = None
+model_status = {
+    'state': 'loading',
+    'error': None,
+    'reloading': False,
+    'last_reload': None,
+    'last_reload_error': None
+}
+
+# Models are reloaded when model_metadata.json changes (written last by
+# training), checked every MODEL_WATCH_INTERVAL seconds; 0 disables it
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 0))
+# When set, POST /admin/reload requires this value in X-Admin-Token
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+METADATA_PATH = os.path.join('models', 'model_metadata.json')
+loaded_metadata_mtime = None
+# Under serve.py every worker process holds its own models: POST
+# /admin/reload writes a new token to this file (set by serve.py) and each
+# worker reloads when it sees the token change, checked every
+# RELOAD_POLL_INTERVAL seconds. Unset, the endpoint reloads this process only
+RELOAD_MARKER = os.environ.get('RELOAD_MARKER')
+RELOAD_POLL_INTERVAL = float(os.environ.get('RELOAD_POLL_INTERVAL', 1))
+
+# Server settings reported on /health: set by serve.py, otherwise this is
+# the single-process dev server
+SERVER_INFO = json.loads(os.environ.get('SERVE_CONFIG') or '{"worker_class": "dev"}')
+
+# MICRO_BATCHING=1 groups concurrent /predict requests into one batch
+# prediction; it needs a threaded server to see concurrent requests
+batcher = None
+if os.environ.get('MICRO_BATCHING') == '1':
+    from micro_batching import MicroBatcher
+    # Each request passes the classifier it took from current_models, so its
+    # prediction, metadata and cache key all come from the same model
+    batcher = MicroBatcher(
+        lambda classifier, texts: classifier.predict_batch(texts),
+        max_batch_size=int(os.environ.get('MICRO_BATCH_MAX_SIZE', 32)),
+        max_wait_ms=float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', 5))
+    )
+
+# Responses for repeated descriptions, keyed on the model's training date;
+# PREDICTION_CACHE_SIZE=0 disables the cache
+prediction_cache = None
+if int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)) > 0:
+    from prediction_cache import PredictionCache
+    prediction_cache = PredictionCache(
+        max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+        ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+    )
+
+# INSTRUMENTATION=1 records per-stage latencies, request and prediction
+# counts and errors, served in the Prometheus text format on
+# /metrics/prometheus; when off, the request path skips all of it
+telemetry = None
+if os.environ.get('INSTRUMENTATION') == '1':
+    from instrumentation import Metrics
+    # serve.py sets METRICS_MULTIPROC_DIR so the workers' metrics add up
+    telemetry = Metrics(prefix='incident_',
+                        multiprocess_dir=os.environ.get('METRICS_MULTIPROC_DIR'))
+    telemetry.register_counter('api_requests_total',
+                             'HTTP requests by endpoint and status code',
+                             ('endpoint', 'status'))
+    telemetry.register_histogram('api_request_duration_seconds',
+                               'HTTP request latency', ('endpoint',))
+    telemetry.register_histogram('api_stage_duration_seconds',
+                               'Time spent in each stage of a request',
+                               ('endpoint', 'stage'))
+    telemetry.register_histogram('model_stage_duration_seconds',
+                               'Time spent in each stage of a classifier call',
+                               ('call', 'stage'))
+    telemetry.register_counter('predictions_total',
+                             'Predictions served by category and priority',
+                             ('category', 'priority'))
+    telemetry.register_counter('api_errors_total',
+                             'Failed predictions by endpoint and error type',
+                             ('endpoint', 'error'))
+
+def _observe_model_stages(call, timings):
+    """Classifier stage_observer feeding the model stage histogram"""
+    for stage, milliseconds in timings.items():
+        telemetry.observe('model_stage_duration_seconds', milliseconds / 1000,
+                        call=call, stage=stage[:-len('_ms')])
+
+_no_timer = nullcontext()
+
+def _stage(endpoint, stage):
+    """Context manager timing one request stage, a no-op when disabled"""
+    if telemetry is None:
+        return _no_timer
+    return telemetry.timer('api_stage_duration_seconds', endpoint=endpoint, stage=stage)
+
+def _count_predictions(predictions):
+    if telemetry is not None:
+        for prediction in predictions:
+            if 'error' not in prediction:
+                telemetry.inc('predictions_total', category=prediction['category'],
+                            priority=prediction['priority'])
+
+def load_models():
+    """Build the classifier, load the trained models and swap them in"""
+    global current_models, loaded_metadata_mtime
+    # Imported here so that pandas, sklearn and nltk are only pulled in
+    # when the models are actually loaded
+    from incident_classifier import IncidentClassifier
+    
+    metadata_mtime = _metadata_mtime()
+    loaded = IncidentClassifier(
+        text_cache_size=int(os.environ.get('PREPROCESS_CACHE_SIZE', 10000)),
+        lemma_cache_size=int(os.environ.get('LEMMA_CACHE_SIZE', 50000))
+    )
+    # MODEL_MMAP=1 memory-maps the model arrays so workers share their pages
+    # PREDICT_N_JOBS overrides the forests' n_jobs when serving
+    predict_n_jobs = os.environ.get('PREDICT_N_JOBS')
+    metadata = loaded.load_models(
+        'models',
+        mmap_mode='r' if os.environ.get('MODEL_MMAP') == '1' else None,
+        predict_n_jobs=int(predict_n_jobs) if predict_n_jobs else None,
+        # MODEL_COMPACT=1 serves the exported compact forests
+        compact=os.environ.get('MODEL_COMPACT') == '1'
+    )
+    if telemetry is not None:
+        loaded.stage_observer = _observe_model_stages
+    current_models = (loaded, metadata)
+    loaded_metadata_mtime = metadata_mtime
+    if prediction_cache is not None:
+        prediction_cache.clear()
+    model_status.update(state='ready', error=None)
+
+def _metadata_mtime():
+    try:
+        return os.stat(METADATA_PATH).st_mtime
+    except OSError:
+        return None
+
+_reload_lock = threading.Lock()
+
+def reload_models():
+    """
+    Load the models again in a background thread and swap them in
+
+    Requests already running finish with the models they started with. If
+    loading fails, the current models stay in service. Returns False when
+    a reload is already in progress.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    model_status['reloading'] = True
+    
+    def run():
+        try:
+            load_models()
+            model_status['last_reload_error'] = None
+        except Exception as e:
+            print(f"Error reloading models: {type(e).__name__}: {str(e)}")
+            model_status['last_reload_error'] = f'{type(e).__name__}: {str(e)}'
+        finally:
+            model_status['last_reload'] = time.strftime("%Y-%m-%d %H:%M:%S")
+            model_status['reloading'] = False
+            _reload_lock.release()
+    
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+def _watch_models():
+    """Reload the models whenever training writes a new model_metadata.json"""
+    attempted = None
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        mtime = _metadata_mtime()
+        # A version that failed to load is not retried until it changes again
+        if (mtime is not None and mtime not in (loaded_metadata_mtime, attempted)
+                and model_status['state'] != 'loading' and reload_models()):
+            attempted = mtime
+
+def _read_reload_marker():
+    try:
+        with open(RELOAD_MARKER) as f:
+            return f.read()
+    except OSError:
+        return None
+
+# Reload token this process has acted on; a worker forked from the master's
+# preloaded models after a reload still sees a newer token and reloads
+seen_reload_marker = _read_reload_marker() if RELOAD_MARKER else None
+
+def _watch_reload_marker():
+    """Reload the models whenever POST /admin/reload writes a new token"""
+    global seen_reload_marker
+    while True:
+        time.sleep(RELOAD_POLL_INTERVAL)
+        marker = _read_reload_marker()
+        # A reload already in progress may predate the request: retry later
+        if (marker is not None and marker != seen_reload_marker
+                and model_status['state'] != 'loading' and reload_models()):
+            seen_reload_marker = marker
+
+_watcher_pid = None
+
+def start_watchers():
+    """
+    Start the model watchers in this process (once per process)
+
+    Under serve.py the master preloads the app and forks the workers, so it
+    never runs them: a worker forked while the master reloaded would inherit
+    a reload lock held by a thread it does not have. serve.py calls this in
+    each worker after the fork instead (post_fork).
+    """
+    global _watcher_pid
+    if _watcher_pid == os.getpid():
+        return
+    _watcher_pid = os.getpid()
+    if MODEL_WATCH_INTERVAL > 0:
+        threading.Thread(target=_watch_models, daemon=True).start()
+    if RELOAD_MARKER:
+        threading.Thread(target=_watch_reload_marker, daemon=True).start()
+
+def _load_models_in_background():
+    """Load the models, recording a failure instead of exiting"""
+    try:
+        load_models()
+    except Exception as e:
+        print(f"Error loading models: {type(e).__name__}: {str(e)}")
+        model_status.update(state='error', error=f'{type(e).__name__}: {str(e)}')
+
 # Load the trained models
-try:
-    classifier = IncidentClassifier()
-    # Fix: Updated attribute names to match the IncidentClassifier class
-    classifier.category_pipeline = joblib.load('models/category_classifier.joblib')
-    classifier.priority_pipeline = joblib.load('models/priority_classifier.joblib')
-
-    with open('models/model_metadata.json', 'r') as f:
-        model_metadata = json.load(f)
-except Exception as e:
-    print(f"Error loading models: {type(e).__name__}: {str(e)}")
-    import os
-    print(f"Current working directory: {os.getcwd()}")
-    print("Please ensure models are trained before running the API.")
-    exit(1)
+if MODEL_LOADING == 'background':
+    threading.Thread(target=_load_models_in_background, daemon=True).start()
+else:
+    try:
+        load_models()
+    except Exception as e:
+        print(f"Error loading models: {type(e).__name__}: {str(e)}")
+        print(f"Current working directory: {os.getcwd()}")
+        print("Please ensure models are trained before running the API.")
+        exit(1)
+# serve.py sets SERVE_PRELOAD=1 and starts the watchers in its workers
+if os.environ.get('SERVE_PRELOAD') != '1':
+    start_watchers()
+
+@app.before_request
+def start_request_timer():
+    if telemetry is not None:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Count the request and observe its latency"""
+    if telemetry is not None and 'request_start' in g:
+        endpoint = request.endpoint or 'unmatched'
+        telemetry.observe('api_request_duration_seconds',
+                        time.perf_counter() - g.request_start, endpoint=endpoint)
+        telemetry.inc('api_requests_total', endpoint=endpoint, status=response.status_code)
+    return response
+
+@app.before_request
+def require_models():
+    """Answer 503 on model endpoints until the models are loaded"""
+    if os.environ.get('SERVE_PRELOAD') != '1':
+        start_watchers()
+    if (request.endpoint not in ('health_check', 'reload', 'prometheus_metrics')
+            and model_status['state'] != 'ready'):
+        return jsonify({
+            'error': 'Models are not loaded',
+            'status': model_status['state']
+        }), 503
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Basic health check endpoint"""
+    if model_status['state'] != 'ready':
+        response = {'status': model_status['state']}
+        if model_status['error']:
+            response['error'] = model_status['error']
+        return jsonify(response), 503
     return jsonify({
         'status': 'healthy',
-        'model_training_date': model_metadata['training_date']
+        'pid': os.getpid(),
+        'server': SERVER_INFO,
+        'model_training_date': current_models[1]['training_date'],
+        'reloading': model_status['reloading'],
+        'last_reload': model_status['last_reload'],
+        'last_reload_error': model_status['last_reload_error']
     })
 
+@app.route('/admin/reload', methods=['POST'], endpoint='reload')
+def reload_endpoint():
+    """Start loading the models from disk and swap them in when ready"""
+    if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'error': 'Invalid admin token'}), 403
+    if RELOAD_MARKER:
+        # Every worker, this one included, picks the new token up within
+        # RELOAD_POLL_INTERVAL seconds
+        temp = f'{RELOAD_MARKER}.{os.getpid()}'
+        with open(temp, 'w') as f:
+            f.write(f'{time.time_ns()} {os.getpid()}')
+        os.replace(temp, RELOAD_MARKER)
+        return jsonify({'status': 'reloading', 'workers': 'all'}), 202
+    if not reload_models():
+        return jsonify({'status': 'reload already in progress'}), 409
+    return jsonify({'status': 'reloading'}), 202
+
 @app.route('/predict', methods=['POST'])
 def predict_incident():
     """Endpoint for incident classification"""
+    classifier, model_metadata = current_models
     try:
-        data = request.get_json()
+        with _stage('predict_incident', 'parse'):
+            # Malformed JSON or encoding gives None: answered as missing below
+            data = request.get_json(silent=True)
         
         if not data or 'description' not in data:
             return jsonify({
@@ -43,18 +334,112 @@ def predict_incident():
                 }
             }), 400
         
-        prediction = classifier.predict(data['description'])
+        # ?timings=1 adds per-stage durations to the prediction, so it is
+        # never answered from the cache
+        include_timings = request.args.get('timings') == '1'
+        cache_key = None
+        prediction = None
+        if prediction_cache is not None and not include_timings:
+            cache_key = prediction_cache.make_key(
+                data['description'], model_metadata['training_date'])
+            if cache_key is not None:
+                prediction = prediction_cache.get(cache_key)
+        cache_status = 'HIT' if prediction is not None else 'MISS'
         
-        return jsonify({
-            'input_description': data['description'],
-            'prediction': prediction,
-            'model_info': {
-                'training_date': model_metadata['training_date'],
-                'performance_metrics': model_metadata['performance_metrics']
-            }
-        })
+        if prediction is None:
+            with _stage('predict_incident', 'predict'):
+                if batcher is not None and not include_timings:
+                    prediction = batcher.predict(data['description'], classifier)
+                    if 'error' in prediction:
+                        raise ValueError(prediction['error'])
+                else:
+                    prediction = classifier.predict(
+                        data['description'],
+                        include_timings=include_timings
+                    )
+            if cache_key is not None:
+                prediction_cache.put(cache_key, prediction)
+        _count_predictions([prediction])
+        
+        with _stage('predict_incident', 'serialize'):
+            response = jsonify({
+                'input_description': data['description'],
+                'prediction': prediction,
+                'model_info': {
+                    'training_date': model_metadata['training_date'],
+                    'performance_metrics': model_metadata['performance_metrics']
+                }
+            })
+        if cache_key is not None:
+            response.headers['X-Cache'] = cache_status
+        return response
         
     except Exception as e:
+        if telemetry is not None:
+            telemetry.inc('api_errors_total', endpoint='predict_incident',
+                        error=type(e).__name__)
+        return jsonify({
+            'error': f'Prediction error: {str(e)}'
+        }), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_incident_batch():
+    """Endpoint for classifying many incidents in a single request"""
+    classifier, model_metadata = current_models
+    try:
+        with _stage('predict_incident_batch', 'parse'):
+            # Malformed JSON or encoding gives None: answered as missing below
+            data = request.get_json(silent=True)
+
+        if not data or not isinstance(data.get('descriptions'), list):
+            return jsonify({
+                'error': 'Missing incident descriptions',
+                'required_format': {
+                    'descriptions': ['text description of each incident']
+                }
+            }), 400
+
+        descriptions = data['descriptions']
+        if len(descriptions) > MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'Batch too large: {len(descriptions)} descriptions '
+                         f'(maximum is {MAX_BATCH_SIZE})'
+            }), 413
+
+        # Only valid descriptions reach the classifier; the rest get an error
+        valid_positions = [i for i, d in enumerate(descriptions)
+                           if isinstance(d, str) and d.strip()]
+        with _stage('predict_incident_batch', 'predict'):
+            predictions = classifier.predict_batch(
+                [descriptions[i] for i in valid_positions])
+        _count_predictions(predictions)
+
+        results = [{
+            'input_description': description,
+            'error': 'Missing incident description'
+        } for description in descriptions]
+        for i, prediction in zip(valid_positions, predictions):
+            if 'error' in prediction:
+                results[i]['error'] = prediction['error']
+            else:
+                results[i] = {
+                    'input_description': descriptions[i],
+                    'prediction': prediction
+                }
+
+        with _stage('predict_incident_batch', 'serialize'):
+            return jsonify({
+                'results': results,
+                'model_info': {
+                    'training_date': model_metadata['training_date'],
+                    'performance_metrics': model_metadata['performance_metrics']
+                }
+            })
+
+    except Exception as e:
+        if telemetry is not None:
+            telemetry.inc('api_errors_total', endpoint='predict_incident_batch',
+                        error=type(e).__name__)
         return jsonify({
             'error': f'Prediction error: {str(e)}'
         }), 500
@@ -62,14 +447,28 @@ def predict_incident():
 @app.route('/metrics', methods=['GET'])
 def get_metrics():
     """Endpoint to get model performance metrics"""
-    return jsonify({
+    classifier, model_metadata = current_models
+    metrics = {
         'training_date': model_metadata['training_date'],
         'dataset_stats': model_metadata['dataset_stats'],
-        'performance_metrics': model_metadata['performance_metrics']
-    })
+        'performance_metrics': model_metadata['performance_metrics'],
+        'preprocess_cache': classifier.cache_stats()
+    }
+    if batcher is not None:
+        metrics['micro_batching'] = batcher.stats()
+    if prediction_cache is not None:
+        metrics['prediction_cache'] = prediction_cache.stats()
+    return jsonify(metrics)
+
+@app.route('/metrics/prometheus', methods=['GET'])
+def prometheus_metrics():
+    """Latency histograms and counters in the Prometheus text format"""
+    if telemetry is None:
+        return jsonify({'error': 'Instrumentation is disabled (set INSTRUMENTATION=1)'}), 404
+    return telemetry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=True)
 
 
 
@@ -0,0 +1,307 @@
+"""
+Asyncio serving variant of the incident classification API.
+
+The HTTP layer runs on aiohttp's event loop and never classifies anything
+itself: predictions run in a process pool whose workers each load the
+models once at startup, so the GIL does not limit throughput and a slow
+forest walk never blocks other requests. The number of requests handed to
+the pool at once is bounded; beyond that the server answers 503 right away
+so latency stays predictable under bursts.
+
+    python async_app.py --workers 4 --max-pending 32 --port 5000
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from aiohttp import web
+
+# Per-process classifier used by the pool workers
+_worker_classifier = None
+
+
+def _init_worker(models_dir, mmap_mode, compact):
+    """
+    Load the models once in each pool worker and run one prediction
+
+    Every worker process runs this before its first task, so the first real
+    request a worker gets never pays for loading or the first prediction.
+    """
+    global _worker_classifier
+    from incident_classifier import IncidentClassifier
+
+    _worker_classifier = IncidentClassifier()
+    _worker_classifier.load_models(models_dir, mmap_mode=mmap_mode, predict_n_jobs=1,
+                                   compact=compact)
+    _worker_classifier.predict("Cannot connect to the database server")
+
+
+def _worker_pid(hold_seconds):
+    """Return the worker's pid, holding it briefly so sibling tasks go elsewhere"""
+    time.sleep(hold_seconds)
+    return os.getpid()
+
+
+def _predict(text):
+    """Classify one description inside a pool worker"""
+    return _worker_classifier.predict(text)
+
+
+def _predict_batch(texts):
+    """Classify a list of descriptions inside a pool worker"""
+    return _worker_classifier.predict_batch(texts)
+
+
+class PredictionPool:
+    """Process pool with a bound on the number of requests in flight"""
+
+    def __init__(self, workers, max_pending, models_dir='models', mmap_mode=None,
+                 compact=False):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(models_dir, mmap_mode, compact)
+        )
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def warm_up(self, max_rounds=10):
+        """
+        Start every worker and wait until each has loaded the models
+
+        The pool starts workers on demand and any worker may take any task,
+        so rounds of tasks are sent until every worker pid has answered (at
+        most max_rounds). Returns the set of pids seen.
+        """
+        pids = set()
+        for _ in range(max_rounds):
+            pids.update(self.executor.map(_worker_pid, [0.05] * self.workers))
+            if len(pids) >= self.workers:
+                break
+        else:
+            print(f"Warning: only {len(pids)} of {self.workers} workers answered the warm-up")
+        return pids
+
+    def saturated(self):
+        """True when max_pending requests are already in the pool"""
+        return self.in_flight >= self.max_pending
+
+    async def run(self, function, argument):
+        """Run function(argument) in the pool; callers check saturated() first"""
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, function, argument)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def stats(self):
+        """Return pool size and request counters"""
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'failed': self.failed
+        }
+
+    def shutdown(self):
+        """Stop the workers once queued predictions are done"""
+        self.executor.shutdown(wait=True)
+
+
+def _overloaded(pool):
+    """503 response sent when the pool already has max_pending requests"""
+    pool.rejected += 1
+    return web.json_response(
+        {'error': 'Server is at capacity, retry shortly'},
+        status=503, headers={'Retry-After': '1'}
+    )
+
+
+def _model_info(request):
+    """Model details returned with every prediction"""
+    metadata = request.app['model_metadata']
+    return {
+        'training_date': metadata['training_date'],
+        'performance_metrics': metadata['performance_metrics']
+    }
+
+
+async def health_check(request):
+    """Basic health check endpoint"""
+    return web.json_response({
+        'status': 'healthy',
+        'model_training_date': request.app['model_metadata']['training_date']
+    })
+
+
+async def predict_incident(request):
+    """Endpoint for incident classification"""
+    pool = request.app['pool']
+    try:
+        data = await request.json()
+    except ValueError:
+        # Invalid JSON or a body that is not UTF-8 (UnicodeDecodeError)
+        data = None
+
+    if not isinstance(data, dict) or 'description' not in data:
+        return web.json_response({
+            'error': 'Missing incident description',
+            'required_format': {
+                'description': 'text description of the security incident'
+            }
+        }, status=400)
+
+    if pool.saturated():
+        return _overloaded(pool)
+    try:
+        prediction = await pool.run(_predict, data['description'])
+    except Exception as e:
+        return web.json_response({'error': f'Prediction error: {str(e)}'}, status=500)
+
+    return web.json_response({
+        'input_description': data['description'],
+        'prediction': prediction,
+        'model_info': _model_info(request)
+    })
+
+
+async def predict_incident_batch(request):
+    """Endpoint for classifying many incidents in a single request"""
+    pool = request.app['pool']
+    max_batch_size = request.app['max_batch_size']
+    try:
+        data = await request.json()
+    except ValueError:
+        # Invalid JSON or a body that is not UTF-8 (UnicodeDecodeError)
+        data = None
+
+    if not isinstance(data, dict) or not isinstance(data.get('descriptions'), list):
+        return web.json_response({
+            'error': 'Missing incident descriptions',
+            'required_format': {
+                'descriptions': ['text description of each incident']
+            }
+        }, status=400)
+
+    descriptions = data['descriptions']
+    if len(descriptions) > max_batch_size:
+        return web.json_response({
+            'error': f'Batch too large: {len(descriptions)} descriptions '
+                     f'(maximum is {max_batch_size})'
+        }, status=413)
+
+    if pool.saturated():
+        return _overloaded(pool)
+
+    # Only valid descriptions reach the classifier; the rest get an error
+    valid_positions = [i for i, d in enumerate(descriptions)
+                       if isinstance(d, str) and d.strip()]
+    try:
+        predictions = await pool.run(
+            _predict_batch, [descriptions[i] for i in valid_positions])
+    except Exception as e:
+        return web.json_response({'error': f'Prediction error: {str(e)}'}, status=500)
+
+    results = [{
+        'input_description': description,
+        'error': 'Missing incident description'
+    } for description in descriptions]
+    for i, prediction in zip(valid_positions, predictions):
+        if 'error' in prediction:
+            results[i]['error'] = prediction['error']
+        else:
+            results[i] = {
+                'input_description': descriptions[i],
+                'prediction': prediction
+            }
+
+    return web.json_response({
+        'results': results,
+        'model_info': _model_info(request)
+    })
+
+
+async def get_metrics(request):
+    """Endpoint to get model performance metrics and pool state"""
+    metadata = request.app['model_metadata']
+    return web.json_response({
+        'training_date': metadata['training_date'],
+        'dataset_stats': metadata['dataset_stats'],
+        'performance_metrics': metadata['performance_metrics'],
+        'process_pool': request.app['pool'].stats()
+    })
+
+
+async def _shutdown_pool(app):
+    """Let in-flight predictions finish, then stop the workers"""
+    await asyncio.get_running_loop().run_in_executor(None, app['pool'].shutdown)
+
+
+def create_app(workers, max_pending, max_batch_size=1000, models_dir='models',
+               mmap_mode=None, compact=False):
+    """Build the aiohttp application with a warmed-up prediction pool"""
+    with open(os.path.join(models_dir, 'model_metadata.json'), 'r') as f:
+        model_metadata = json.load(f)
+
+    pool = PredictionPool(workers, max_pending, models_dir, mmap_mode, compact)
+    start = time.perf_counter()
+    pids = pool.warm_up()
+    print(f"Prediction pool ready: {len(pids)} workers in "
+          f"{time.perf_counter() - start:.1f}s")
+
+    app = web.Application()
+    app['pool'] = pool
+    app['model_metadata'] = model_metadata
+    app['max_batch_size'] = max_batch_size
+    app.router.add_get('/health', health_check)
+    app.router.add_post('/predict', predict_incident)
+    app.router.add_post('/predict/batch', predict_incident_batch)
+    app.router.add_get('/metrics', get_metrics)
+    app.on_cleanup.append(_shutdown_pool)
+    return app
+
+
+def main():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description='Serve the API on asyncio with a process pool')
+    parser.add_argument('--host', default=env('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(env('PORT', 5000)))
+    parser.add_argument('--workers', type=int,
+                        default=int(env('POOL_WORKERS', os.cpu_count() or 1)),
+                        help='prediction processes (POOL_WORKERS, default: CPU count)')
+    parser.add_argument('--max-pending', type=int, default=int(env('POOL_MAX_PENDING', 0)),
+                        help='requests handed to the pool at once before answering 503 '
+                             '(POOL_MAX_PENDING, default: 4 per worker)')
+    parser.add_argument('--max-batch-size', type=int,
+                        default=int(env('MAX_BATCH_SIZE', 1000)))
+    args = parser.parse_args()
+
+    app = create_app(
+        args.workers,
+        args.max_pending or args.workers * 4,
+        max_batch_size=args.max_batch_size,
+        mmap_mode='r' if env('MODEL_MMAP') == '1' else None,
+        compact=env('MODEL_COMPACT') == '1'
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Batch text preprocessing for IncidentClassifier.
+
+Produces exactly what IncidentClassifier.preprocess_text returns, for a whole
+list of descriptions at once:
+
+- identical descriptions are processed once (pd.factorize), which matters
+  for templated alerts;
+- lowercasing runs as a pandas string operation and each unique description
+  is tokenized once. ASCII descriptions use a precompiled re pattern, about
+  3x faster than the NLTK tokenizer; the others go through the tokenizer
+  itself, since NLTK compiles the pattern with the regex engine, whose \\w
+  differs from re's on some Unicode (combining marks);
+- every token goes through a token -> lemma lookup table, where '' marks a
+  dropped token (stop word or single character). The table is built from the
+  training vocabulary and saved with the models, so only tokens never seen
+  before are sent to the WordNet lemmatizer.
+"""
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+
+class BatchPreprocessor:
+    def __init__(self, token_pattern, tokenize, lemmatize, stop_words, table=None):
+        """
+        Args:
+            token_pattern: str, regular expression of the tokenizer
+            tokenize: callable, lowercased description -> list of tokens
+            lemmatize: callable, token -> lemma (the WordNet fallback)
+            stop_words: set of str, tokens dropped before lemmatization
+            table: dict, token -> lemma or '' from a previous fit
+        """
+        self.token_regexp = re.compile(token_pattern)
+        self.tokenize = tokenize
+        self.lemmatize = lemmatize
+        self.stop_words = stop_words
+        self.table = dict(table or {})
+        # Tokens that went to the fallback lemmatizer
+        self.fallback_count = 0
+
+    def transform(self, texts, update=False):
+        """
+        Preprocess a list of descriptions
+
+        Args:
+            texts: list or array of descriptions (missing values give '')
+            update: bool, add the tokens missing from the table to it (used
+                       while training; at serving time the table stays fixed
+                       so arbitrary input cannot grow it)
+
+        Returns:
+            list of str, one preprocessed description per input
+        """
+        series = pd.Series(texts, dtype=object)
+        if series.empty:
+            return []
+        missing = series.isna()
+        lowered = series.where(~missing, '').str.lower()
+        # Non-string values (numbers...) come out of .str as NaN
+        others = lowered.isna()
+        if others.any():
+            lowered[others] = [str(value).lower() for value in series[others]]
+
+        codes, uniques = pd.factorize(lowered)
+        findall = self.token_regexp.findall
+        token_lists = [findall(text) if text.isascii() else self.tokenize(text)
+                       for text in uniques]
+
+        unseen = set(chain.from_iterable(token_lists)).difference(self.table)
+        resolved = {token: self._resolve(token) for token in unseen}
+        self.fallback_count += len(resolved)
+        if update:
+            self.table.update(resolved)
+            lookup = self.table
+        else:
+            # The table stays as it is; unknown tokens are looked up in a copy
+            lookup = {**self.table, **resolved} if resolved else self.table
+
+        get = lookup.__getitem__
+        processed = np.empty(len(token_lists), dtype=object)
+        processed[:] = [' '.join(filter(None, map(get, tokens))) for tokens in token_lists]
+        return processed[codes].tolist()
+
+    def fit(self, texts):
+        """Build the lookup table from the tokens of texts; returns self"""
+        self.transform(texts, update=True)
+        return self
+
+    def _resolve(self, token):
+        """Table entry of one token: its lemma, or '' if it is dropped"""
+        if token in self.stop_words or len(token) <= 1:
+            return ''
+        return self.lemmatize(token)
+
+
+class TokenNgrams:
+    """
+    Vectorizer analyzer for preprocessed descriptions
+
+    Preprocessing already lowercases, tokenizes and drops stop words, and
+    joins the tokens with single spaces, so the vectorizers only need to
+    split on spaces and build the word n-grams (same order as scikit-learn's
+    own word analyzer), instead of running their regex tokenizer and stop
+    word list a second time. Token lists and tuples are accepted as well.
+    """
+
+    def __init__(self, ngram_range=(1, 1)):
+        self.ngram_range = ngram_range
+
+    def __call__(self, doc):
+        tokens = doc.split() if isinstance(doc, str) else list(doc)
+        min_n, max_n = self.ngram_range
+        ngrams = tokens[:] if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            ngrams.extend(map(' '.join, zip(*(tokens[i:] for i in range(n)))))
+        return ngrams
+
+    def __repr__(self):
+        return f'TokenNgrams(ngram_range={self.ngram_range})'
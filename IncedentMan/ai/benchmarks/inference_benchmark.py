@@ -0,0 +1,253 @@
+"""
+Inference benchmark for IncidentClassifier and the API.
+
+Measures, on descriptions sampled from data/*.csv (or any CSVs with a
+description column, e.g. generator output):
+
+    load        model load time
+    preprocess  preprocess_text cost per description, with cold and warm caches
+    single      predict() latency percentiles, one description at a time
+    batch       predict_batch() throughput for several batch sizes
+    memory      peak RSS of the process
+    http        optional load test of a running server (--url)
+
+Sampling is seeded, so runs on the same models and data are comparable.
+Results are written as JSON; --compare flags metrics that got worse than a
+previous result by more than --tolerance, e.g. between two model versions:
+
+    python benchmarks/inference_benchmark.py --output before.json
+    python incident_classifier.py
+    python benchmarks/inference_benchmark.py --compare before.json --output after.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_DIR)
+
+from incident_classifier import IncidentClassifier
+
+# (metric path, True when a higher value is better) checked by --compare
+COMPARED_METRICS = [
+    (('load', 'seconds'), False),
+    (('preprocess', 'cold_ms_per_text'), False),
+    (('single', 'p50_ms'), False),
+    (('single', 'p99_ms'), False),
+    (('memory', 'peak_rss_mib'), False),
+    (('http', 'requests_per_sec'), True),
+    (('http', 'p99_ms'), False),
+]
+
+
+def load_descriptions(pattern, limit, seed):
+    """Sample up to limit descriptions from the CSV files matching pattern"""
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise FileNotFoundError(f"No CSV files match {pattern}")
+    df = pd.concat([pd.read_csv(file, usecols=['description']) for file in files],
+                   ignore_index=True)
+    return df['description'].sample(min(limit, len(df)), random_state=seed).tolist()
+
+
+def latency_summary(seconds):
+    """Percentiles, mean and max of a list of durations, in milliseconds"""
+    ms = np.array(seconds) * 1000
+    summary = {f'p{p}_ms': float(np.percentile(ms, p)) for p in (50, 90, 95, 99)}
+    summary['mean_ms'] = float(ms.mean())
+    summary['max_ms'] = float(ms.max())
+    return summary
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process (ru_maxrss is in KiB on Linux)"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def bench_load(models_dir, mmap_mode, compact):
+    """Load the models and return (classifier, metadata, seconds)"""
+    classifier = IncidentClassifier()
+    start = time.perf_counter()
+    metadata = classifier.load_models(models_dir, mmap_mode=mmap_mode, predict_n_jobs=1,
+                                      compact=compact)
+    return classifier, metadata, time.perf_counter() - start
+
+
+def bench_preprocess(classifier, texts):
+    """Per-description preprocessing cost with empty caches, then with warm ones"""
+    classifier.clear_caches()
+    start = time.perf_counter()
+    for text in texts:
+        classifier.preprocess_text(text)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for text in texts:
+        classifier.preprocess_text(text)
+    warm = time.perf_counter() - start
+    return {
+        'texts': len(texts),
+        'cold_ms_per_text': cold / len(texts) * 1000,
+        'warm_ms_per_text': warm / len(texts) * 1000
+    }
+
+
+def bench_single(classifier, texts, iterations, warmup):
+    """predict() latency for one description at a time"""
+    for text in texts[:warmup]:
+        classifier.predict(text)
+    latencies = []
+    for i in range(iterations):
+        text = texts[i % len(texts)]
+        start = time.perf_counter()
+        classifier.predict(text)
+        latencies.append(time.perf_counter() - start)
+    return dict(latency_summary(latencies), iterations=iterations)
+
+
+def bench_batch(classifier, texts, batch_size, min_seconds, rng):
+    """predict_batch() throughput for one batch size"""
+    classifier.predict_batch(texts[:batch_size])
+    latencies = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds or len(latencies) < 3:
+        batch = rng.sample(texts, min(batch_size, len(texts)))
+        batch_start = time.perf_counter()
+        classifier.predict_batch(batch)
+        latencies.append(time.perf_counter() - batch_start)
+    total = sum(latencies)
+    return {
+        'batches': len(latencies),
+        'texts_per_sec': len(latencies) * batch_size / total,
+        'batch_p50_ms': float(np.percentile(np.array(latencies) * 1000, 50))
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return the metrics that are worse than baseline by more than tolerance"""
+    regressions = []
+    checks = list(COMPARED_METRICS)
+    for size in results.get('batch', {}):
+        checks.append((('batch', size, 'texts_per_sec'), True))
+    for path, higher_is_better in checks:
+        current, previous = results, baseline
+        for key in path:
+            current = current.get(key, {}) if isinstance(current, dict) else {}
+            previous = previous.get(key, {}) if isinstance(previous, dict) else {}
+        if not isinstance(current, (int, float)) or not isinstance(previous, (int, float)):
+            continue
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append({'metric': '.'.join(path), 'baseline': previous,
+                                'current': current, 'change': change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark classifier and API inference')
+    parser.add_argument('--models-dir', default=os.path.join(AI_DIR, 'models'))
+    parser.add_argument('--data', default=os.path.join(AI_DIR, 'data', '*.csv'),
+                        help='glob of CSV files with a description column')
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=500,
+                        help='single-description predictions to time')
+    parser.add_argument('--batch-sizes', default='1,8,32,128,512')
+    parser.add_argument('--batch-seconds', type=float, default=3,
+                        help='minimum time spent per batch size')
+    parser.add_argument('--mmap', action='store_true', help="load with mmap_mode='r'")
+    parser.add_argument('--compact', action='store_true', help='use the exported compact forests')
+    parser.add_argument('--url', help='also load test a running server, e.g. http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='earlier results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='relative change counted as a regression (default 0.10)')
+    args = parser.parse_args()
+
+    texts = load_descriptions(args.data, args.samples, args.seed)
+    classifier, metadata, load_seconds = bench_load(
+        args.models_dir, 'r' if args.mmap else None, args.compact)
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scikit-learn': sklearn.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count()
+        },
+        'model': {
+            'training_date': metadata['training_date'],
+            'feature_mode': metadata.get('feature_mode', 'separate'),
+            'mmap': args.mmap,
+            'compact': args.compact
+        },
+        'settings': {
+            'data': args.data,
+            'samples': len(texts),
+            'seed': args.seed
+        },
+        'load': {'seconds': load_seconds, 'peak_rss_mib_after_load': peak_rss_mib()}
+    }
+
+    print(f"Model {metadata['training_date']}: loaded in {load_seconds:.2f}s")
+    results['preprocess'] = bench_preprocess(classifier, texts)
+    print(f"Preprocess: {results['preprocess']['cold_ms_per_text']:.3f} ms/text cold, "
+          f"{results['preprocess']['warm_ms_per_text']:.3f} ms/text warm")
+
+    results['single'] = bench_single(classifier, texts, args.iterations, warmup=20)
+    print(f"Single: p50 {results['single']['p50_ms']:.2f} ms, "
+          f"p99 {results['single']['p99_ms']:.2f} ms")
+
+    rng = random.Random(args.seed)
+    results['batch'] = {}
+    for size in (int(s) for s in args.batch_sizes.split(',')):
+        results['batch'][str(size)] = bench_batch(classifier, texts, size,
+                                                  args.batch_seconds, rng)
+        print(f"Batch {size:>5}: {results['batch'][str(size)]['texts_per_sec']:>9.1f} texts/s")
+
+    results['memory'] = {'peak_rss_mib': peak_rss_mib()}
+    print(f"Peak RSS: {results['memory']['peak_rss_mib']:.0f} MiB")
+
+    if args.url:
+        from load_test import load_test
+        load_test(args.url, texts, args.concurrency, 2)
+        results['http'] = load_test(args.url, texts, args.concurrency, args.duration)
+        print(f"HTTP {args.url}: {results['http']['requests_per_sec']:.1f} req/s, "
+              f"p99 {results['http'].get('p99_ms', 0):.1f} ms, "
+              f"{results['http']['errors']} errors")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        results['regressions'] = compare(results, baseline, args.tolerance)
+        for regression in results['regressions']:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']:.3f} -> "
+                  f"{regression['current']:.3f} ({regression['change']:+.0%})")
+        if results['regressions']:
+            exit_code = 1
+        else:
+            print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+HTTP load test for the incident classification API.
+
+Sends POST /predict requests from concurrent clients, each holding one
+keep-alive connection, using descriptions sampled from data/*.csv. Reports
+requests/sec and latency percentiles per target, so the dev server
+(python app.py) and the production server (python serve.py) can be
+compared side by side. Each result also records the server settings from
+/health (worker class, workers, threads, keep-alive) and how many TCP
+connections the clients opened: one per client when keep-alive works, one
+per request when the server closes them:
+
+    python benchmarks/load_test.py --url dev=http://localhost:5000 \
+        --url prod=http://localhost:8000 --concurrency 16 --duration 30
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_descriptions(limit=5000, seed=0):
+    """Sample incident descriptions from the training CSVs"""
+    files = sorted(glob.glob(os.path.join(AI_DIR, 'data', '*.csv')))
+    df = pd.concat([pd.read_csv(file, usecols=['description']) for file in files],
+                   ignore_index=True)
+    return df['description'].sample(min(limit, len(df)), random_state=seed).tolist()
+
+
+def server_info(url):
+    """Server settings reported on /health ('unknown' if it does not say)"""
+    parsed = urllib.parse.urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    try:
+        connection.request('GET', '/health')
+        return json.loads(connection.getresponse().read()).get('server', 'unknown')
+    except (OSError, http.client.HTTPException, ValueError):
+        return 'unknown'
+    finally:
+        connection.close()
+
+
+def run_client(url, path, payloads, deadline, latencies, errors, connections, lock):
+    """Send requests over one keep-alive connection until the deadline"""
+    parsed = urllib.parse.urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    local_latencies, local_errors = [], 0
+    local_connections, closed = 0, True
+    while time.perf_counter() < deadline:
+        body = random.choice(payloads)
+        # http.client reconnects on the next request after a close
+        local_connections += closed
+        closed = False
+        start = time.perf_counter()
+        try:
+            connection.request('POST', path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                local_latencies.append(time.perf_counter() - start)
+            else:
+                local_errors += 1
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+                closed = True
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            closed = True
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+        connections.append(local_connections)
+
+
+def load_test(url, descriptions, concurrency, duration, path='/predict'):
+    """Run one load test against url and return its summary"""
+    payloads = [json.dumps({'description': d}) for d in descriptions]
+    latencies, errors, connections, lock = [], [], [], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+    clients = [threading.Thread(target=run_client,
+                                args=(url, path, payloads, deadline, latencies, errors,
+                                      connections, lock))
+               for _ in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    summary = {
+        'url': url,
+        'concurrency': concurrency,
+        'duration_s': elapsed,
+        'requests': len(latencies),
+        'errors': sum(errors),  # non-200 answers and connection failures
+        'connections': sum(connections),
+        'requests_per_sec': len(latencies) / elapsed,
+    }
+    if len(latencies_ms):
+        for percentile in (50, 90, 95, 99):
+            summary[f'p{percentile}_ms'] = float(np.percentile(latencies_ms, percentile))
+        summary['max_ms'] = float(latencies_ms.max())
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the /predict endpoint')
+    parser.add_argument('--url', action='append', required=True,
+                        help='target as NAME=URL or URL; repeat to compare servers')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20, help='seconds per target')
+    parser.add_argument('--warmup', type=float, default=2, help='seconds of warm-up per target')
+    parser.add_argument('--path', default='/predict')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    descriptions = load_descriptions()
+    results = {}
+    for target in args.url:
+        name, _, url = target.partition('=')
+        if not url or '://' in name:
+            name, url = target, target
+        if args.warmup:
+            load_test(url, descriptions, args.concurrency, args.warmup, args.path)
+        results[name] = load_test(url, descriptions, args.concurrency, args.duration, args.path)
+        results[name]['server'] = server_info(url)
+
+    width = max(len(name) for name in results) + 2
+    print(f"{'target':<{width}}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}"
+          f"{'conns':>8}   server")
+    for name, result in results.items():
+        print(f"{name:<{width}}{result['requests_per_sec']:>10.1f}{result.get('p50_ms', 0):>10.1f}"
+              f"{result.get('p99_ms', 0):>10.1f}{result['errors']:>8}{result['connections']:>8}"
+              f"   {json.dumps(result['server'])}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
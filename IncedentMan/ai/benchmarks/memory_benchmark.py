@@ -0,0 +1,109 @@
+"""
+Measure resident memory per worker process for different model loading modes.
+
+Starts N worker processes that each hold the trained models and serve one
+warm-up prediction, then reads /proc/<pid>/smaps_rollup for every worker
+while all of them are alive (Linux only). Modes:
+
+    load     every worker joblib.loads its own copy (current app.py behaviour)
+    mmap     every worker loads with mmap_mode='r'
+    preload  the parent loads once and forks the workers (copy-on-write)
+
+Rss counts shared pages in full; Pss splits them between the processes
+sharing them, so it is the per-worker cost to compare. Run from the ai/
+directory with trained models in models/:
+
+    python benchmarks/memory_benchmark.py --workers 4 --output memory.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incident_classifier import IncidentClassifier
+
+WARMUP_TEXT = "Cannot connect to the database server"
+
+
+def read_memory(pid):
+    """Return Rss, Pss and private memory of a process in MiB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mib': values['Rss'],
+        'pss_mib': values['Pss'],
+        'private_mib': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    }
+
+
+def worker(classifier, models_dir, mmap_mode, ready, done):
+    """Hold the models, make one prediction, and stay alive until measured"""
+    if classifier is None:
+        classifier = IncidentClassifier()
+        classifier.load_models(models_dir, mmap_mode=mmap_mode)
+    classifier.predict(WARMUP_TEXT)
+    ready.put(os.getpid())
+    done.wait()
+
+
+def measure(mode, workers, models_dir):
+    """Start the workers for one mode and return their memory usage"""
+    context = multiprocessing.get_context('fork')
+    ready = context.Queue()
+    done = context.Event()
+
+    classifier = None
+    if mode == 'preload':
+        classifier = IncidentClassifier()
+        classifier.load_models(models_dir)
+    mmap_mode = 'r' if mode == 'mmap' else None
+
+    processes = [context.Process(target=worker,
+                                 args=(classifier, models_dir, mmap_mode, ready, done))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        pids = [ready.get(timeout=600) for _ in processes]
+        per_worker = [read_memory(pid) for pid in pids]
+    finally:
+        done.set()
+        for process in processes:
+            process.join()
+
+    summary = {key: sum(m[key] for m in per_worker) / len(per_worker)
+               for key in per_worker[0]}
+    summary['total_pss_mib'] = sum(m['pss_mib'] for m in per_worker)
+    return {'workers': per_worker, 'mean': summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-worker model memory')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--modes', nargs='+', default=['load', 'mmap', 'preload'])
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        results[mode] = measure(mode, args.workers, args.models_dir)
+        mean = results[mode]['mean']
+        print(f"{mode:<8} per worker: Rss {mean['rss_mib']:8.1f} MiB  "
+              f"Pss {mean['pss_mib']:8.1f} MiB  private {mean['private_mib']:8.1f} MiB  "
+              f"| all workers Pss {mean['total_pss_mib']:8.1f} MiB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
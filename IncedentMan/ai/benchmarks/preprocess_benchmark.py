@@ -0,0 +1,102 @@
+"""
+Throughput and equivalence benchmark for text preprocessing.
+
+Runs the same seeded sample of descriptions through
+
+    per_text      preprocess_text() one description at a time (cold caches)
+    batch_cold    the batch preprocessor with an empty lemma table, which
+                  builds the table as training does
+    batch_warm    the batch preprocessor with the table already built, as
+                  after load_models
+    parallel      preprocess_texts() with --jobs worker processes (if > 1)
+
+and reports rows/sec for each. Every output is compared with preprocess_text;
+the script exits 1 if any description differs:
+
+    python benchmarks/preprocess_benchmark.py --samples 200000 --output preprocess.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from incident_classifier import IncidentClassifier
+from inference_benchmark import load_descriptions
+
+
+def timed(function, texts):
+    """Run function(texts) and return (output, rows/sec)"""
+    start = time.perf_counter()
+    output = function(texts)
+    return output, len(texts) / (time.perf_counter() - start)
+
+
+def mismatches(expected, actual):
+    """Positions where two preprocessed lists differ"""
+    if len(expected) != len(actual):
+        return list(range(max(len(expected), len(actual))))
+    return [i for i, (a, b) in enumerate(zip(expected, actual)) if a != b]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark text preprocessing throughput')
+    parser.add_argument('--data', default=os.path.join(AI_DIR, 'data', '*.csv'))
+    parser.add_argument('--samples', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='also time preprocess_texts with this many worker processes')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    texts = load_descriptions(args.data, args.samples, args.seed)
+    print(f"{len(texts)} descriptions")
+
+    classifier = IncidentClassifier()
+    reference, per_text = timed(
+        lambda items: [classifier.preprocess_text(text) for text in items], texts)
+    results = {'per_text': per_text}
+
+    classifier = IncidentClassifier()
+    cold, results['batch_cold'] = timed(
+        lambda items: classifier.batch_preprocessor.transform(items, update=True), texts)
+    table_size = len(classifier.batch_preprocessor.table)
+    warm, results['batch_warm'] = timed(classifier.batch_preprocessor.transform, texts)
+    outputs = {'batch_cold': cold, 'batch_warm': warm}
+
+    if args.jobs > 1:
+        classifier = IncidentClassifier()
+        outputs['parallel'], results['parallel'] = timed(
+            lambda items: classifier.preprocess_texts(items, n_jobs=args.jobs, learn=True),
+            texts)
+
+    failed = False
+    for name, rows_per_sec in results.items():
+        different = mismatches(reference, outputs[name]) if name in outputs else []
+        failed = failed or bool(different)
+        status = f"{len(different)} differ" if different else 'identical'
+        print(f"{name:<12}{rows_per_sec:>12,.0f} rows/s{rows_per_sec / per_text:>8.1f}x   {status}")
+        for i in different[:3]:
+            print(f"    {texts[i]!r}\n      preprocess_text: {reference[i]!r}\n"
+                  f"      {name}: {outputs[name][i]!r}")
+    print(f"lemma table: {table_size} tokens")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'settings': {'data': args.data, 'samples': len(texts), 'seed': args.seed,
+                             'jobs': args.jobs},
+                'rows_per_sec': results,
+                'lemma_table_size': table_size,
+                'identical': not failed
+            }, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure how long app.py takes to start serving and to become ready.
+
+Starts the API as a subprocess for each model loading mode and polls
+/health, recording the time until the first HTTP answer (port bound) and
+until the models report ready. Run from the ai/ directory with trained
+models in models/:
+
+    python benchmarks/startup_benchmark.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_startup(mode, port, timeout):
+    """Start app.py once and return (seconds to first answer, seconds to ready)"""
+    env = dict(os.environ, MODEL_LOADING=mode, PORT=str(port))
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'app.py'], cwd=AI_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    first_answer = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1):
+                    elapsed = time.perf_counter() - start
+                    return first_answer or elapsed, elapsed
+            except urllib.error.HTTPError as e:
+                # 503 while the models are still loading
+                if first_answer is None:
+                    first_answer = time.perf_counter() - start
+                if e.code != 503:
+                    raise
+            except OSError:
+                # Not listening yet, or too busy to answer within a second
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"app.py not ready after {timeout}s")
+    finally:
+        # The debug reloader forks a child, so stop the whole process group
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark app.py startup time')
+    parser.add_argument('--runs', type=int, default=3, help='starts per mode')
+    parser.add_argument('--modes', nargs='+', default=['eager', 'background'],
+                        help='MODEL_LOADING values to compare')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        first_answers, ready_times = [], []
+        for run in range(args.runs):
+            first_answer, ready = measure_startup(mode, args.port, args.timeout)
+            first_answers.append(first_answer)
+            ready_times.append(ready)
+            print(f"{mode:<12} run {run + 1}: first answer {first_answer:.2f}s, "
+                  f"ready {ready:.2f}s")
+        results[mode] = {
+            'runs': args.runs,
+            'first_answer_s': statistics.median(first_answers),
+            'ready_s': statistics.median(ready_times),
+            'ready_max_s': max(ready_times)
+        }
+
+    print("\nMedian startup times:")
+    for mode, result in results.items():
+        print(f"  {mode:<12} first answer {result['first_answer_s']:.2f}s, "
+              f"ready {result['ready_s']:.2f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Training scaling benchmark for IncidentClassifier.
+
+Trains the full pipeline at increasing dataset sizes and records the wall
+time and peak memory of every stage (load_data, preprocess, each vectorizer
+and forest fit, evaluate, save), to see how each one grows before scaling
+the training data up. Rows are sampled from data/*.csv (or any CSVs given
+with --data, e.g. generator output), with replacement once a size exceeds
+the rows available; duplicated rows add no new vocabulary, so the TF-IDF
+stages grow more slowly than they would on real data of that size.
+
+Every size runs in a fresh process inside a scratch directory, so peak
+memory is not inherited from the previous size and models/ is untouched:
+
+    python benchmarks/training_benchmark.py --sizes 2500,10000,25000,100000 \
+        --output training_scaling.json
+"""
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+
+import pandas as pd
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_dataset(frame, size, directory, seed):
+    """Write size rows of frame to CSVs in directory, one per category"""
+    rows = frame.sample(size, replace=size > len(frame), random_state=seed)
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for category, group in rows.groupby('category'):
+        path = os.path.join(directory, f'{str(category).lower()}_incidents.csv')
+        group.to_csv(path, index=False)
+        files.append(path)
+    return files
+
+
+def train_once(files, workdir, shared_vectorizer, n_jobs, parallel, results):
+    """Train in workdir (so models/ lands there) and report the stage profile"""
+    sys.path.insert(0, AI_DIR)
+    from incident_classifier import IncidentClassifier
+
+    os.chdir(workdir)
+    classifier = IncidentClassifier()
+    classifier.enable_profiling()
+    classifier.train(files, shared_vectorizer=shared_vectorizer, n_jobs=n_jobs,
+                     parallel=parallel)
+    results.put({
+        'timings': classifier.metadata['training_timings'],
+        'parallel_training': classifier.metadata.get('parallel_training'),
+        'profile': classifier.metadata.get('training_profile', {}),
+        'performance_metrics': classifier.metadata['performance_metrics']
+    })
+
+
+def growth_exponents(runs):
+    """
+    Log-log slope of each stage's time between the smallest and largest size
+
+    About 1 means the stage grows linearly with the number of rows, 2
+    quadratically; stages below a few milliseconds are too noisy to fit.
+    """
+    first, last = runs[0], runs[-1]
+    exponents = {}
+    for stage, seconds in last['timings'].items():
+        base = first['timings'].get(stage)
+        if base and base > 0.005 and last['rows'] > first['rows']:
+            exponents[stage] = math.log(seconds / base) / math.log(last['rows'] / first['rows'])
+    return exponents
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark training at increasing dataset sizes')
+    parser.add_argument('--sizes', default='2500,10000,25000',
+                        help='comma-separated numbers of rows')
+    parser.add_argument('--data', default=os.path.join(AI_DIR, 'data', '*.csv'),
+                        help='glob of CSV files with description, category and priority')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shared-vectorizer', action='store_true')
+    parser.add_argument('--preprocess-jobs', type=int, default=1)
+    parser.add_argument('--parallel', action='store_true',
+                        help='fit the category and priority models concurrently')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(args.data))
+    if not files:
+        raise SystemExit(f"No CSV files match {args.data}")
+    frame = pd.concat([pd.read_csv(file) for file in files], ignore_index=True)
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='training_benchmark_') as scratch:
+        for size in sizes:
+            workdir = os.path.join(scratch, str(size))
+            dataset = sample_dataset(frame, size, os.path.join(workdir, 'data'), args.seed)
+            print(f"\n=== {size} rows ===")
+            results = context.Queue()
+            process = context.Process(target=train_once, args=(
+                dataset, workdir, args.shared_vectorizer, args.preprocess_jobs, args.parallel,
+                results))
+            process.start()
+            run = None
+            while run is None:
+                try:
+                    run = results.get(timeout=5)
+                except queue.Empty:
+                    if not process.is_alive():
+                        raise SystemExit(f"Training failed at {size} rows")
+            process.join()
+            run['rows'] = size
+            runs.append(run)
+
+    stages = list(runs[-1]['timings'])
+    print(f"\n{'stage':<24}" + ''.join(f"{run['rows']:>12}" for run in runs) + f"{'growth':>9}")
+    exponents = growth_exponents(runs)
+    for stage in stages:
+        cells = ''.join(f"{run['timings'].get(stage, 0):>11.2f}s" for run in runs)
+        growth = f"{exponents[stage]:>9.2f}" if stage in exponents else f"{'-':>9}"
+        print(f"{stage:<24}{cells}{growth}")
+    print(f"{'peak RSS (MiB)':<24}" + ''.join(
+        f"{max((m['peak_rss_mib'] or 0) for m in run['profile'].values()):>12.0f}"
+        for run in runs))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'settings': {
+                    'data': args.data,
+                    'seed': args.seed,
+                    'shared_vectorizer': args.shared_vectorizer,
+                    'preprocess_jobs': args.preprocess_jobs,
+                    'parallel': args.parallel
+                },
+                'runs': runs,
+                'growth_exponents': exponents
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Compact inference engine for the trained random forests.
+
+A fitted RandomForestClassifier is flattened into a handful of contiguous
+NumPy arrays (split feature, threshold, children and class distribution
+of every node of every tree) and evaluated for all trees at once with
+vectorized indexing, skipping scikit-learn's per-call validation and
+thread dispatch. Probabilities match the forest's predict_proba up to
+floating-point summation order.
+
+Exported forests are stored as plain .npy files, so they can be loaded
+with mmap_mode='r' and shared between worker processes. To export the
+models in models/ and check them against scikit-learn:
+
+    python compact_forest.py --models-dir models --verify
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+
+class CompactForest:
+    """Random forest flattened into arrays for fast predict_proba"""
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'classes_')
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes_, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes_
+        self.max_depth = int(max_depth)
+        # Columns the trees split on, and feature remapped to positions in them
+        self._columns = None
+        self._column_of_node = None
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Flatten a fitted RandomForestClassifier"""
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be exported")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left < 0
+            # Leaves point to themselves and always go "left", so every tree
+            # can be walked for max_depth steps without checking for leaves
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset)
+            # Per-node class distribution, normalized like DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0] = 1
+            values.append(value / normalizer)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        classes = np.asarray(forest.classes_)
+        if classes.dtype == object:
+            # String labels, stored as a fixed-width array so no pickling is needed
+            classes = classes.astype(str)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.array(roots, dtype=np.int32),
+            classes_=classes,
+            max_depth=max_depth
+        )
+
+    def split_columns(self):
+        """
+        Feature columns used by at least one split, and the position of each
+        node's feature among them (leaves get 0)
+        """
+        if self._columns is None:
+            internal = np.isfinite(self.threshold)
+            columns = np.unique(self.feature[internal]) if internal.any() else np.zeros(1)
+            column_of_node = np.searchsorted(columns, self.feature).astype(np.int32)
+            column_of_node[~internal] = 0
+            self._columns = columns.astype(np.int32)
+            self._column_of_node = column_of_node
+        return self._columns, self._column_of_node
+
+    def predict_proba(self, X, chunk_size=256):
+        """
+        Return class probabilities for a (sparse or dense) feature matrix
+
+        Only the columns the trees split on are gathered, chunk_size rows at
+        a time: a TF-IDF chunk becomes a rows x split-features array instead
+        of rows x vocabulary, so memory stays bounded for large batches and
+        vocabularies.
+        """
+        columns, column_of_node = self.split_columns()
+        n_rows = X.shape[0]
+        probs = np.empty((n_rows, len(self.classes_)), dtype=np.float64)
+        if hasattr(X, 'tocsr'):
+            X = X.tocsr()
+        for start in range(0, n_rows, chunk_size):
+            chunk = X[start:start + chunk_size]
+            # scikit-learn compares float32 features with float64 thresholds
+            if hasattr(chunk, 'toarray'):
+                dense = chunk[:, columns].astype(np.float32).toarray()
+            else:
+                dense = np.asarray(chunk)[:, columns].astype(np.float32)
+
+            nodes = np.broadcast_to(self.roots, (dense.shape[0], len(self.roots)))
+            for _ in range(self.max_depth):
+                x = np.take_along_axis(dense, column_of_node[nodes], axis=1)
+                nodes = np.where(x <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+
+            probs[start:start + chunk_size] = self.value[nodes].sum(axis=1) / len(self.roots)
+        return probs
+
+    def predict(self, X):
+        """Return the most probable class for each row"""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, directory):
+        """
+        Write the arrays as .npy files plus a small JSON header
+
+        Every file is written under a temporary name and renamed over the old
+        one, header last: a server that memory-maps the previous export keeps
+        reading its (now unlinked) files instead of seeing them truncated.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            path = os.path.join(directory, f'{name}.npy')
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(path + '.tmp', path)
+        path = os.path.join(directory, 'forest.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'max_depth': self.max_depth, 'n_trees': len(self.roots),
+                       'n_nodes': len(self.feature)}, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        """Load an exported forest; mmap_mode='r' maps the arrays read-only"""
+        with open(os.path.join(directory, 'forest.json'), 'r') as f:
+            header = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+                  for name in cls.ARRAYS}
+        return cls(max_depth=header['max_depth'], **arrays)
+
+    @property
+    def nbytes(self):
+        """Total size of the arrays in bytes"""
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the trained forests to compact arrays')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--verify', action='store_true',
+                        help='compare probabilities and single-row latency with scikit-learn')
+    args = parser.parse_args()
+
+    from incident_classifier import IncidentClassifier
+
+    classifier = IncidentClassifier()
+    classifier.load_models(args.models_dir, predict_n_jobs=1)
+    forests = classifier.export_compact(args.models_dir)
+    for name, forest in forests.items():
+        print(f"{name}: {len(forest.roots)} trees, {len(forest.feature)} nodes, "
+              f"{forest.nbytes / 2 ** 20:.1f} MiB")
+
+    if args.verify:
+        import glob
+        import pandas as pd
+
+        files = sorted(glob.glob('data/*.csv'))
+        texts = pd.concat([pd.read_csv(file, usecols=['description']) for file in files])
+        texts = texts['description'].sample(min(500, len(texts)), random_state=0)
+        processed = [classifier.preprocess_text(text) for text in texts]
+        for name, pipeline in (('category', classifier.category_pipeline),
+                               ('priority', classifier.priority_pipeline)):
+            features = pipeline.steps[0][1].transform(processed)
+            forest = forests[name]
+            expected = pipeline.steps[-1][1].predict_proba(features)
+            actual = forest.predict_proba(features)
+            print(f"{name}: max |diff| {np.abs(expected - actual).max():.2e}, "
+                  f"label mismatches {(expected.argmax(1) != actual.argmax(1)).sum()}")
+
+            row = features[:1]
+            for label, predict in (('sklearn', pipeline.steps[-1][1].predict_proba),
+                                   ('compact', forest.predict_proba)):
+                start = time.perf_counter()
+                for _ in range(50):
+                    predict(row)
+                print(f"  {label} single row: {(time.perf_counter() - start) / 50 * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
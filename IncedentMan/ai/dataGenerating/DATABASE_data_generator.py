@@ -1,5 +1,6 @@
 import pandas as pd
-import random
+
+from template_engine import TemplateGenerator
 
 INCIDENT_TAXONOMY = {
     'DATABASE': {
@@ -98,194 +99,192 @@ INCIDENT_TAXONOMY = {
     }
 }
 
-def generate_incident() -> dict:
-    """Generate a database incident with realistic user-reported descriptions"""
-    category = 'DATABASE'
-    subcat_name = random.choice(list(INCIDENT_TAXONOMY[category]['subcategories'].keys()))
-    subcat_data = INCIDENT_TAXONOMY[category]['subcategories'][subcat_name]
-    issue = random.choice(subcat_data['issues'])
-    
-    # User emotion and urgency indicators
-    urgency_prefixes = [
-        "URGENT: Database", "HELP - DB down", "CRITICAL: Database error in",
-        "Emergency - Can't access", "Important: Problems with database",
-        "Database error preventing work", "Immediate database assistance needed:",
-        "Production DB blocked by", "Time sensitive DB issue:",
-        "!!Data corruption!! -",
-        "CRITICAL DB ALERT:", "PRODUCTION DATABASE DOWN:", "URGENT - Database Customer Impact:",
-        "HIGH PRIORITY DB ISSUE:", "IMMEDIATE ACTION REQUIRED: Database",
-        "DATABASE ALERT:", "BLOCKING DATABASE ISSUE:",
-        "P1 DB INCIDENT:", "MAJOR DATABASE INCIDENT:",
-        "EMERGENCY DATABASE TICKET:"
+# User emotion and urgency indicators
+DATABASE_URGENCY_PREFIXES = [
+    "URGENT: Database", "HELP - DB down", "CRITICAL: Database error in",
+    "Emergency - Can't access", "Important: Problems with database",
+    "Database error preventing work", "Immediate database assistance needed:",
+    "Production DB blocked by", "Time sensitive DB issue:",
+    "!!Data corruption!! -",
+    "CRITICAL DB ALERT:", "PRODUCTION DATABASE DOWN:", "URGENT - Database Customer Impact:",
+    "HIGH PRIORITY DB ISSUE:", "IMMEDIATE ACTION REQUIRED: Database",
+    "DATABASE ALERT:", "BLOCKING DATABASE ISSUE:",
+    "P1 DB INCIDENT:", "MAJOR DATABASE INCIDENT:",
+    "EMERGENCY DATABASE TICKET:"
+]
+
+# Business impact statements
+DATABASE_IMPACT_STATEMENTS = [
+    "all queries failing", "transactions not processing",
+    "can't process customer orders in database", "entire ERP system down",
+    "all data access blocked", "reports not generating",
+    "database-dependent services down", "customer data unavailable",
+    "finance system can't access data", "business intelligence platform affected",
+    "entire company database access affected",
+    "multiple teams blocked from data access",
+    "customer-facing database services impacted",
+    "revenue-generating database down",
+    "critical business processes blocked by DB issue",
+    "preventing order processing in database",
+    "impacting all database-dependent services",
+    "multiple clients affected by database outage",
+    "production database pipeline completely stopped",
+    "business operations severely affected due to database issues"
+]
+
+# Technical observations
+DATABASE_TECH_OBSERVATIONS = [
+    "error code in logs", "tried restarting instance",
+    "happens on all queries", "started after morning maintenance",
+    "all attempts to connect fail", "rebooted database server",
+    "checked database logs", "multiple instances affected",
+    "getting ORA-errors", "tried different connection methods",
+    "error logs attached in screenshot",
+    "issue reproducible in all database environments",
+    "multiple users reporting same database problem",
+    "started after recent schema update",
+    "database console showing multiple errors",
+    "memory usage growing exponentially on DB server",
+    "all retry attempts to database failed",
+    "database metrics showing anomalies",
+    "error rate spiking in DB monitoring",
+    "logs showing cascade of database failures"
+]
+
+# Database-specific symptoms by subcategory
+DATABASE_SYMPTOMS = {
+    'Availability': [
+        "connection attempts timing out", "service completely unresponsive",
+        "database process not running", "can't establish any connections",
+        "database service not listed", "connection string failing",
+        "socket connection refused", "database port not responding",
+        "listener not accepting connections", "instance crashed with core dump"
+    ],
+    'Performance': [
+        "queries taking 10+ minutes", "timeouts on simple selects",
+        "CPU usage at 100 on DB server", "exponential query time increase",
+        "deadlocks occurring frequently", "massive I/O wait times",
+        "query plans suddenly inefficient", "index not being used",
+        "parameter queries failing", "execution plan regression"
+    ],
+    'Data Integrity': [
+        "records missing primary keys", "foreign key violations",
+        "query results inconsistent", "checksums failing",
+        "unexpected NULL values", "truncated data in fields",
+        "record counts don't match", "orphaned relational records",
+        "data type conversion errors", "constraint violations"
+    ],
+    'Capacity': [
+        "disk space critical on DB server", "can't extend tablespace",
+        "log files filling entire volume", "unable to allocate new blocks",
+        "connection pool exhausted", "query memory grants failing",
+        "temp tablespace full errors", "no space left for transactions",
+        "autoextend failed due to disk full", "max file size reached"
+    ],
+    'Backup & Recovery': [
+        "backup job failing every night", "can't restore from backup set",
+        "point-in-time recovery failing", "transaction logs missing",
+        "RMAN reporting corrupt blocks", "recovery operation hanging",
+        "can't access backup files", "inconsistent backup state",
+        "log sequence gap detected", "archive logs missing"
+    ],
+    'Configuration': [
+        "parameter file can't be read", "settings lost after restart",
+        "connection string rejected", "incompatible character sets",
+        "initialization parameters invalid", "memory settings causing crashes",
+        "NLS parameters incorrect", "listener configuration invalid",
+        "service registration failed", "SPFILE corruption detected"
+    ],
+    'Replication': [
+        "replica several hours behind master", "replication process terminated",
+        "conflicting updates in multi-master", "replication queue backing up",
+        "change data capture process failed", "publisher/subscriber mismatch",
+        "log reader agent failing", "distribution latency critical",
+        "circular replication error", "replication topology broken"
+    ],
+    'Schema Management': [
+        "DDL operation blocked by locks", "invalid object references",
+        "stored procedure compilation errors", "broken view definitions",
+        "partition operation failed", "index unusable after update",
+        "materialized view refresh hanging", "trigger causing exceptions",
+        "sequence exhausted available values", "schema validation errors"
+    ],
+    'User Access': [
+        "suddenly can't access any tables", "permissions revoked unexpectedly",
+        "role assignments disappeared", "user accounts locked",
+        "exceeding resource quotas", "login failures for all users",
+        "password verification failing", "proxy authentication errors",
+        "grant operations failing", "privileged access revoked"
+    ],
+    'Monitoring & Logging': [
+        "alert log flooded with errors", "no monitoring data available",
+        "audit trail missing entries", "diagnostic pack not functioning",
+        "wait event statistics unavailable", "AWR reports not generating",
+        "metric collection failed", "performance counters reset",
+        "deadlock detector not working", "trace files not being created"
     ]
+}
+
+# User-reported description formats
+DATABASE_TEMPLATES = [
+    # Urgent format
+    "{urgency} {issue} ! {impact}",
     
-    # Business impact statements
-    impact_statements = [
-        "all queries failing", "transactions not processing",
-        "can't process customer orders in database", "entire ERP system down",
-        "all data access blocked", "reports not generating",
-        "database-dependent services down", "customer data unavailable",
-        "finance system can't access data", "business intelligence platform affected",
-        "entire company database access affected",
-        "multiple teams blocked from data access",
-        "customer-facing database services impacted",
-        "revenue-generating database down",
-        "critical business processes blocked by DB issue",
-        "preventing order processing in database",
-        "impacting all database-dependent services",
-        "multiple clients affected by database outage",
-        "production database pipeline completely stopped",
-        "business operations severely affected due to database issues"
-    ]
+    # Technical detail format
+    "{issue} ! {observation} - {impact}",
     
-    # Technical observations
-    tech_observations = [
-        "error code in logs", "tried restarting instance",
-        "happens on all queries", "started after morning maintenance",
-        "all attempts to connect fail", "rebooted database server",
-        "checked database logs", "multiple instances affected",
-        "getting ORA-errors", "tried different connection methods",
-        "error logs attached in screenshot",
-        "issue reproducible in all database environments",
-        "multiple users reporting same database problem",
-        "started after recent schema update",
-        "database console showing multiple errors",
-        "memory usage growing exponentially on DB server",
-        "all retry attempts to database failed",
-        "database metrics showing anomalies",
-        "error rate spiking in DB monitoring",
-        "logs showing cascade of database failures"
-    ]
+    # Symptom format
+    "{issue}: {symptom} - {impact}",
     
-    # Database-specific symptoms by subcategory
-    database_symptoms = {
-        'Availability': [
-            "connection attempts timing out", "service completely unresponsive",
-            "database process not running", "can't establish any connections",
-            "database service not listed", "connection string failing",
-            "socket connection refused", "database port not responding",
-            "listener not accepting connections", "instance crashed with core dump"
-        ],
-        'Performance': [
-            "queries taking 10+ minutes", "timeouts on simple selects",
-            "CPU usage at 100 on DB server", "exponential query time increase",
-            "deadlocks occurring frequently", "massive I/O wait times",
-            "query plans suddenly inefficient", "index not being used",
-            "parameter queries failing", "execution plan regression"
-        ],
-        'Data Integrity': [
-            "records missing primary keys", "foreign key violations",
-            "query results inconsistent", "checksums failing",
-            "unexpected NULL values", "truncated data in fields",
-            "record counts don't match", "orphaned relational records",
-            "data type conversion errors", "constraint violations"
-        ],
-        'Capacity': [
-            "disk space critical on DB server", "can't extend tablespace",
-            "log files filling entire volume", "unable to allocate new blocks",
-            "connection pool exhausted", "query memory grants failing",
-            "temp tablespace full errors", "no space left for transactions",
-            "autoextend failed due to disk full", "max file size reached"
-        ],
-        'Backup & Recovery': [
-            "backup job failing every night", "can't restore from backup set",
-            "point-in-time recovery failing", "transaction logs missing",
-            "RMAN reporting corrupt blocks", "recovery operation hanging",
-            "can't access backup files", "inconsistent backup state",
-            "log sequence gap detected", "archive logs missing"
-        ],
-        'Configuration': [
-            "parameter file can't be read", "settings lost after restart",
-            "connection string rejected", "incompatible character sets",
-            "initialization parameters invalid", "memory settings causing crashes",
-            "NLS parameters incorrect", "listener configuration invalid",
-            "service registration failed", "SPFILE corruption detected"
-        ],
-        'Replication': [
-            "replica several hours behind master", "replication process terminated",
-            "conflicting updates in multi-master", "replication queue backing up",
-            "change data capture process failed", "publisher/subscriber mismatch",
-            "log reader agent failing", "distribution latency critical",
-            "circular replication error", "replication topology broken"
-        ],
-        'Schema Management': [
-            "DDL operation blocked by locks", "invalid object references",
-            "stored procedure compilation errors", "broken view definitions",
-            "partition operation failed", "index unusable after update",
-            "materialized view refresh hanging", "trigger causing exceptions",
-            "sequence exhausted available values", "schema validation errors"
-        ],
-        'User Access': [
-            "suddenly can't access any tables", "permissions revoked unexpectedly",
-            "role assignments disappeared", "user accounts locked",
-            "exceeding resource quotas", "login failures for all users",
-            "password verification failing", "proxy authentication errors",
-            "grant operations failing", "privileged access revoked"
-        ],
-        'Monitoring & Logging': [
-            "alert log flooded with errors", "no monitoring data available",
-            "audit trail missing entries", "diagnostic pack not functioning",
-            "wait event statistics unavailable", "AWR reports not generating",
-            "metric collection failed", "performance counters reset",
-            "deadlock detector not working", "trace files not being created"
-        ]
-    }
-
-    database_templates = [
-        # Urgent format
-        f"{random.choice(urgency_prefixes)} {issue} ! {random.choice(impact_statements)}",
-        
-        # Technical detail format
-        f"{issue} ! {random.choice(tech_observations)} - {random.choice(impact_statements)}",
-        
-        # Symptom format
-        f"{issue}: {random.choice(database_symptoms[subcat_name])} - {random.choice(impact_statements)}",
-        
-        # Combination format
-        f"{random.choice(urgency_prefixes)} {issue} - {random.choice(database_symptoms[subcat_name])} - {random.choice(tech_observations)}",
-        
-        # Time-sensitive format
-        f"Time sensitive: {issue} - {random.choice(impact_statements)} - {random.choice(database_symptoms[subcat_name])}",
-        
-        # Detailed observation format
-        f"{issue} ({random.choice(tech_observations)}) ; {random.choice(database_symptoms[subcat_name])} - {random.choice(impact_statements)}",
-        
-        # Critical alert format
-        f"{random.choice(urgency_prefixes)} {issue} !!! {random.choice(impact_statements)}",
-        
-        # Technical detail with impact
-        f"{issue} - {random.choice(tech_observations)} ! {random.choice(impact_statements)}",
-        
-        # Symptom with technical detail
-        f"{issue}: {random.choice(database_symptoms[subcat_name])} - {random.choice(tech_observations)}",
-        
-        # Comprehensive alert
-        f"{random.choice(urgency_prefixes)} {issue} - {random.choice(database_symptoms[subcat_name])} - {random.choice(impact_statements)}",
-        
-        # Time-critical format
-        f"Time-critical alert: {issue} ! {random.choice(impact_statements)} - {random.choice(database_symptoms[subcat_name])}",
-        
-        # Detailed technical format
-        f"{issue} ({random.choice(tech_observations)}) . {random.choice(database_symptoms[subcat_name])} . {random.choice(impact_statements)}"
-    ]
+    # Combination format
+    "{urgency} {issue} - {symptom} - {observation}",
+    
+    # Time-sensitive format
+    "Time sensitive: {issue} - {impact} - {symptom}",
+    
+    # Detailed observation format
+    "{issue} ({observation}) ; {symptom} - {impact}",
+    
+    # Critical alert format
+    "{urgency} {issue} !!! {impact}",
+    
+    # Technical detail with impact
+    "{issue} - {observation} ! {impact}",
+    
+    # Symptom with technical detail
+    "{issue}: {symptom} - {observation}",
+    
+    # Comprehensive alert
+    "{urgency} {issue} - {symptom} - {impact}",
     
-    return {
-        'description': random.choice(database_templates),
-        'category': category,
-        'subcategory': subcat_name,
-        'priority': random.choices(
-            [1, 2, 3, 4],  # P1 is highest priority
-            weights=subcat_data['priority_weights']
-        )[0]
+    # Time-critical format
+    "Time-critical alert: {issue} ! {impact} - {symptom}",
+    
+    # Detailed technical format
+    "{issue} ({observation}) . {symptom} . {impact}"
+]
+
+# Vectorized generator: issues and symptoms are drawn per subcategory
+GENERATOR = TemplateGenerator(
+    category='DATABASE',
+    taxonomy=INCIDENT_TAXONOMY['DATABASE']['subcategories'],
+    templates=DATABASE_TEMPLATES,
+    fields={
+        'issue': 'issues',
+        'symptom': DATABASE_SYMPTOMS,
+        'urgency': DATABASE_URGENCY_PREFIXES,
+        'impact': DATABASE_IMPACT_STATEMENTS,
+        'observation': DATABASE_TECH_OBSERVATIONS
     }
+)
 
-def generate_dataset(num_samples: int = 5000) -> pd.DataFrame:
-    """Generate database incident dataset"""
-    data = []
-    for _ in range(num_samples):
-        data.append(generate_incident())
-    
-    df = pd.DataFrame(data)
+def generate_incident() -> dict:
+    """Generate a database incident with realistic user-reported descriptions"""
+    return GENERATOR.generate_record()
+
+def generate_dataset(num_samples: int = 5000, seed=None) -> pd.DataFrame:
+    """Generate database incident dataset (vectorized, see template_engine)"""
+    df = GENERATOR.generate(num_samples, seed)
     df.to_csv('data/database_incidents.csv', index=False)
     return df
 
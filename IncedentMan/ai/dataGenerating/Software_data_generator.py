@@ -1,5 +1,6 @@
 import pandas as pd
-import random
+
+from template_engine import TemplateGenerator
 
 INCIDENT_TAXONOMY = {
     'SOFTWARE': {
@@ -100,192 +101,188 @@ INCIDENT_TAXONOMY = {
     }
 }
 
-def generate_incident() -> dict:
-    """Generate a software incident with realistic user-reported descriptions"""
-    category = 'SOFTWARE'
-    subcat_name = random.choice(list(INCIDENT_TAXONOMY[category]['subcategories'].keys()))
-    subcat_data = INCIDENT_TAXONOMY[category]['subcategories'][subcat_name]
-    issue = random.choice(subcat_data['issues'])
-    
-    # User emotion and urgency indicators
-    urgency_prefixes = [
-        "URGENT: Can't access", "HELP - System down", "CRITICAL: Lost work in",
-        "Emergency - Can't continue", "Important: Problems with",
-        "System error preventing work", "Immediate assistance needed:",
-        "Production blocked by", "Time sensitive issue:",
-        "!!Losing work!! -"
-        "CRITICAL ALERT:", "PRODUCTION DOWN:", "URGENT - Customer Impact:",
-        "HIGH PRIORITY:", "IMMEDIATE ACTION REQUIRED:",
-        "SYSTEM ALERT:", "BLOCKING ISSUE:",
-        "P1 INCIDENT:", "MAJOR INCIDENT:",
-        "EMERGENCY TICKET:"
+# User emotion and urgency indicators
+SOFTWARE_URGENCY_PREFIXES = [
+    "URGENT: Can't access", "HELP - System down", "CRITICAL: Lost work in",
+    "Emergency - Can't continue", "Important: Problems with",
+    "System error preventing work", "Immediate assistance needed:",
+    "Production blocked by", "Time sensitive issue:",
+    "!!Losing work!! -"
+    "CRITICAL ALERT:", "PRODUCTION DOWN:", "URGENT - Customer Impact:",
+    "HIGH PRIORITY:", "IMMEDIATE ACTION REQUIRED:",
+    "SYSTEM ALERT:", "BLOCKING ISSUE:",
+    "P1 INCIDENT:", "MAJOR INCIDENT:",
+    "EMERGENCY TICKET:"
+]
+
+# Business impact statements
+SOFTWARE_IMPACT_STATEMENTS = [
+    "entire team blocked", "client deliverable at risk",
+    "can't process customer orders", "meeting starts in 15 minutes",
+    "losing billable hours", "deadline approaching",
+    "production pipeline stopped", "customer demo affected",
+    "revenue impacting issue", "critical path blocked"
+    "blocking entire department workflow",
+    "multiple teams affected and deadlines at risk",
+    "customer-facing services impacted",
+    "revenue-generating system affected",
+    "critical business process blocked",
+    "preventing order processing",
+    "impacting customer experience",
+    "multiple clients reporting issues",
+    "production pipeline completely stopped",
+    "business operations severely affected"
+]
+
+# Technical observations
+SOFTWARE_TECH_OBSERVATIONS = [
+    "error message attached", "tried clearing cache",
+    "happens every time I", "started after update",
+    "reproduced on multiple PCs", "rebooted three times",
+    "checked system logs", "other users affected too",
+    "getting timeout errors", "tried different browser"
+    "error logs attached in screenshot",
+    "issue reproducible in all environments",
+    "multiple users reporting same problem",
+    "started after recent deployment",
+    "console showing multiple errors",
+    "memory usage growing exponentially",
+    "all retry attempts failed",
+    "system metrics showing anomalies",
+    "error rate spiking in monitoring",
+    "logs showing cascade of failures",
+    "dependency resolution failed", 
+    "version conflict detected", "incompatible packages found",
+    "libraries clashing with each other", "module version requirements conflict",
+]
+
+# Software-specific symptoms
+SOFTWARE_SYMPTOMS = {
+    'Operating System': [
+        "screen goes black", "keeps rebooting automatically",
+        "extremely slow response", "won't load user profile",
+        "stuck at login screen", "showing error code",
+        "programs won't launch", "desktop icons missing",
+        "task manager not responding", "windows explorer crashing"
+    ],
+    'Business Applications': [
+        "can't save changes", "sync failed multiple times",
+        "formula calculation wrong", "report shows errors",
+        "data missing from view", "application freezes",
+        "can't export data", "dashboard not loading",
+        "integration broken", "preview not working"
+    ],
+    'Custom Software': [
+        "process stuck at 99%", "invalid data error",
+        "workflow stopped", "script execution failed",
+        "memory usage spikes", "constant timeout errors",
+        "duplicate entries created", "audit log errors",
+        "background job failed", "validation exceptions"
+    ],
+    'Core Functionality': [
+        "application immediately crashes on launch",
+        "critical feature completely non-functional",
+        "system automatically closing all sessions",
+        "core process terminated unexpectedly",
+        "main module throwing unhandled exceptions"
+    ],
+    'Performance': [
+        "response time exceeded 30 seconds",
+        "CPU usage at 100% across all instances",
+        "memory leak causing system slowdown",
+        "database queries timing out consistently",
+        "application freezing under normal load"
+    ],
+    'Integration': [
+        "API returning 500 errors consistently",
+        "third-party integration completely down",
+        "data flow between systems broken",
+        "authentication service rejecting all requests",
+        "middleware dropping connections"
+    ],
+    'User Interface': [
+        "users unable to access main interface",
+        "critical buttons non-responsive",
+        "forms failing to submit data",
+        "UI completely broken in production",
+        "user sessions terminating randomly"
+    ],
+    'Data Management': [
+        "database showing corruption markers",
+        "critical data missing from records",
+        "backup process failing consistently",
+        "data inconsistency across services",
+        "storage system rejecting writes"
+    ],
+    'Configuration': [
+        "production config completely invalid",
+        "environment variables missing critical values",
+        "configuration service not responding",
+        "deploy pipeline rejected all configs",
+        "settings rollback failed"
     ]
+}
+
+# User-reported description formats
+SOFTWARE_TEMPLATES = [
+    # Urgent format
+    "{urgency} {issue} ! {impact}",
     
-    # Business impact statements
-    impact_statements = [
-        "entire team blocked", "client deliverable at risk",
-        "can't process customer orders", "meeting starts in 15 minutes",
-        "losing billable hours", "deadline approaching",
-        "production pipeline stopped", "customer demo affected",
-        "revenue impacting issue", "critical path blocked"
-        "blocking entire department workflow",
-        "multiple teams affected and deadlines at risk",
-        "customer-facing services impacted",
-        "revenue-generating system affected",
-        "critical business process blocked",
-        "preventing order processing",
-        "impacting customer experience",
-        "multiple clients reporting issues",
-        "production pipeline completely stopped",
-        "business operations severely affected"
-    ]
+    # Technical detail format
+    "{issue} ! {observation} - {impact}",
     
-    # Technical observations
-    tech_observations = [
-        "error message attached", "tried clearing cache",
-        "happens every time I", "started after update",
-        "reproduced on multiple PCs", "rebooted three times",
-        "checked system logs", "other users affected too",
-        "getting timeout errors", "tried different browser"
-        "error logs attached in screenshot",
-        "issue reproducible in all environments",
-        "multiple users reporting same problem",
-        "started after recent deployment",
-        "console showing multiple errors",
-        "memory usage growing exponentially",
-        "all retry attempts failed",
-        "system metrics showing anomalies",
-        "error rate spiking in monitoring",
-        "logs showing cascade of failures",
-        "dependency resolution failed", 
-        "version conflict detected", "incompatible packages found",
-        "libraries clashing with each other", "module version requirements conflict",
-    ]
+    # Symptom format
+    "{issue}: {symptom} - {impact}",
     
-    # Software-specific symptoms
-    software_symptoms = {
-        'Operating System': [
-            "screen goes black", "keeps rebooting automatically",
-            "extremely slow response", "won't load user profile",
-            "stuck at login screen", "showing error code",
-            "programs won't launch", "desktop icons missing",
-            "task manager not responding", "windows explorer crashing"
-        ],
-        'Business Applications': [
-            "can't save changes", "sync failed multiple times",
-            "formula calculation wrong", "report shows errors",
-            "data missing from view", "application freezes",
-            "can't export data", "dashboard not loading",
-            "integration broken", "preview not working"
-        ],
-        'Custom Software': [
-            "process stuck at 99%", "invalid data error",
-            "workflow stopped", "script execution failed",
-            "memory usage spikes", "constant timeout errors",
-            "duplicate entries created", "audit log errors",
-            "background job failed", "validation exceptions"
-        ],
-        'Core Functionality': [
-            "application immediately crashes on launch",
-            "critical feature completely non-functional",
-            "system automatically closing all sessions",
-            "core process terminated unexpectedly",
-            "main module throwing unhandled exceptions"
-        ],
-        'Performance': [
-            "response time exceeded 30 seconds",
-            "CPU usage at 100% across all instances",
-            "memory leak causing system slowdown",
-            "database queries timing out consistently",
-            "application freezing under normal load"
-        ],
-        'Integration': [
-            "API returning 500 errors consistently",
-            "third-party integration completely down",
-            "data flow between systems broken",
-            "authentication service rejecting all requests",
-            "middleware dropping connections"
-        ],
-        'User Interface': [
-            "users unable to access main interface",
-            "critical buttons non-responsive",
-            "forms failing to submit data",
-            "UI completely broken in production",
-            "user sessions terminating randomly"
-        ],
-        'Data Management': [
-            "database showing corruption markers",
-            "critical data missing from records",
-            "backup process failing consistently",
-            "data inconsistency across services",
-            "storage system rejecting writes"
-        ],
-        'Configuration': [
-            "production config completely invalid",
-            "environment variables missing critical values",
-            "configuration service not responding",
-            "deploy pipeline rejected all configs",
-            "settings rollback failed"
-        ]
-    }
-
-    templates = [
-        # Urgent format
-        f"{random.choice(urgency_prefixes)} {issue} ! {random.choice(impact_statements)}",
-        
-        # Technical detail format
-        f"{issue} ! {random.choice(tech_observations)} - {random.choice(impact_statements)}",
-        
-        # Symptom format
-        f"{issue}: {random.choice(software_symptoms[subcat_name])} - {random.choice(impact_statements)}",
-        
-        # Combination format
-        f"{random.choice(urgency_prefixes)} {issue} - {random.choice(software_symptoms[subcat_name])} - {random.choice(tech_observations)}",
-        
-        # Time-sensitive format
-        f"Time sensitive: {issue} - {random.choice(impact_statements)} - {random.choice(software_symptoms[subcat_name])}",
-        
-        # Detailed observation format
-        f"{issue} ({random.choice(tech_observations)}) ; {random.choice(software_symptoms[subcat_name])} - {random.choice(impact_statements)}",
-        f"{random.choice(urgency_prefixes)} {issue} !!! {random.choice(impact_statements)}",
-        
-        # Technical detail with impact
-        f"{issue} - {random.choice(tech_observations)} !{random.choice(impact_statements)}",
-        
-        # Symptom with technical detail
-        f"{issue}: {random.choice(software_symptoms[subcat_name])} - {random.choice(tech_observations)}",
-        
-        # Comprehensive alert
-        f"{random.choice(urgency_prefixes)} {issue} - {random.choice(software_symptoms[subcat_name])} - {random.choice(impact_statements)}",
-        
-        # Time-critical format
-        f"Time-critical alert: {issue} ! {random.choice(impact_statements)} - {random.choice(software_symptoms[subcat_name])}",
-        
-        # Detailed technical format
-        f"{issue} ({random.choice(tech_observations)}) . {random.choice(software_symptoms[subcat_name])} . {random.choice(impact_statements)}"
-        f"I can't open my machine. {issue}",
-        f"I'm having trouble opening my machine. {issue}",
-        
-        
-    ]
+    # Combination format
+    "{urgency} {issue} - {symptom} - {observation}",
+    
+    # Time-sensitive format
+    "Time sensitive: {issue} - {impact} - {symptom}",
+    
+    # Detailed observation format
+    "{issue} ({observation}) ; {symptom} - {impact}",
+    "{urgency} {issue} !!! {impact}",
+    
+    # Technical detail with impact
+    "{issue} - {observation} !{impact}",
+    
+    # Symptom with technical detail
+    "{issue}: {symptom} - {observation}",
+    
+    # Comprehensive alert
+    "{urgency} {issue} - {symptom} - {impact}",
     
-    return {
-        'description': random.choice(templates),
-        'category': category,
-        'subcategory': subcat_name,
-        'priority': random.choices(
-            [1, 2, 3, 4],  # P1 is highest priority
-            weights=subcat_data['priority_weights']
-        )[0]
+    # Time-critical format
+    "Time-critical alert: {issue} ! {impact} - {symptom}",
+    
+    # Detailed technical format
+    "{issue} ({observation}) . {symptom} . {impact}"
+    "I can't open my machine. {issue}",
+    "I'm having trouble opening my machine. {issue}",
+]
+
+# Vectorized generator: issues and symptoms are drawn per subcategory
+GENERATOR = TemplateGenerator(
+    category='SOFTWARE',
+    taxonomy=INCIDENT_TAXONOMY['SOFTWARE']['subcategories'],
+    templates=SOFTWARE_TEMPLATES,
+    fields={
+        'issue': 'issues',
+        'symptom': SOFTWARE_SYMPTOMS,
+        'urgency': SOFTWARE_URGENCY_PREFIXES,
+        'impact': SOFTWARE_IMPACT_STATEMENTS,
+        'observation': SOFTWARE_TECH_OBSERVATIONS
     }
+)
 
-def generate_dataset(num_samples: int = 5000) -> pd.DataFrame:
-    """Generate software incident dataset"""
-    data = []
-    for _ in range(num_samples):
-        data.append(generate_incident())
-    
-    df = pd.DataFrame(data)
+def generate_incident() -> dict:
+    """Generate a software incident with realistic user-reported descriptions"""
+    return GENERATOR.generate_record()
+
+def generate_dataset(num_samples: int = 5000, seed=None) -> pd.DataFrame:
+    """Generate software incident dataset (vectorized, see template_engine)"""
+    df = GENERATOR.generate(num_samples, seed)
     df.to_csv('data/software_incidents.csv', index=False)
     return df
 
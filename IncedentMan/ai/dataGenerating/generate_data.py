@@ -0,0 +1,153 @@
+"""
+Generate incident datasets for any mix of categories in one run.
+
+Each category's rows are split into shards of --shard-size rows that are
+generated in parallel worker processes and written straight to disk. Every
+shard gets its own seed derived from --seed, the category and the shard
+number, so a given seed always produces the same files whatever the number
+of workers or the other categories requested.
+
+From the ai/ directory:
+
+    python dataGenerating/generate_data.py --samples 5000 --seed 42
+    python dataGenerating/generate_data.py --category network=10000000 \
+        --category security=2000000 --seed 7 --workers 8 --output-dir data/large
+
+A category that fits in one shard is written to <category>_incidents.csv,
+the file names training expects; larger ones to
+<category>_incidents-<shard>-of-<shards>.csv. With --format parquet or
+feather the shards are columnar files instead (categorical labels, int8
+priority), which training loads much faster than CSV. The seed and files of
+the run are recorded in generation_manifest.json in the output directory.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incident_data import write_incidents
+
+# Category name -> generator module; the position in this dict is part of
+# every shard's seed, so new categories must be appended
+CATEGORIES = {
+    'software': 'Software_data_generator',
+    'hardware': 'hardware_data_generator',
+    'security': 'security_data_generator',
+    'network': 'network_data_generator',
+    'database': 'DATABASE_data_generator',
+}
+
+
+def shard_seed(seed, category, shard):
+    """Independent, reproducible seed of one shard"""
+    return np.random.SeedSequence(seed, spawn_key=(list(CATEGORIES).index(category), shard))
+
+
+def plan_shards(counts, shard_size, output_dir, seed, file_format='csv'):
+    """
+    List the (category, path, rows, seed) of every shard to generate
+
+    Categories of 0 rows get no shard: an empty file would have no header
+    (CSV) or no schema (Parquet, Feather) for training to read.
+    """
+    tasks = []
+    for category, rows in counts.items():
+        if rows == 0:
+            continue
+        shards = max(1, -(-rows // shard_size))
+        for shard in range(shards):
+            if shards == 1:
+                name = f'{category}_incidents.{file_format}'
+            else:
+                name = f'{category}_incidents-{shard:05d}-of-{shards:05d}.{file_format}'
+            start = shard * shard_size
+            tasks.append((category, os.path.join(output_dir, name),
+                          min(shard_size, rows - start), shard_seed(seed, category, shard)))
+    return tasks
+
+
+def write_shard(category, path, rows, seed, chunk_size):
+    """Generate one shard into a temporary file and move it into place"""
+    generator = importlib.import_module(CATEGORIES[category]).GENERATOR
+    start = time.perf_counter()
+    root, extension = os.path.splitext(path)
+    temporary = f'{root}.tmp{extension}'
+    write_incidents(generator.iter_chunks(rows, chunk_size, seed), temporary)
+    os.replace(temporary, path)
+    return path, rows, time.perf_counter() - start
+
+
+def parse_counts(args):
+    """Rows per category from --category NAME=ROWS, or --samples for all five"""
+    if not args.category:
+        return {category: args.samples for category in CATEGORIES}
+    counts = {}
+    for item in args.category:
+        name, _, rows = item.partition('=')
+        name = name.strip().lower()
+        if name not in CATEGORIES:
+            raise SystemExit(f"Unknown category {name!r}; choose from {', '.join(CATEGORIES)}")
+        counts[name] = int(rows) if rows else args.samples
+        if counts[name] < 0:
+            raise SystemExit(f"Negative row count for {name!r}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic incident datasets')
+    parser.add_argument('--category', action='append',
+                        help='NAME or NAME=ROWS; repeat for a mix (default: all five)')
+    parser.add_argument('--samples', type=int, default=5000,
+                        help='rows per category when no count is given')
+    parser.add_argument('--seed', type=int,
+                        help='base seed (default: random, printed and saved in the manifest)')
+    parser.add_argument('--output-dir', default='data')
+    parser.add_argument('--format', choices=['csv', 'parquet', 'feather'], default='csv')
+    parser.add_argument('--shard-size', type=int, default=1000000, help='rows per output file')
+    parser.add_argument('--chunk-size', type=int, default=250000,
+                        help='rows held in memory per worker at a time')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    counts = parse_counts(args)
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    os.makedirs(args.output_dir, exist_ok=True)
+    tasks = plan_shards(counts, args.shard_size, args.output_dir, seed, args.format)
+    empty = [category for category, rows in counts.items() if rows == 0]
+    if empty:
+        print(f"Skipping {', '.join(empty)}: 0 rows requested")
+    workers = max(1, min(args.workers, len(tasks)))
+    print(f"Generating {sum(counts.values())} rows in {len(tasks)} shards "
+          f"with {workers} workers (seed {seed})")
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [write_shard(*task, args.chunk_size) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(write_shard, *task, args.chunk_size) for task in tasks]
+            results = [future.result() for future in futures]
+    for path, rows, seconds in results:
+        print(f"  {path}: {rows} rows in {seconds:.1f}s")
+    elapsed = time.perf_counter() - start
+    print(f"Done in {elapsed:.1f}s ({sum(counts.values()) / elapsed:,.0f} rows/s)")
+
+    with open(os.path.join(args.output_dir, 'generation_manifest.json'), 'w') as f:
+        json.dump({
+            'seed': seed,
+            'counts': counts,
+            'shard_size': args.shard_size,
+            'format': args.format,
+            'files': [{'path': os.path.basename(path), 'rows': rows}
+                      for path, rows, _ in results]
+        }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
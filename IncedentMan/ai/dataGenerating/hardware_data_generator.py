@@ -1,5 +1,6 @@
 import pandas as pd
-import random
+
+from template_engine import TemplateGenerator
 
 INCIDENT_TAXONOMY = {
     'HARDWARE': {
@@ -155,99 +156,88 @@ INCIDENT_TAXONOMY = {
     }
 }
 
-def generate_incident() -> dict:
-    """Generate a hardware incident with realistic user-reported descriptions"""
-    category = 'HARDWARE'
-    subcat_name = random.choice(list(INCIDENT_TAXONOMY[category]['subcategories'].keys()))
-    subcat_data = INCIDENT_TAXONOMY[category]['subcategories'][subcat_name]
-    issue = random.choice(subcat_data['issues'])
-    
-    # Get hardware-specific identifier
-    hardware_identifier = random.choice(subcat_data['hardware_identifiers'])
+# User-reported descriptions with hardware identifiers
+HARDWARE_TEMPLATES = [
+    # User frustration reports with hardware identifiers
+    "HARDWARE ISSUE: Help! My computer's {hardware_identifier} won't work at all. Diagnosed as: {issue}",
+    "HW: System {hardware_identifier} keeps crashing every few minutes - tech found {issue}",
+    "HARDWARE: {hardware_identifier} was working fine yesterday, but now experiencing {issue}",
+    "HW URGENT: Lost all my work due to {hardware_identifier} having {issue}",
+
+    # Performance complaints with hardware identifiers
+    "HARDWARE SLOWDOWN: My computer's {hardware_identifier} is incredibly slow - IT discovered {issue}",
+    "HW NOISE: Machine {hardware_identifier} making strange noises - related to {issue}",
+    "HARDWARE FREEZE: Computer {hardware_identifier} keeps freezing during meetings due to {issue}",
+    "HW PRODUCTIVITY: Can't get any work done - {hardware_identifier} experiencing {issue}",
 
-    hardware_templates = [
-        # User frustration reports with hardware identifiers
-        f"HARDWARE ISSUE: Help! My computer's {hardware_identifier} won't work at all. Diagnosed as: {issue}",
-        f"HW: System {hardware_identifier} keeps crashing every few minutes - tech found {issue}",
-        f"HARDWARE: {hardware_identifier} was working fine yesterday, but now experiencing {issue}",
-        f"HW URGENT: Lost all my work due to {hardware_identifier} having {issue}",
+    # Equipment status reports with hardware identifiers
+    "HARDWARE ERROR: Blue screen errors from {hardware_identifier} - maintenance found {issue}",
+    "HW DANGER: Smoke coming from {hardware_identifier}! Related to {issue}",
+    "HARDWARE SMELL: Strange burning smell from {hardware_identifier} - technician identified {issue}",
+    "HW FAILURE: Equipment {hardware_identifier} completely dead - caused by {issue}",
 
-        # Performance complaints with hardware identifiers
-        f"HARDWARE SLOWDOWN: My computer's {hardware_identifier} is incredibly slow - IT discovered {issue}",
-        f"HW NOISE: Machine {hardware_identifier} making strange noises - related to {issue}",
-        f"HARDWARE FREEZE: Computer {hardware_identifier} keeps freezing during meetings due to {issue}",
-        f"HW PRODUCTIVITY: Can't get any work done - {hardware_identifier} experiencing {issue}",
+    # Work impact reports with hardware identifiers
+    "HARDWARE BLOCKER: Entire team blocked - {hardware_identifier} dealing with {issue}",
+    "HW MEETING: Client meeting interrupted by {hardware_identifier} having {issue}",
+    "HARDWARE DATA: Lost access to critical files due to {hardware_identifier} with {issue}",
+    "HW DEADLINE: Project deadline at risk because of {hardware_identifier} showing {issue}",
 
-        # Equipment status reports with hardware identifiers
-        f"HARDWARE ERROR: Blue screen errors from {hardware_identifier} - maintenance found {issue}",
-        f"HW DANGER: Smoke coming from {hardware_identifier}! Related to {issue}",
-        f"HARDWARE SMELL: Strange burning smell from {hardware_identifier} - technician identified {issue}",
-        f"HW FAILURE: Equipment {hardware_identifier} completely dead - caused by {issue}",
+    # IT diagnostic reports with hardware identifiers
+    "HARDWARE MAINTENANCE: Routine check of {hardware_identifier} detected: {issue}",
+    "HW DIAGNOSTIC: Hardware diagnostics on {hardware_identifier} alert: {issue}",
+    "HARDWARE MONITORING: System monitoring of {hardware_identifier} warning: {issue}",
+    "HW REPLACEMENT: Emergency {hardware_identifier} replacement needed: {issue}",
 
-        # Work impact reports with hardware identifiers
-        f"HARDWARE BLOCKER: Entire team blocked - {hardware_identifier} dealing with {issue}",
-        f"HW MEETING: Client meeting interrupted by {hardware_identifier} having {issue}",
-        f"HARDWARE DATA: Lost access to critical files due to {hardware_identifier} with {issue}",
-        f"HW DEADLINE: Project deadline at risk because of {hardware_identifier} showing {issue}",
+    # Specific hardware complaints with hardware identifiers
+    "HARDWARE DISPLAY: Monitor {hardware_identifier} keeps flickering - shows {issue}",
+    "HW INPUT: Keyboard {hardware_identifier} typing random characters - found {issue}",
+    "HARDWARE OUTPUT: Printer {hardware_identifier} making grinding noises - indicates {issue}",
+    "HW POWER: Laptop {hardware_identifier} dying quickly - confirmed {issue}",
 
-        # IT diagnostic reports with hardware identifiers
-        f"HARDWARE MAINTENANCE: Routine check of {hardware_identifier} detected: {issue}",
-        f"HW DIAGNOSTIC: Hardware diagnostics on {hardware_identifier} alert: {issue}",
-        f"HARDWARE MONITORING: System monitoring of {hardware_identifier} warning: {issue}",
-        f"HW REPLACEMENT: Emergency {hardware_identifier} replacement needed: {issue}",
+    # Environmental impacts with hardware identifiers
+    "HARDWARE ENVIRONMENTAL: After power outage, {hardware_identifier} discovered {issue}",
+    "HW CLIMATE: Post-AC failure, {hardware_identifier} identified with {issue}",
+    "HARDWARE DAMAGE: Coffee spill on {hardware_identifier} resulted in {issue}",
+    "HW RELOCATION: Following office move, {hardware_identifier} found with {issue}",
 
-        # Specific hardware complaints with hardware identifiers
-        f"HARDWARE DISPLAY: Monitor {hardware_identifier} keeps flickering - shows {issue}",
-        f"HW INPUT: Keyboard {hardware_identifier} typing random characters - found {issue}",
-        f"HARDWARE OUTPUT: Printer {hardware_identifier} making grinding noises - indicates {issue}",
-        f"HW POWER: Laptop {hardware_identifier} dying quickly - confirmed {issue}",
+    # More specific hardware issues
+    "HARDWARE PROJECTOR: Urgent: Projector {hardware_identifier} not working before board meeting - identified as {issue}",
+    "HW PRINTER: Printer {hardware_identifier} jams every time I print - caused by {issue}",
+    "HARDWARE DISPLAY: Screen {hardware_identifier} has dead pixels affecting display quality - diagnosed {issue}",
 
-        # Environmental impacts with hardware identifiers
-        f"HARDWARE ENVIRONMENTAL: After power outage, {hardware_identifier} discovered {issue}",
-        f"HW CLIMATE: Post-AC failure, {hardware_identifier} identified with {issue}",
-        f"HARDWARE DAMAGE: Coffee spill on {hardware_identifier} resulted in {issue}",
-        f"HW RELOCATION: Following office move, {hardware_identifier} found with {issue}",
-        
-        # More specific hardware issues
-        f"HARDWARE PROJECTOR: Urgent: Projector {hardware_identifier} not working before board meeting - identified as {issue}",
-        f"HW PRINTER: Printer {hardware_identifier} jams every time I print - caused by {issue}",
-        f"HARDWARE DISPLAY: Screen {hardware_identifier} has dead pixels affecting display quality - diagnosed {issue}",
-        
-        # User report formats
-        f"HARDWARE USER: My {hardware_identifier} is making weird clicking sounds. Tech diagnosed: {issue}",
-        f"HW COMPLAINT: Computer keeps shutting down randomly. IT found problem with {hardware_identifier}: {issue}",
-        f"HARDWARE HELP: Need urgent help with my {hardware_identifier}. Service desk identified {issue}",
-        f"HW REQUEST: Please send technician to look at my {hardware_identifier}. Previous diagnosis: {issue}",
-        
-        # IT staff report formats
-        f"HARDWARE IT: During preventative maintenance on {hardware_identifier}, found {issue}",
-        f"HW TECH: Technician report: {hardware_identifier} needs replacement due to {issue}",
-        f"HARDWARE ANALYSIS: Diagnostic scan of {hardware_identifier} revealed {issue}",
-        f"HW INSPECTION: Regular hardware inspection found {hardware_identifier} suffering from {issue}",
-        f"It's showing a black screen ,{hardware_identifier} suffers {issue}",
-        f"My machine is stuck in a boot loop. {issue}"
-    ]
+    # User report formats
+    "HARDWARE USER: My {hardware_identifier} is making weird clicking sounds. Tech diagnosed: {issue}",
+    "HW COMPLAINT: Computer keeps shutting down randomly. IT found problem with {hardware_identifier}: {issue}",
+    "HARDWARE HELP: Need urgent help with my {hardware_identifier}. Service desk identified {issue}",
+    "HW REQUEST: Please send technician to look at my {hardware_identifier}. Previous diagnosis: {issue}",
 
-    return {
-        'description': random.choice(hardware_templates),
-        'category': category,
-        'subcategory': subcat_name,
-        'priority': random.choices(
-            [1, 2, 3, 4],  # P1 is highest priority
-            weights=subcat_data['priority_weights']
-        )[0]
+    # IT staff report formats
+    "HARDWARE IT: During preventative maintenance on {hardware_identifier}, found {issue}",
+    "HW TECH: Technician report: {hardware_identifier} needs replacement due to {issue}",
+    "HARDWARE ANALYSIS: Diagnostic scan of {hardware_identifier} revealed {issue}",
+    "HW INSPECTION: Regular hardware inspection found {hardware_identifier} suffering from {issue}",
+    "It's showing a black screen ,{hardware_identifier} suffers {issue}",
+    "My machine is stuck in a boot loop. {issue}"
+]
+
+# Vectorized generator: issues and identifiers are drawn per subcategory
+GENERATOR = TemplateGenerator(
+    category='HARDWARE',
+    taxonomy=INCIDENT_TAXONOMY['HARDWARE']['subcategories'],
+    templates=HARDWARE_TEMPLATES,
+    fields={
+        'issue': 'issues',
+        'hardware_identifier': 'hardware_identifiers'
     }
+)
 
-def generate_dataset(num_samples: int = 5000) -> pd.DataFrame:
-    """Generate hardware incident dataset"""
-    data = []
-    for _ in range(num_samples):
-        data.append(generate_incident())
+def generate_incident() -> dict:
+    """Generate a hardware incident with realistic user-reported descriptions"""
+    return GENERATOR.generate_record()
 
-    df = pd.DataFrame(data)
-    
-    # Ensure exact column order
-    return df[['description', 'category', 'subcategory', 'priority']]
+def generate_dataset(num_samples: int = 5000, seed=None) -> pd.DataFrame:
+    """Generate hardware incident dataset (vectorized, see template_engine)"""
+    return GENERATOR.generate(num_samples, seed)
 
 if __name__ == "__main__":
     # Generate and save data
@@ -2,6 +2,8 @@ import pandas as pd
 import random
 from datetime import datetime, timedelta
 
+from template_engine import TemplateGenerator
+
 NETWORK_TAXONOMY = {
     'Connectivity': {
         'issues': [
@@ -225,148 +227,159 @@ NETWORK_VOCABULARY = {
     ]
 }
 
-def generate_description(subcategory: str, issue: str, taxonomy_data: dict) -> str:
-    """Generate a detailed incident description with distinct network-specific markers"""
-    locations = [
-        'main office',
-        'branch location',
-        'remote site',
-        'data center',
-        'server room',
-        'manufacturing floor',
-        'warehouse',
-        'corporate headquarters',
-        'satellite office',
-        'client site'
-    ]
+NETWORK_LOCATIONS = [
+    'main office',
+    'branch location',
+    'remote site',
+    'data center',
+    'server room',
+    'manufacturing floor',
+    'warehouse',
+    'corporate headquarters',
+    'satellite office',
+    'client site'
+]
+
+NETWORK_IMPACTS = [
+    'causing service disruption',
+    'affecting network performance',
+    'impacting user connectivity',
+    'causing system slowdown',
+    'resulting in connection failures',
+    'creating access issues',
+    'leading to timeout errors',
+    'causing packet drops',
+    'affecting multiple users',
+    'degrading service quality'
+]
+
+# Network-specific templates with clear category markers
+NETWORK_TEMPLATES = [
+    "[NETWORK ALERT] {issue} detected in {location} {network_identifier}. {Verb} required for {adj} {noun}.",
     
-    impacts = [
-        'causing service disruption',
-        'affecting network performance',
-        'impacting user connectivity',
-        'causing system slowdown',
-        'resulting in connection failures',
-        'creating access issues',
-        'leading to timeout errors',
-        'causing packet drops',
-        'affecting multiple users',
-        'degrading service quality'
-    ]
+    "[NETOPS] {issue} reported on {network_identifier} at {location}. Team is {action}.",
+    
+    "[NETWORK/{subcategory}] {issue} detected during {network_identifier} monitoring. {Noun} is {adj}, needs {verb}ing.",
+    
+    "[NETWORK INCIDENT] {issue} related to {network_identifier} {impact}. {Verb}ing {noun} to resolve.",
+    
+    "[NET TICKET] {issue} in {network_identifier} at {location}. {action} to restore connectivity.",
+    
+    "[NETWORK MONITOR] {issue} affecting {network_identifier}. {Adj} {noun} requires immediate {verb}ing.",
+    
+    "[NETOPS BULLETIN] Multiple reports of {issue} with {network_identifier}. Network team {action}.",
+    
+    "[NETWORK SUPPORT] {issue} detected on {network_identifier}. Please {verb} the {noun} to restore service.",
+    
+    "[NET-{subcategory}] The {network_identifier} is experiencing {adj} issues. Users reporting {issue}.",
+    
+    "[NETWORK DIAG] Please help with {network_identifier} problems. {Verb}ing shows {issue}.",
+    
+    "[NETWORK OUTAGE] {network_identifier} experiencing {issue}. {action} in progress.",
+    
+    "[NET SERVICE] Keep losing connection to {network_identifier}. {Verb}ing identified {issue}.",
+    
+    "[NETWORK OPS] Without {network_identifier}, departments can't work! Identified as {issue}, requires {verb}ing.",
+    
+    "[NETOPS PERF] {network_identifier} is {adj}! Investigation shows {issue}. {action} to improve performance.",
+    
+    "[NETWORK CONN] Been trying to connect to {network_identifier} for hours. {Verb}ed as {issue}.",
+    
+    "[NET INTERNAL] Can't load internal sites - {network_identifier} showing signs of {issue}. {Verb} required.",
+    
+    "[NETWORK STABILITY] {network_identifier} keeps dropping every few minutes. {issue} confirmed by {action}.",
+    
+    "[NET-ACCESS] Can't connect to the {network_identifier} - device shows '{adj}' due to {issue}.",
+    
+    "[NETWORK FAILURE] No connectivity on all devices connected to {network_identifier}. Root cause: {issue}.",
+    
+    "[NETWORK URGENT] The {network_identifier} is down affecting deadlines! {issue} identified through {verb}ing.",
     
-    # Get network-specific identifiers
-    network_identifier = random.choice(taxonomy_data['network_identifiers'])
+    "[NET PRIORITY] Fix {network_identifier} ASAP - teams can't work due to {issue}. {action} needed immediately.",
     
-    # Get network-specific vocabulary
+    "[NETWORK-911] {network_identifier} is completely non-responsive. Need immediate {verb}ing. Cause: {issue}.",
+    
+    "[NETOPS CRITICAL] {network_identifier} connectivity broken - {action} shows {issue} as root cause.",
+    
+    "[NETWORK DIAGNOSTIC] {network_identifier} test failure - {verb}ing confirmed {issue} in the {noun}.",
+    
+    "[NET DEPARTMENT] Not sure if it's isolated, but the {network_identifier} has {issue} affecting {adj} connections.",
+    
+    "[NETWORK CHANGE] {network_identifier} was operational yesterday, now showing {issue}. Needs {verb}ing.",
+    
+    "[NET RESOURCE] Can't access shared resources via {network_identifier} - {noun} reports '{adj} error' related to {issue}.",
+    
+    "[NETWORK VPN] {network_identifier} keeps disconnecting every few minutes due to {issue}. {action} in progress.",
+    
+    "[NET-DNS] Getting 'DNS lookup failed' errors on {network_identifier}. Root cause: {issue}.",
+    
+    "[NETWORK STATUS] {network_identifier} says 'connected, no internet' because of {issue}. {Verb} needed.",
+    
+    "[NETWORK IMPACT] This is affecting productivity - {network_identifier} needs {verb}ing! Issue: {issue}.",
+    
+    "[NET LATENCY] Users experiencing delays with {adj} {network_identifier} connection caused by {issue}.",
+    
+    "[NETWORK NOTICE] Unusual behavior with {network_identifier} today. Confirmed as {issue} through {action}.",
+    
+    "[NET QUERY] What's wrong with the {network_identifier}? {Verb}ing shows symptoms of {issue}.",
+    
+    "[NETWORK REQUEST] Could IT please check the {network_identifier}? It's very {adj} due to {issue}.",
+    
+    "[NET ASSIST] Having trouble connecting to the {network_identifier}. {Verb}is shows {issue}.",
+    
+    "[NETWORK HELPDESK] Would you mind {verb}ing the {network_identifier} issues? Related to {issue}.",
+    
+    "[NET INFO] Wanted to inform you that the {network_identifier} is down because of {issue}. {action} initiated."
+]
+
+# Vectorized generator: issues and identifiers are drawn per subcategory
+GENERATOR = TemplateGenerator(
+    category='NETWORK',
+    taxonomy=NETWORK_TAXONOMY,
+    templates=NETWORK_TEMPLATES,
+    fields={
+        'issue': 'issues',
+        'network_identifier': 'network_identifiers',
+        'location': NETWORK_LOCATIONS,
+        'impact': NETWORK_IMPACTS,
+        'verb': NETWORK_VOCABULARY['verbs'],
+        'adj': NETWORK_VOCABULARY['adjectives'],
+        'noun': NETWORK_VOCABULARY['nouns'],
+        'action': NETWORK_VOCABULARY['action_phrases']
+    },
+    derived={
+        'Verb': ('verb', str.capitalize),
+        'Adj': ('adj', str.capitalize),
+        'Noun': ('noun', str.capitalize)
+    }
+)
+
+def generate_description(subcategory: str, issue: str, taxonomy_data: dict) -> str:
+    """Generate a detailed incident description with distinct network-specific markers"""
     verb = random.choice(NETWORK_VOCABULARY['verbs'])
     adj = random.choice(NETWORK_VOCABULARY['adjectives'])
     noun = random.choice(NETWORK_VOCABULARY['nouns'])
-    action = random.choice(NETWORK_VOCABULARY['action_phrases'])
-    
-    # Network-specific templates with clear category markers
-    network_templates = [
-        f"[NETWORK ALERT] {issue} detected in {random.choice(locations)} {network_identifier}. {verb.capitalize()} required for {adj} {noun}.",
-        
-        f"[NETOPS] {issue} reported on {network_identifier} at {random.choice(locations)}. Team is {action}.",
-        
-        f"[NETWORK/{subcategory}] {issue} detected during {network_identifier} monitoring. {noun.capitalize()} is {adj}, needs {verb}ing.",
-        
-        f"[NETWORK INCIDENT] {issue} related to {network_identifier} {random.choice(impacts)}. {verb.capitalize()}ing {noun} to resolve.",
-        
-        f"[NET TICKET] {issue} in {network_identifier} at {random.choice(locations)}. {action} to restore connectivity.",
-        
-        f"[NETWORK MONITOR] {issue} affecting {network_identifier}. {adj.capitalize()} {noun} requires immediate {verb}ing.",
-        
-        f"[NETOPS BULLETIN] Multiple reports of {issue} with {network_identifier}. Network team {action}.",
-        
-        f"[NETWORK SUPPORT] {issue} detected on {network_identifier}. Please {verb} the {noun} to restore service.",
-        
-        f"[NET-{subcategory}] The {network_identifier} is experiencing {adj} issues. Users reporting {issue}.",
-        
-        f"[NETWORK DIAG] Please help with {network_identifier} problems. {verb.capitalize()}ing shows {issue}.",
-        
-        f"[NETWORK OUTAGE] {network_identifier} experiencing {issue}. {action} in progress.",
-        
-        f"[NET SERVICE] Keep losing connection to {network_identifier}. {verb.capitalize()}ing identified {issue}.",
-        
-        f"[NETWORK OPS] Without {network_identifier}, departments can't work! Identified as {issue}, requires {verb}ing.",
-        
-        f"[NETOPS PERF] {network_identifier} is {adj}! Investigation shows {issue}. {action} to improve performance.",
-        
-        f"[NETWORK CONN] Been trying to connect to {network_identifier} for hours. {verb.capitalize()}ed as {issue}.",
-        
-        f"[NET INTERNAL] Can't load internal sites - {network_identifier} showing signs of {issue}. {verb.capitalize()} required.",
-        
-        f"[NETWORK STABILITY] {network_identifier} keeps dropping every few minutes. {issue} confirmed by {action}.",
-        
-        f"[NET-ACCESS] Can't connect to the {network_identifier} - device shows '{adj}' due to {issue}.",
-        
-        f"[NETWORK FAILURE] No connectivity on all devices connected to {network_identifier}. Root cause: {issue}.",
-        
-        f"[NETWORK URGENT] The {network_identifier} is down affecting deadlines! {issue} identified through {verb}ing.",
-        
-        f"[NET PRIORITY] Fix {network_identifier} ASAP - teams can't work due to {issue}. {action} needed immediately.",
-        
-        f"[NETWORK-911] {network_identifier} is completely non-responsive. Need immediate {verb}ing. Cause: {issue}.",
-        
-        f"[NETOPS CRITICAL] {network_identifier} connectivity broken - {action} shows {issue} as root cause.",
-        
-        f"[NETWORK DIAGNOSTIC] {network_identifier} test failure - {verb}ing confirmed {issue} in the {noun}.",
-        
-        f"[NET DEPARTMENT] Not sure if it's isolated, but the {network_identifier} has {issue} affecting {adj} connections.",
-        
-        f"[NETWORK CHANGE] {network_identifier} was operational yesterday, now showing {issue}. Needs {verb}ing.",
-        
-        f"[NET RESOURCE] Can't access shared resources via {network_identifier} - {noun} reports '{adj} error' related to {issue}.",
-        
-        f"[NETWORK VPN] {network_identifier} keeps disconnecting every few minutes due to {issue}. {action} in progress.",
-        
-        f"[NET-DNS] Getting 'DNS lookup failed' errors on {network_identifier}. Root cause: {issue}.",
-        
-        f"[NETWORK STATUS] {network_identifier} says 'connected, no internet' because of {issue}. {verb.capitalize()} needed.",
-        
-        f"[NETWORK IMPACT] This is affecting productivity - {network_identifier} needs {verb}ing! Issue: {issue}.",
-        
-        f"[NET LATENCY] Users experiencing delays with {adj} {network_identifier} connection caused by {issue}.",
-        
-        f"[NETWORK NOTICE] Unusual behavior with {network_identifier} today. Confirmed as {issue} through {action}.",
-        
-        f"[NET QUERY] What's wrong with the {network_identifier}? {verb.capitalize()}ing shows symptoms of {issue}.",
-        
-        f"[NETWORK REQUEST] Could IT please check the {network_identifier}? It's very {adj} due to {issue}.",
-        
-        f"[NET ASSIST] Having trouble connecting to the {network_identifier}. {verb.capitalize()}is shows {issue}.",
-        
-        f"[NETWORK HELPDESK] Would you mind {verb}ing the {network_identifier} issues? Related to {issue}.",
-        
-        f"[NET INFO] Wanted to inform you that the {network_identifier} is down because of {issue}. {action} initiated."
-    ]
     
-    return random.choice(network_templates)
+    # Only the chosen template is formatted
+    return random.choice(NETWORK_TEMPLATES).format(
+        subcategory=subcategory,
+        issue=issue,
+        network_identifier=random.choice(taxonomy_data['network_identifiers']),
+        location=random.choice(NETWORK_LOCATIONS),
+        impact=random.choice(NETWORK_IMPACTS),
+        verb=verb, Verb=verb.capitalize(),
+        adj=adj, Adj=adj.capitalize(),
+        noun=noun, Noun=noun.capitalize(),
+        action=random.choice(NETWORK_VOCABULARY['action_phrases'])
+    )
 
 def generate_incident() -> dict:
     """Generate a single network incident record"""
-    subcategory = random.choice(list(NETWORK_TAXONOMY.keys()))
-    taxonomy = NETWORK_TAXONOMY[subcategory]
-    
-    issue = random.choice(taxonomy['issues'])
-    
-    return {
-        'description': generate_description(subcategory, issue, taxonomy),
-        'category': 'NETWORK',
-        'subcategory': subcategory,
-        'priority': random.choices(
-            [1, 2, 3, 4],
-            weights=taxonomy['priority_weights']
-        )[0]
-    }
+    return GENERATOR.generate_record()
 
-def generate_dataset(num_samples: int = 1000) -> pd.DataFrame:
-    """Generate network incident dataset"""
-    data = [generate_incident() for _ in range(num_samples)]
-    df = pd.DataFrame(data)
-    
-    # Ensure exact column order
-    return df[['description', 'category', 'subcategory', 'priority']]
+def generate_dataset(num_samples: int = 1000, seed=None) -> pd.DataFrame:
+    """Generate network incident dataset (vectorized, see template_engine)"""
+    return GENERATOR.generate(num_samples, seed)
 
 if __name__ == "__main__":
     # Generate and save data
@@ -1,5 +1,6 @@
 import pandas as pd
-import random
+
+from template_engine import TemplateGenerator
 
 INCIDENT_TAXONOMY = {
     'SECURITY': {
@@ -220,58 +221,48 @@ SECURITY_VOCABULARY = {
     ]
 }
 
-def generate_incidents_dataframe(num_incidents=100) -> pd.DataFrame:
+# Security-specific templates with clear category markers
+SECURITY_TEMPLATES = [
+    # Security alerts with category markers
+    "[SECURITY ALERT] {issue} detected. {Noun} attempting to {verb} systems.",
+    "[THREAT DETECTION] {issue} identified by security monitoring. {action} in progress.",
+    "[SIEM ALERT] {issue} signature matched from {adj} source. Security team {verb}ing logs.",
+
+    # Security team reports
+    "[SEC-NOTICE] Investigating {issue}. {Noun} activity detected from {adj} IP.",
+    "[SOC ALERT] {issue} requiring immediate response. {action} to prevent data {verb}ion.",
+    "[THREAT INTEL] {issue} targeting our infrastructure. {Adj} actors using {noun} techniques.",
+
+    # Critical security alerts
+    "[SECURITY BREACH] Active {issue} detected. Systems {verb}ed by {adj} {noun}. {action}.",
+    "[INCIDENT RESPONSE] {issue} confirmed. Security team handling {adj} breach of {noun}s. {action}.",
+    "[CRITICAL SECURITY] {issue} in progress. Security operations {verb}ing the {adj} {noun}. {action}.",
+    "can't open my email {issue} in progress. Security operations {verb}ing the {adj} {noun}. {action}.",
+    " i got hacked {issue} ",
+    "password leaked {issue}"
+]
+
+# Vectorized generator: issues are drawn per subcategory
+GENERATOR = TemplateGenerator(
+    category='SECURITY',
+    taxonomy=INCIDENT_TAXONOMY['SECURITY']['subcategories'],
+    templates=SECURITY_TEMPLATES,
+    fields={
+        'issue': 'issues',
+        'verb': SECURITY_VOCABULARY['verbs'],
+        'adj': SECURITY_VOCABULARY['adjectives'],
+        'noun': SECURITY_VOCABULARY['nouns'],
+        'action': SECURITY_VOCABULARY['action_phrases']
+    },
+    derived={
+        'Adj': ('adj', str.capitalize),
+        'Noun': ('noun', str.capitalize)
+    }
+)
+
+def generate_incidents_dataframe(num_incidents=100, seed=None) -> pd.DataFrame:
     """Generate a DataFrame with the specified number of security incidents"""
-    incidents = []
-    
-    for _ in range(num_incidents):
-        category = 'SECURITY'
-        subcat_name = random.choice(list(INCIDENT_TAXONOMY[category]['subcategories'].keys()))
-        subcat_data = INCIDENT_TAXONOMY[category]['subcategories'][subcat_name]
-        issue = random.choice(subcat_data['issues'])
-        
-        # Get security-specific vocabulary
-        verb = random.choice(SECURITY_VOCABULARY['verbs'])
-        adj = random.choice(SECURITY_VOCABULARY['adjectives'])
-        noun = random.choice(SECURITY_VOCABULARY['nouns'])
-        action = random.choice(SECURITY_VOCABULARY['action_phrases'])
-        
-        # Security-specific templates with clear category markers
-        templates = [
-            # Security alerts with category markers
-            f"[SECURITY ALERT] {issue} detected. {noun.capitalize()} attempting to {verb} systems.",
-            f"[THREAT DETECTION] {issue} identified by security monitoring. {action} in progress.",
-            f"[SIEM ALERT] {issue} signature matched from {adj} source. Security team {verb}ing logs.",
-            
-            # Security team reports
-            f"[SEC-NOTICE] Investigating {issue}. {noun.capitalize()} activity detected from {adj} IP.",
-            f"[SOC ALERT] {issue} requiring immediate response. {action} to prevent data {verb}ion.",
-            f"[THREAT INTEL] {issue} targeting our infrastructure. {adj.capitalize()} actors using {noun} techniques.",
-            
-            # Critical security alerts
-            f"[SECURITY BREACH] Active {issue} detected. Systems {verb}ed by {adj} {noun}. {action}.",
-            f"[INCIDENT RESPONSE] {issue} confirmed. Security team handling {adj} breach of {noun}s. {action}.",
-            f"[CRITICAL SECURITY] {issue} in progress. Security operations {verb}ing the {adj} {noun}. {action}.",
-            f"can't open my email {issue} in progress. Security operations {verb}ing the {adj} {noun}. {action}.",
-            f" i got hacked {issue} ",
-            f"password leaked {issue}"
-        ]
-        
-        description = random.choice(templates)
-        
-        # Choose priority based on weights
-        priorities = [1, 2, 3, 4]
-        priority = random.choices(priorities, weights=subcat_data['priority_weights'])[0]
-        
-        incidents.append({
-            'description': description,
-            'category': category,
-            'subcategory': subcat_name,
-            'priority': priority
-        })
-    
-    df = pd.DataFrame(incidents)
-    return df
+    return GENERATOR.generate(num_incidents, seed)
 
 if __name__ == "__main__":
    
@@ -0,0 +1,189 @@
+"""
+Vectorized template engine shared by the incident data generators.
+
+A generator is described by its subcategory taxonomy (issues, priority
+weights and any other per-subcategory word lists), vocabulary lists shared
+by all subcategories, and description templates written as str.format
+strings such as "[NETOPS] {issue} reported on {network_identifier}".
+
+Rows are produced in bulk: the subcategory, template, priority and every
+word are drawn as NumPy index arrays, and only the chosen template is
+assembled for each row, by concatenating object arrays template by
+template. Large datasets are written in chunks, so memory stays bounded by
+the chunk size whatever the number of rows:
+
+    GENERATOR.write_csv('data/network_incidents.csv', 10_000_000, seed=0)
+"""
+import random
+from string import Formatter
+
+import numpy as np
+import pandas as pd
+
+PRIORITIES = [1, 2, 3, 4]
+COLUMNS = ['description', 'category', 'subcategory', 'priority']
+
+
+class TemplateGenerator:
+    def __init__(self, category, taxonomy, templates, fields, derived=None):
+        """
+        Args:
+            category: str, value of the category column
+            taxonomy: dict, subcategory -> dict with 'priority_weights' (P1..P4)
+                       and the per-subcategory word lists
+            templates: list of str.format templates, chosen uniformly per row
+            fields: dict, template field -> word list shared by all
+                       subcategories, dict of subcategory -> word list, or
+                       taxonomy key holding a list per subcategory (e.g.
+                       {'issue': 'issues'}); 'subcategory' is always available
+            derived: dict, template field -> (source field, function applied
+                       to the source word), e.g. {'Verb': ('verb', str.capitalize)};
+                       a derived field always uses the same word as its source
+        """
+        self.category = category
+        self.taxonomy = taxonomy
+        self.templates = templates
+        self.fields = fields
+        self.derived = derived or {}
+        self.subcategories = list(taxonomy)
+
+        # Each template as alternating literals and field names:
+        # literal, field, literal, ..., literal
+        self._compiled = []
+        for template in templates:
+            literals, names = [''], []
+            for literal, name, _, _ in Formatter().parse(template):
+                literals[-1] += literal
+                if name is not None:
+                    if name not in fields and name not in self.derived and name != 'subcategory':
+                        raise ValueError(f"Unknown field {{{name}}} in template: {template}")
+                    names.append(name)
+                    literals.append('')
+            self._compiled.append((literals, names))
+
+        # Per-subcategory lists are flattened into one array with offsets
+        self._pools = {}
+        for field, source in fields.items():
+            if isinstance(source, (str, dict)):
+                lists = [self._subcategory_words(source, sub) for sub in self.subcategories]
+                lengths = np.array([len(values) for values in lists])
+                offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+                flat = [value for values in lists for value in values]
+                self._pools[field] = (_object_array(flat), lengths, offsets)
+            else:
+                self._pools[field] = (_object_array(source), None, None)
+        self._pools['subcategory'] = (_object_array(self.subcategories), None, None)
+        self._derived_pools = {
+            field: _object_array([function(value) for value in self._pools[base][0]])
+            for field, (base, function) in self.derived.items()
+        }
+
+        weights = np.array([taxonomy[sub]['priority_weights'] for sub in self.subcategories],
+                           dtype=np.float64)
+        self._priority_cdf = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+
+    def generate(self, num_samples, seed=None):
+        """
+        Generate num_samples incidents as a DataFrame
+
+        Args:
+            num_samples: int, number of rows
+            seed: int, numpy Generator or None (fresh entropy)
+        """
+        rng = np.random.default_rng(seed)
+        n = num_samples
+        subcategory = rng.integers(len(self.subcategories), size=n)
+        template = rng.integers(len(self.templates), size=n)
+        # Inverse CDF of each row's subcategory priority weights
+        draw = rng.random(n)
+        priority = (draw[:, None] >= self._priority_cdf[subcategory, :-1]).sum(axis=1) + 1
+
+        # Index into each field's word array, drawn for every row
+        indices = {}
+        for field, (values, lengths, offsets) in self._pools.items():
+            if field == 'subcategory':
+                indices[field] = subcategory
+            elif lengths is None:
+                indices[field] = rng.integers(len(values), size=n)
+            else:
+                local = (rng.random(n) * lengths[subcategory]).astype(np.int64)
+                indices[field] = offsets[subcategory] + local
+
+        description = np.empty(n, dtype=object)
+        for t, (literals, names) in enumerate(self._compiled):
+            rows = np.flatnonzero(template == t)
+            if not len(rows):
+                continue
+            text = np.full(len(rows), literals[0], dtype=object)
+            for name, literal in zip(names, literals[1:]):
+                text = text + self._words(name)[indices[self._source(name)][rows]]
+                if literal:
+                    text = text + literal
+            description[rows] = text
+
+        # Labels come out categorical and priority int8, as stored in the
+        # columnar formats
+        return pd.DataFrame({
+            'description': description,
+            'category': pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [self.category]),
+            'subcategory': pd.Categorical.from_codes(subcategory, self.subcategories),
+            'priority': priority.astype(np.int8)
+        }, columns=COLUMNS)
+
+    def iter_chunks(self, num_samples, chunk_size=250000, seed=None):
+        """Yield DataFrames of at most chunk_size rows, num_samples in total"""
+        rng = np.random.default_rng(seed)
+        for start in range(0, num_samples, chunk_size):
+            yield self.generate(min(chunk_size, num_samples - start), rng)
+
+    def write_csv(self, path, num_samples, chunk_size=250000, seed=None):
+        """Stream num_samples incidents to a CSV file, chunk by chunk"""
+        with open(path, 'w', newline='') as f:
+            for i, chunk in enumerate(self.iter_chunks(num_samples, chunk_size, seed)):
+                chunk.to_csv(f, header=i == 0, index=False)
+        return num_samples
+
+    def generate_record(self):
+        """Generate one incident dict using the standard library's random module"""
+        subcategory = random.choice(self.subcategories)
+        literals, names = random.choice(self._compiled)
+        words = {'subcategory': subcategory}
+        for name in names:
+            source = self._source(name)
+            if source not in words:
+                pool = self.fields[source]
+                if isinstance(pool, (str, dict)):
+                    pool = self._subcategory_words(pool, subcategory)
+                words[source] = random.choice(pool)
+            if name in self.derived:
+                words[name] = self.derived[name][1](words[source])
+        description = literals[0] + ''.join(
+            words[name] + literal for name, literal in zip(names, literals[1:]))
+        return {
+            'description': description,
+            'category': self.category,
+            'subcategory': subcategory,
+            'priority': random.choices(
+                PRIORITIES, weights=self.taxonomy[subcategory]['priority_weights'])[0]
+        }
+
+    def _subcategory_words(self, source, subcategory):
+        """Word list of a per-subcategory field"""
+        if isinstance(source, str):
+            return self.taxonomy[subcategory][source]
+        return source[subcategory]
+
+    def _source(self, name):
+        """Field whose word index a template field uses"""
+        return self.derived[name][0] if name in self.derived else name
+
+    def _words(self, name):
+        """Word array a template field picks from"""
+        return self._derived_pools[name] if name in self.derived else self._pools[name][0]
+
+
+def _object_array(values):
+    """1-D object array of Python strings (np.array would make fixed-width str)"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
@@ -0,0 +1,367 @@
+"""
+Hyperparameter search for the category and priority models.
+
+Samples --trials vectorizer + forest settings from SEARCH_SPACE and ranks them
+by successive halving: every trial is first trained on a small share of the
+training rows, the best 1/--eta of them go on with --eta times more rows, and
+so on up to the full training set. Trials run in --workers processes, each
+forest with n_jobs=1. Trials draw their vectorizer from a few sampled
+vectorizer settings (--vectorizer-configs), so TF-IDF matrices are shared.
+
+The expensive steps are cached under --cache-dir, keyed by the data files
+(path, size, mtime), the sample and the settings, and reused by every trial
+and by later runs:
+
+    preprocessed-<data>.joblib          preprocessed descriptions, labels, split
+    tfidf-<data>-<vectorizer>.joblib    TF-IDF matrices of one vectorizer setting
+
+Only the rows incident_classifier.py trains on are searched: the 20% it holds
+out as its test set (same split, so --data must list the files in the same
+order) is never used, and trials are validated on 20% of the remaining rows.
+Each trial records validation accuracy and macro F1 next to its forest fit
+time and prediction latency (vectorizer transform + forest, ms per
+description); trials on the score/latency Pareto front of their rung are
+marked with *. The best trial of each target is saved in the format read by
+incident_classifier.py --params:
+
+    python hyperparameter_search.py --target priority --trials 27 --workers 4 \
+        --output search.json
+    python incident_classifier.py --params search.json
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+
+from incident_classifier import DEFAULT_DATA_FILES, IncidentClassifier, worker_context
+from incident_data import concat_incidents, read_incidents
+
+SEARCH_SPACE = {
+    'vectorizer': {
+        'ngram_range': [[1, 1], [1, 2], [1, 3]],
+        'max_features': [5000, 10000, 20000, None],
+        'min_df': [1, 2, 5],
+        'sublinear_tf': [False, True]
+    },
+    'classifier': {
+        'n_estimators': [100, 200, 300],
+        'max_depth': [None, 20, 30, 40],
+        'min_samples_split': [2, 4, 8],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 'log2'],
+        'class_weight': ['balanced', 'balanced_subsample', None]
+    }
+}
+
+METRICS = ('accuracy', 'macro_f1')
+
+# Per-process state of the trial workers
+_worker = None
+
+
+def sample_config(space, rng):
+    """One random setting of every parameter of a search space section"""
+    return {name: rng.choice(values) for name, values in space.items()}
+
+
+def config_key(*parts):
+    """Short stable hash of JSON-serializable parts"""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def load_preprocessed(files, sample, seed, cache_dir, n_jobs):
+    """
+    Preprocessed descriptions, labels and train/validation split of the data
+
+    IncidentClassifier.train holds out 20% of the rows as its test set. The
+    same split is made here and those rows are dropped, so the search never
+    scores a trial on them: trials train and validate on a second 80/20
+    split of train()'s training rows (files must come in the order given to
+    train(), which decides the split).
+
+    Returns (cache key, path of the cache file, data dict, seconds it took
+    to build, True if it came from the cache).
+    """
+    key = config_key([(os.path.abspath(file), os.path.getsize(file), os.path.getmtime(file))
+                      for file in files], sample, seed, 'train-rows')
+    path = os.path.join(cache_dir, f'preprocessed-{key}.joblib')
+    if os.path.exists(path):
+        data = joblib.load(path)
+        return key, path, data, data['seconds'], True
+
+    start = time.perf_counter()
+    df = concat_incidents([read_incidents(file) for file in files])
+    # Same 80/20 split as IncidentClassifier.train; its test rows are left out
+    rows, _ = train_test_split(np.arange(len(df)), test_size=0.2,
+                               random_state=42, stratify=df['category'])
+    if sample and sample < len(rows):
+        rows = np.random.RandomState(seed).choice(rows, sample, replace=False)
+    df = df.iloc[np.sort(rows)].reset_index(drop=True)
+    texts = IncidentClassifier().preprocess_texts(df['description'].tolist(), n_jobs=n_jobs)
+    category = df['category'].astype(str).to_numpy()
+    train, validation = train_test_split(np.arange(len(df)), test_size=0.2,
+                                         random_state=seed, stratify=category)
+    data = {
+        'texts': texts,
+        'category': category,
+        'priority': df['priority'].to_numpy(),
+        'train': train,
+        'validation': validation,
+        'seconds': time.perf_counter() - start
+    }
+    joblib.dump(data, path)
+    return key, path, data, data['seconds'], False
+
+
+def successive_halving(executor, trials, target, n_train, eta, min_rows, metric):
+    """Run the trials rung by rung, keeping the best 1/eta after each"""
+    rungs = max(1, int(math.log(len(trials), eta) + 1e-9) + 1)
+    while rungs > 1 and n_train // eta ** (rungs - 1) < min_rows:
+        rungs -= 1
+
+    results = []
+    survivors = trials
+    for rung in range(rungs):
+        rows = n_train // eta ** (rungs - 1 - rung)
+        print(f"\n[{target}] rung {rung + 1}/{rungs}: {len(survivors)} trials "
+              f"on {rows} rows")
+        start = time.perf_counter()
+        rung_results = list(executor.map(_run_trial, survivors, repeat(target),
+                                         repeat(rows), repeat(rung)))
+        rung_results.sort(key=lambda result: result[metric], reverse=True)
+        mark_pareto_front(rung_results, metric)
+        print_results(rung_results, metric)
+        print(f"  {time.perf_counter() - start:.1f}s")
+        results.extend(rung_results)
+
+        if rung < rungs - 1:
+            keep = {result['trial'] for result in rung_results[:max(1, len(survivors) // eta)]}
+            survivors = [trial for trial in survivors if trial['id'] in keep]
+    return results
+
+
+def mark_pareto_front(results, metric):
+    """Flag results no other result beats on both score and latency"""
+    for result in results:
+        result['pareto'] = not any(
+            other[metric] >= result[metric]
+            and other['latency_ms_per_row'] <= result['latency_ms_per_row']
+            and (other[metric] > result[metric]
+                 or other['latency_ms_per_row'] < result['latency_ms_per_row'])
+            for other in results)
+
+
+def print_results(results, metric):
+    """Table of one rung, best first"""
+    print(f"  {'trial':>5} {metric:>9} {'fit s':>8} {'ms/row':>8}   settings")
+    for result in results:
+        settings = '; '.join(
+            f"{step}: " + ', '.join(f'{name}={value}' for name, value in result[step].items())
+            for step in ('vectorizer', 'classifier'))
+        print(f"  {result['trial']:>5}{'*' if result['pareto'] else ' '}"
+              f"{result[metric]:>8.4f} {result['fit_seconds']:>8.2f} "
+              f"{result['latency_ms_per_row']:>8.3f}   {settings}")
+
+
+def _init_worker(data_key, data_path, cache_dir, seed):
+    """Load the preprocessed data and split once per worker process"""
+    global _worker
+    data = joblib.load(data_path)
+    _worker = {
+        'data_key': data_key,
+        'data': data,
+        'cache_dir': cache_dir,
+        'classifier': IncidentClassifier(text_cache_size=0, lemma_cache_size=0),
+        # Rung subsets are prefixes of one shuffled order of the training rows
+        'order': np.random.default_rng(seed).permutation(len(data['train']))
+    }
+
+
+def _features_path(vectorizer_config):
+    key = config_key(_worker['data_key'], vectorizer_config)
+    return os.path.join(_worker['cache_dir'], f"tfidf-{_worker['data_key']}-{key}.joblib")
+
+
+def _build_features(vectorizer_config):
+    """Fit one vectorizer setting and cache its matrices; returns (path, cached)"""
+    path = _features_path(vectorizer_config)
+    if os.path.exists(path):
+        return path, True
+    data = _worker['data']
+    classifier = _worker['classifier']
+    classifier.model_params = {'category': {'vectorizer': vectorizer_config}}
+    vectorizer = classifier.create_vectorizer('category')
+    texts = data['texts']
+
+    start = time.perf_counter()
+    train = vectorizer.fit_transform([texts[i] for i in data['train']])
+    fit_seconds = time.perf_counter() - start
+    validation_texts = [texts[i] for i in data['validation']]
+    start = time.perf_counter()
+    validation = vectorizer.transform(validation_texts)
+    transform_ms = (time.perf_counter() - start) * 1000 / max(1, len(validation_texts))
+
+    # Written under a temporary name so that a concurrent reader never sees
+    # a partial file
+    joblib.dump({
+        'train': train.tocsr(),
+        'validation': validation.tocsr(),
+        'vectorizer_fit_seconds': fit_seconds,
+        'transform_ms_per_row': transform_ms,
+        'vocabulary_size': len(vectorizer.vocabulary_)
+    }, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return path, False
+
+
+def _run_trial(trial, target, rows, rung):
+    """Fit one forest setting on the first rows training rows and validate it"""
+    start = time.perf_counter()
+    data = _worker['data']
+    features = joblib.load(_features_path(trial['vectorizer']))
+    subset = _worker['order'][:rows]
+    y_train = data[target][data['train']][subset]
+    y_validation = data[target][data['validation']]
+
+    classifier = _worker['classifier']
+    classifier.model_params = {target: {'classifier': {**trial['classifier'], 'n_jobs': 1}}}
+    forest = classifier.create_classifier(target)
+    fit_start = time.perf_counter()
+    forest.fit(features['train'][subset], y_train)
+    fit_seconds = time.perf_counter() - fit_start
+
+    predict_start = time.perf_counter()
+    probs = forest.predict_proba(features['validation'])
+    predict_ms = (time.perf_counter() - predict_start) * 1000 / len(y_validation)
+    y_pred = forest.classes_[probs.argmax(axis=1)]
+
+    return {
+        'trial': trial['id'],
+        'rung': rung,
+        'rows': rows,
+        'vectorizer': trial['vectorizer'],
+        'classifier': trial['classifier'],
+        'accuracy': accuracy_score(y_validation, y_pred),
+        'macro_f1': f1_score(y_validation, y_pred, average='macro'),
+        'fit_seconds': fit_seconds,
+        'vectorizer_fit_seconds': features['vectorizer_fit_seconds'],
+        'latency_ms_per_row': features['transform_ms_per_row'] + predict_ms,
+        'trial_seconds': time.perf_counter() - start
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search vectorizer and forest settings')
+    parser.add_argument('--data', nargs='+', default=DEFAULT_DATA_FILES,
+                        help='CSV, Parquet or Feather files or globs, in the order '
+                             'given to incident_classifier.py --data')
+    parser.add_argument('--target', choices=['category', 'priority', 'both'],
+                        default='both')
+    parser.add_argument('--trials', type=int, default=27,
+                        help='settings sampled per target')
+    parser.add_argument('--vectorizer-configs', type=int, default=4,
+                        help='vectorizer settings the trials draw from')
+    parser.add_argument('--eta', type=int, default=3,
+                        help='successive halving keeps 1/eta of the trials per rung')
+    parser.add_argument('--min-rows', type=int, default=500,
+                        help='training rows of the first rung at least')
+    parser.add_argument('--metric', choices=METRICS, default='accuracy')
+    parser.add_argument('--sample', type=int, help='use a random sample of this many rows')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--cache-dir', default='search_cache')
+    parser.add_argument('--output', help='write all trials and the best settings as JSON')
+    args = parser.parse_args()
+
+    # In the given order (train() splits the rows of the files in that order)
+    files = list(dict.fromkeys(file for pattern in args.data
+                               for file in sorted(glob.glob(pattern))))
+    if not files:
+        raise SystemExit(f"No data files match {' '.join(args.data)}")
+    os.makedirs(args.cache_dir, exist_ok=True)
+
+    print(f"Preprocessing {len(files)} files...")
+    data_key, data_path, data, seconds, cached = load_preprocessed(
+        files, args.sample, args.seed, args.cache_dir, args.workers)
+    n_train = len(data['train'])
+    print(f"  {n_train} training / {len(data['validation'])} validation rows, "
+          f"{seconds:.1f}s{' (cached)' if cached else ''}")
+    del data
+
+    targets = ['category', 'priority'] if args.target == 'both' else [args.target]
+    rng = random.Random(args.seed)
+    vectorizer_configs = []
+    for _ in range(args.vectorizer_configs * 10):
+        config = sample_config(SEARCH_SPACE['vectorizer'], rng)
+        if config not in vectorizer_configs:
+            vectorizer_configs.append(config)
+        if len(vectorizer_configs) == args.vectorizer_configs:
+            break
+
+    report = {
+        'settings': {key: value for key, value in vars(args).items()},
+        'files': files,
+        'preprocess': {'seconds': seconds, 'cached': cached},
+        'features': [],
+        'targets': {},
+        'best': {}
+    }
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=worker_context(),
+                             initializer=_init_worker,
+                             initargs=(data_key, data_path, args.cache_dir, args.seed)) as executor:
+        print(f"\nBuilding TF-IDF matrices for {len(vectorizer_configs)} vectorizer settings...")
+        for config, (path, hit) in zip(vectorizer_configs,
+                                       executor.map(_build_features, vectorizer_configs)):
+            features = joblib.load(path)
+            print(f"  {'cached' if hit else 'built '} {config}: "
+                  f"{features['vocabulary_size']} terms, "
+                  f"fit {features['vectorizer_fit_seconds']:.1f}s")
+            report['features'].append({
+                'vectorizer': config,
+                'cached': hit,
+                'vocabulary_size': features['vocabulary_size'],
+                'vectorizer_fit_seconds': features['vectorizer_fit_seconds'],
+                'transform_ms_per_row': features['transform_ms_per_row']
+            })
+            del features
+
+        for target in targets:
+            trials = [{
+                'id': i,
+                'vectorizer': rng.choice(vectorizer_configs),
+                'classifier': sample_config(SEARCH_SPACE['classifier'], rng)
+            } for i in range(args.trials)]
+            results = successive_halving(executor, trials, target, n_train, args.eta,
+                                         args.min_rows, args.metric)
+            final = [result for result in results if result['rung'] == results[-1]['rung']]
+            best = max(final, key=lambda result: result[args.metric])
+            report['targets'][target] = {'results': results, 'best_trial': best}
+            report['best'][target] = {'vectorizer': best['vectorizer'],
+                                      'classifier': best['classifier']}
+            print(f"\n[{target}] best: trial {best['trial']}, {args.metric} "
+                  f"{best[args.metric]:.4f}, {best['latency_ms_per_row']:.3f} ms/row")
+
+    report['seconds'] = time.perf_counter() - start
+    print(f"\nSearch done in {report['seconds']:.1f}s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=lambda value: value.item())
+        print(f"Settings for incident_classifier.py --params {args.output}: "
+              f"{json.dumps(report['best'])}")
+
+
+if __name__ == '__main__':
+    main()
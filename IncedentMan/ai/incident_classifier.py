@@ -1,38 +1,107 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.pipeline import Pipeline
 import joblib
 import nltk
+from batch_preprocessor import BatchPreprocessor, TokenNgrams
+from compact_forest import CompactForest
+from incident_data import concat_incidents, iter_incidents, read_incidents
 from nltk.tokenize import RegexpTokenizer
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
+import cProfile
+import multiprocessing
 import os
+import shutil
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 import json
 
+# NLTK resources used by preprocess_text and where nltk.data finds them
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet'
+}
+
+# Tokens kept by preprocess_text
+TOKEN_PATTERN = r'\w+'
+
+# Training data used when --data is not given; the order matters, it decides
+# which rows train() holds out as its test set
+DEFAULT_DATA_FILES = [
+    'data/software_incidents.csv',
+    'data/hardware_incidents.csv',
+    'data/security_incidents.csv',
+    'data/network_incidents.csv',
+    'data/database_incidents.csv'
+]
+
 class IncidentClassifier:
-    def __init__(self):
-        """Initialize the incident classifier with necessary NLP tools"""
-        # Download required NLTK resources
-        for resource in ['stopwords', 'wordnet', 'punkt']:
+    def __init__(self, text_cache_size=10000, lemma_cache_size=50000):
+        """
+        Initialize the incident classifier with necessary NLP tools
+
+        Args:
+            text_cache_size: int, number of preprocessed descriptions kept in an
+                       LRU cache (0 disables it)
+            lemma_cache_size: int, number of token lemmas kept in an LRU cache
+                       (0 disables it)
+        """
+        # Download required NLTK resources that are not installed yet, so a
+        # provisioned (or offline) machine never touches the network here
+        for resource, path in NLTK_RESOURCES.items():
             try:
-                nltk.download(resource, quiet=True)
-            except Exception as e:
-                print(f"Warning: Could not download {resource}: {str(e)}")
+                nltk.data.find(path)
+            except LookupError:
+                try:
+                    nltk.download(resource, quiet=True)
+                except Exception as e:
+                    print(f"Warning: Could not download {resource}: {str(e)}")
         
         # Initialize NLP tools
         self.lemmatizer = WordNetLemmatizer()
         self.stop_words = set(stopwords.words('english'))
-        self.tokenizer = RegexpTokenizer(r'\w+')
+        self.tokenizer = RegexpTokenizer(TOKEN_PATTERN)
+        
+        # Least-recently-used caches in front of the NLTK work; templated
+        # alerts repeat the same descriptions and tokens over and over
+        self._lemmatize = lru_cache(maxsize=max(lemma_cache_size, 0))(
+            self.lemmatizer.lemmatize)
+        self._preprocess_normalized = lru_cache(maxsize=max(text_cache_size, 0))(
+            self._preprocess_uncached)
+        
+        # Whole-list preprocessing with a token -> lemma table built while
+        # training and saved with the models
+        self.batch_preprocessor = BatchPreprocessor(
+            TOKEN_PATTERN, self.tokenizer.tokenize, self._lemmatize, self.stop_words)
         
         # Initialize model pipelines
         self.category_pipeline = None
         self.priority_pipeline = None
         
+        # Vectorizer / forest settings replacing the defaults of create_vectorizer
+        # and create_classifier, e.g. the best trial of hyperparameter_search:
+        # {'priority': {'vectorizer': {'min_df': 1}, 'classifier': {'max_depth': 30}}}
+        self.model_params = {}
+        
+        # Optional callable(call, timings) receiving the per-stage durations
+        # (milliseconds) of every predict / predict_batch call
+        self.stage_observer = None
+        
+        # Set by enable_profiling: training stages also record memory
+        self._profiling = None
+        
         # Initialize metadata storage
         self.metadata = {
             'training_date': None,
@@ -45,87 +114,173 @@ class IncidentClassifier:
         if pd.isna(text):
             return ""
         
-        # Convert to string and lowercase
-        text = str(text).lower()
+        # Convert to string and lowercase; whitespace is collapsed so that
+        # descriptions differing only in spacing share a cache entry
+        text = ' '.join(str(text).lower().split())
         
-        # Tokenize and lemmatize
+        return self._preprocess_normalized(text)
+
+    def _preprocess_uncached(self, text):
+        """Tokenize, filter and lemmatize an already lowercased description"""
         tokens = self.tokenizer.tokenize(text)
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens 
+        tokens = [self._lemmatize(token) for token in tokens 
                  if token not in self.stop_words and len(token) > 1]
         
         return ' '.join(tokens)
 
+    def cache_stats(self):
+        """Return hit/miss counters and sizes of the preprocessing caches"""
+        stats = {}
+        for name, cached in (('text', self._preprocess_normalized),
+                             ('lemma', self._lemmatize)):
+            info = cached.cache_info()
+            lookups = info.hits + info.misses
+            stats[name] = {
+                'hits': info.hits,
+                'misses': info.misses,
+                'hit_ratio': info.hits / lookups if lookups else 0.0,
+                'size': info.currsize,
+                'max_size': info.maxsize
+            }
+        return stats
+
+    def clear_caches(self):
+        """Empty the preprocessing caches and reset their counters"""
+        self._preprocess_normalized.cache_clear()
+        self._lemmatize.cache_clear()
+
+    def create_vectorizer(self, model_type='category'):
+        """
+        Create the TF-IDF vectorizer for a classification type
+
+        The 'shared' vectorizer feeds both classifiers; it uses the category
+        settings, whose 1-3-gram vocabulary covers the priority one. Input is
+        the output of preprocessing, which TokenNgrams only splits into
+        n-grams: there is no second tokenization or stop word pass. Settings
+        in model_params override the defaults below.
+        """
+        if model_type in ('category', 'shared'):
+            params = {
+                'max_features': 12000,
+                'ngram_range': (1, 3),
+                'min_df': 2,
+                'use_idf': True,
+                'sublinear_tf': True
+            }
+        else:  # priority vectorizer
+            params = {
+                'max_features': 10000,
+                'ngram_range': (1, 2),
+                'min_df': 2,
+                'use_idf': True
+            }
+        params.update(self._params_override(model_type, 'vectorizer'))
+        ngram_range = tuple(params.pop('ngram_range'))
+        return TfidfVectorizer(analyzer=TokenNgrams(ngram_range), **params)
+
+    def create_classifier(self, model_type='category'):
+        """Create the random forest for a classification type (model_params override)"""
+        if model_type == 'category':
+            params = {
+                'n_estimators': 200,
+                'max_depth': 25,
+                'min_samples_split': 5,
+                'min_samples_leaf': 2,
+                'random_state': 42,
+                'class_weight': 'balanced',
+                'n_jobs': -1
+            }
+        else:  # priority classifier
+            params = {
+                'n_estimators': 180,
+                'max_depth': 20,
+                'min_samples_split': 4,
+                'min_samples_leaf': 2,
+                'random_state': 42,
+                'class_weight': 'balanced',
+                'n_jobs': -1
+            }
+        params.update(self._params_override(model_type, 'classifier'))
+        return RandomForestClassifier(**params)
+
+    def _params_override(self, model_type, step):
+        """Settings of model_params for one step; the shared vectorizer uses category's"""
+        model_type = 'category' if model_type == 'shared' else model_type
+        return self.model_params.get(model_type, {}).get(step, {})
+
     def create_pipeline(self, model_type='category'):
         """Create ML pipeline based on classification type"""
-        if model_type == 'category':
-            return Pipeline([
-                ('tfidf', TfidfVectorizer(
-                    max_features=12000,
-                    ngram_range=(1, 3),
-                    stop_words='english',
-                    min_df=2,
-                    use_idf=True,
-                    sublinear_tf=True
-                )),
-                ('clf', RandomForestClassifier(
-                    n_estimators=200,
-                    max_depth=25,
-                    min_samples_split=5,
-                    min_samples_leaf=2,
-                    random_state=42,
-                    class_weight='balanced',
-                    n_jobs=-1
-                ))
-            ])
-        else:  # priority pipeline
-            return Pipeline([
-                ('tfidf', TfidfVectorizer(
-                    max_features=10000,
-                    ngram_range=(1, 2),
-                    stop_words='english',
-                    min_df=2,
-                    use_idf=True
-                )),
-                ('clf', RandomForestClassifier(
-                    n_estimators=180,
-                    max_depth=20,
-                    min_samples_split=4,
-                    min_samples_leaf=2,
-                    random_state=42,
-                    class_weight='balanced',
-                    n_jobs=-1
-                ))
-            ])
-
-    def train(self, data_files):
+        return Pipeline([
+            ('tfidf', self.create_vectorizer(model_type)),
+            ('clf', self.create_classifier(model_type))
+        ])
+
+    def create_hashing_vectorizer(self, n_features=2 ** 20):
+        """Create the stateless vectorizer used by streaming training"""
+        return HashingVectorizer(
+            n_features=n_features,
+            analyzer=TokenNgrams((1, 2)),
+            alternate_sign=False,
+            norm='l2'
+        )
+
+    def create_incremental_classifier(self, class_weight=None):
+        """Create a linear classifier that can learn with partial_fit"""
+        return SGDClassifier(
+            loss='log_loss',
+            alpha=1e-5,
+            class_weight=class_weight,
+            random_state=42
+        )
+
+    def train(self, data_files, shared_vectorizer=False, n_jobs=1, export_compact=False,
+              parallel=False, cpu_budget=None):
         """
         Train the incident classification models
         
         Args:
-            data_files: str or list of str, paths to CSV files containing incident data
-                       Each CSV should have columns: description, category, priority
+            data_files: str or list of str, paths to CSV, Parquet or Feather files
+                       containing incident data, with columns: description,
+                       category, priority
+            shared_vectorizer: bool, fit a single TF-IDF vectorizer feeding both
+                       classifiers and save both models as one artifact
+            n_jobs: int, worker processes used for text preprocessing
+                       (-1 uses all CPUs)
+            export_compact: bool, also export both forests to compact arrays
+                       (see export_compact)
+            parallel: bool, fit and evaluate the category and priority models
+                       at the same time in two worker processes (separate
+                       vectorizers only, see _train_parallel)
+            cpu_budget: int, cores shared by the two forests in parallel mode
+                       (default: all)
         """
+        if parallel and shared_vectorizer:
+            raise ValueError("parallel training needs separate vectorizers")
         try:
             # Create output directory
             os.makedirs('models', exist_ok=True)
+            self.metadata['training_timings'] = {}
             
             # Load and combine all data files
             print("Loading and combining data...")
             if isinstance(data_files, str):
                 data_files = [data_files]
             
-            dfs = []
-            for file in data_files:
-                if os.path.exists(file):
-                    df = pd.read_csv(file)
-                    dfs.append(df)
-                else:
-                    print(f"Warning: File not found: {file}")
-            
-            if not dfs:
-                raise ValueError("No valid data files found")
-            
-            df = pd.concat(dfs, ignore_index=True)
+            with self._timed_stage('load_data'):
+                dfs = []
+                for file in data_files:
+                    if os.path.exists(file):
+                        df = read_incidents(file)
+                        dfs.append(df)
+                    else:
+                        print(f"Warning: File not found: {file}")
+                
+                if not dfs:
+                    raise ValueError("No valid data files found")
+                
+                df = concat_incidents(dfs)
+            # Sampled by update() when new incidents lack a class
+            self.metadata['data_files'] = [file for file in data_files if os.path.exists(file)]
             
             # Save dataset statistics
             self.metadata['dataset_stats'] = {
@@ -136,7 +291,9 @@ class IncidentClassifier:
             
             # Preprocess text
             print("Preprocessing text data...")
-            df['processed_description'] = df['description'].apply(self.preprocess_text)
+            with self._timed_stage('preprocess'):
+                df['processed_description'] = self.preprocess_texts(
+                    df['description'].tolist(), n_jobs=n_jobs, learn=True)
             
             # Prepare data for training
             X = df['processed_description']
@@ -149,35 +306,743 @@ class IncidentClassifier:
                                test_size=0.2, random_state=42, stratify=y_category)
             
             # Train models
-            print("\nTraining category classifier...")
-            self.category_pipeline = self.create_pipeline('category')
-            self.category_pipeline.fit(X_train, y_train_cat)
-            
-            print("Training priority classifier...")
-            self.priority_pipeline = self.create_pipeline('priority')
-            self.priority_pipeline.fit(X_train, y_train_pri)
+            test_probs = None
+            if shared_vectorizer:
+                self._train_shared(X_train, y_train_cat, y_train_pri)
+            elif parallel:
+                test_probs = self._train_parallel(X_train, y_train_cat, y_train_pri,
+                                                  X_test, cpu_budget)
+            else:
+                # Same steps as Pipeline.fit, timed separately
+                print("\nTraining category classifier...")
+                self.category_pipeline = self.create_pipeline('category')
+                self._fit_pipeline(self.category_pipeline, 'category', X_train, y_train_cat)
+                
+                print("Training priority classifier...")
+                self.priority_pipeline = self.create_pipeline('priority')
+                self._fit_pipeline(self.priority_pipeline, 'priority', X_train, y_train_pri)
             
             # Evaluate models
             print("\nEvaluating models...")
-            self._evaluate_models(X_test, y_test_cat, y_test_pri)
+            with self._timed_stage('evaluate'):
+                self._evaluate_models(X_test, y_test_cat, y_test_pri, test_probs)
             
             # Save models and metadata
             print("\nSaving models...")
-            joblib.dump(self.category_pipeline, 'models/category_classifier.joblib')
-            joblib.dump(self.priority_pipeline, 'models/priority_classifier.joblib')
+            if self.model_params:
+                self.metadata['model_params'] = self.model_params
+            self.metadata['feature_mode'] = 'shared' if shared_vectorizer else 'separate'
+            with self._timed_stage('save'):
+                self.save_models('models')
+            
+            self.metadata['training_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if export_compact:
+                print("Exporting compact forests...")
+                with self._timed_stage('export_compact'):
+                    self.export_compact('models')
+            with replacing('models/model_metadata.json') as path, open(path, 'w') as f:
+                json.dump(self.metadata, f, indent=2)
+            
+            self._print_stage_table()
+            print("Training completed successfully!")
+            
+        except Exception as e:
+            print(f"An error occurred during training: {str(e)}")
+            raise
+
+    def train_streaming(self, data_files, chunk_size=50000, n_features=2 ** 20,
+                        epochs=1, n_jobs=1):
+        """
+        Train incremental models on data files too large to fit in memory
+        
+        The files are read in interleaved chunks, so memory stays bounded by
+        chunk_size rows per file whatever the total size (the lemma lookup
+        table is not grown either). Features come from a
+        stateless hashing vectorizer and both classifiers learn with
+        partial_fit. Every fifth row is held out for evaluation.
+        
+        Args:
+            data_files: str or list of str, paths to CSV, Parquet or Feather files
+                       containing incident data
+            chunk_size: int, rows read from each file per step
+            n_features: int, size of the hashed feature space
+            epochs: int, passes over the training rows
+            n_jobs: int, worker processes used for text preprocessing
+        """
+        try:
+            os.makedirs('models', exist_ok=True)
+            self.metadata['training_timings'] = {}
+            
+            if isinstance(data_files, str):
+                data_files = [data_files]
+            missing = [file for file in data_files if not os.path.exists(file)]
+            for file in missing:
+                print(f"Warning: File not found: {file}")
+            data_files = [file for file in data_files if file not in missing]
+            if not data_files:
+                raise ValueError("No valid data files found")
+            self.metadata['data_files'] = data_files
+            
+            # First pass over the label columns only: classes and class weights
+            print("Scanning labels...")
+            with self._timed_stage('scan_labels'):
+                category_counts = Counter()
+                priority_counts = Counter()
+                for chunk in self._iter_data_chunks(data_files, chunk_size,
+                                                   usecols=['category', 'priority']):
+                    category_counts.update(chunk['category'].tolist())
+                    priority_counts.update(chunk['priority'].tolist())
+            
+            total = sum(category_counts.values())
+            self.metadata['dataset_stats'] = {
+                'total_incidents': total,
+                'category_counts': {str(k): int(v) for k, v in category_counts.most_common()},
+                'priority_counts': {int(k): int(v) for k, v in priority_counts.most_common()}
+            }
+            category_classes = np.array(sorted(category_counts))
+            priority_classes = np.array(sorted(priority_counts))
+            
+            def balanced(counts):
+                return {label: total / (len(counts) * count) for label, count in counts.items()}
+            
+            vectorizer = self.create_hashing_vectorizer(n_features)
+            category_clf = self.create_incremental_classifier(balanced(category_counts))
+            priority_clf = self.create_incremental_classifier(balanced(priority_counts))
+            
+            print("Training incremental classifiers...")
+            with self._timed_stage('train_incremental'):
+                for epoch in range(epochs):
+                    for chunk in self._iter_data_chunks(data_files, chunk_size):
+                        train_rows = chunk[chunk.index % 5 != 0]
+                        # Files are interleaved, but rows within a chunk are still
+                        # grouped by file, which SGD is sensitive to
+                        train_rows = train_rows.sample(frac=1, random_state=epoch)
+                        # learn=False: the lemma table would grow with every
+                        # distinct token of the corpus (hostnames, ids...);
+                        # lemmas come from the bounded LRU cache instead
+                        features = vectorizer.transform(self.preprocess_texts(
+                            train_rows['description'].tolist(), n_jobs=n_jobs))
+                        category_clf.partial_fit(features, train_rows['category'],
+                                                 classes=category_classes)
+                        priority_clf.partial_fit(features, train_rows['priority'],
+                                                 classes=priority_classes)
+                    print(f"  Epoch {epoch + 1}/{epochs} done")
+            
+            self.category_pipeline = Pipeline([('hashing', vectorizer), ('clf', category_clf)])
+            self.priority_pipeline = Pipeline([('hashing', vectorizer), ('clf', priority_clf)])
+            
+            # Evaluate on the held-out rows, accumulating confusion matrices
+            print("\nEvaluating models...")
+            with self._timed_stage('evaluate'):
+                category_confusion = np.zeros((len(category_classes),) * 2, dtype=np.int64)
+                priority_confusion = np.zeros((len(priority_classes),) * 2, dtype=np.int64)
+                for chunk in self._iter_data_chunks(data_files, chunk_size):
+                    test_rows = chunk[chunk.index % 5 == 0]
+                    category_probs, priority_probs = self._predict_processed(
+                        self.preprocess_texts(test_rows['description'].tolist(), n_jobs=n_jobs))
+                    category_confusion += confusion_matrix(
+                        test_rows['category'], category_classes[category_probs.argmax(axis=1)],
+                        labels=category_classes)
+                    priority_confusion += confusion_matrix(
+                        test_rows['priority'], priority_classes[priority_probs.argmax(axis=1)],
+                        labels=priority_classes)
+                self.metadata['performance_metrics'] = {
+                    'category': _metrics_from_confusion(category_confusion),
+                    'priority': _metrics_from_confusion(priority_confusion)
+                }
+            print(json.dumps(self.metadata['performance_metrics'], indent=2))
+            
+            print("\nSaving models...")
+            self.metadata['feature_mode'] = 'hashing'
+            with self._timed_stage('save'):
+                self.save_models('models')
             
             self.metadata['training_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            with open('models/model_metadata.json', 'w') as f:
+            with replacing('models/model_metadata.json') as path, open(path, 'w') as f:
                 json.dump(self.metadata, f, indent=2)
             
+            self._print_stage_table()
             print("Training completed successfully!")
             
         except Exception as e:
             print(f"An error occurred during training: {str(e)}")
             raise
 
-    def _evaluate_models(self, X_test, y_test_cat, y_test_pri):
-        """Evaluate model performance and store metrics"""
+    def update(self, data_files, base_dir='models', output_dir=None, new_trees=None,
+               max_trees=None, n_jobs=1, export_compact=False, padding_files=None):
+        """
+        Update trained models with a batch of new incidents, without a full retrain
+        
+        The models in base_dir are loaded and kept: the fitted vectorizers
+        (vocabulary and IDF) only transform the new rows, so terms that never
+        appeared in the original corpus are ignored until the next full
+        train. Random forests grow by new_trees warm-started trees fitted on
+        80% of the batch; incremental (streaming) models run partial_fit on
+        it. The other 20% is used for evaluation; its metrics are stored as
+        update_metrics, performance_metrics keeps the full-corpus ones. The
+        result is written to a new version directory, base_dir is left
+        untouched.
+        
+        Args:
+            data_files: str or list of str, CSV, Parquet or Feather files with
+                       the new incidents
+            base_dir: str, directory of the models to update
+            output_dir: str, new version directory (default:
+                       model_versions/<timestamp>)
+            new_trees: int, trees added to each forest (default: 10% of its
+                       current size)
+            max_trees: int, drop the oldest trees beyond this many, so forests
+                       do not keep growing with every update (new_trees
+                       is capped at max_trees)
+            n_jobs: int, worker processes used for text preprocessing
+            export_compact: bool, also export both forests to compact arrays
+            padding_files: list of str, stored incidents sampled for the
+                       categories and priorities missing from the new ones
+                       (default: the data files the base models were trained
+                       on); see _pad_missing_classes
+        
+        Returns:
+            str, the version directory written
+        """
+        try:
+            if output_dir is None:
+                output_dir = os.path.join(
+                    'model_versions', datetime.now().strftime('%Y%m%d-%H%M%S'))
+            
+            print(f"Loading models from {base_dir}...")
+            base_metadata = self.load_models(base_dir)
+            self.metadata['training_timings'] = {}
+            self.metadata.pop('training_profile', None)
+            
+            print("Loading new incidents...")
+            if isinstance(data_files, str):
+                data_files = [data_files]
+            with self._timed_stage('load_data'):
+                dfs = [read_incidents(file) for file in data_files]
+                df = concat_incidents(dfs)
+            
+            print("Preprocessing text data...")
+            with self._timed_stage('preprocess'):
+                X = pd.Series(self.preprocess_texts(
+                    df['description'].tolist(), n_jobs=n_jobs, learn=True))
+            
+            # Stratify when every category has at least two rows
+            stratify = df['category'] if df['category'].value_counts().min() >= 2 else None
+            X_train, X_test, y_train_cat, y_test_cat, y_train_pri, y_test_pri = \
+                train_test_split(X, df['category'], df['priority'],
+                                 test_size=0.2, random_state=42, stratify=stratify)
+            if padding_files is None:
+                padding_files = base_metadata.get('data_files', [])
+            with self._timed_stage('pad_classes'):
+                X_train, y_train_cat, y_train_pri, padding_rows = self._pad_missing_classes(
+                    X_train, y_train_cat, y_train_pri, padding_files, n_jobs)
+            
+            # Label counts of the whole corpus so far, for the class weights
+            stats = self.metadata.get('dataset_stats', {})
+            for column in ('category', 'priority'):
+                counts = stats.setdefault(f'{column}_counts', {})
+                for label, count in df[column].value_counts().items():
+                    counts[str(label)] = counts.get(str(label), 0) + int(count)
+            stats['total_incidents'] = stats.get('total_incidents', 0) + len(df)
+            self.metadata['dataset_stats'] = stats
+            
+            print("Updating models...")
+            features = {}
+            for name, pipeline, y_train in (('category', self.category_pipeline, y_train_cat),
+                                            ('priority', self.priority_pipeline, y_train_pri)):
+                vectorizer = pipeline.steps[0][1]
+                if id(vectorizer) not in features:
+                    with self._timed_stage(f'{name}_vectorize'):
+                        features[id(vectorizer)] = vectorizer.transform(X_train)
+                with self._timed_stage(f'{name}_model_update'):
+                    self._update_classifier(pipeline.steps[-1][1], name,
+                                            features[id(vectorizer)], y_train,
+                                            stats[f'{name}_counts'], new_trees, max_trees)
+            
+            print("\nEvaluating models on the new incidents...")
+            with self._timed_stage('evaluate'):
+                self._evaluate_models(X_test, y_test_cat, y_test_pri, key='update_metrics')
+            
+            self.metadata.setdefault('update_history', []).append({
+                'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'base_dir': base_dir,
+                'base_training_date': base_metadata['training_date'],
+                'rows': len(df),
+                'padding_rows': padding_rows,
+                'performance_metrics': self.metadata['update_metrics']
+            })
+            
+            print(f"\nSaving models to {output_dir}...")
+            os.makedirs(output_dir, exist_ok=True)
+            with self._timed_stage('save'):
+                self.save_models(output_dir)
+            
+            self.metadata['training_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if export_compact:
+                print("Exporting compact forests...")
+                with self._timed_stage('export_compact'):
+                    self.export_compact(output_dir)
+            with replacing(os.path.join(output_dir, 'model_metadata.json')) as path, \
+                    open(path, 'w') as f:
+                json.dump(self.metadata, f, indent=2)
+            
+            self._print_stage_table()
+            print("Update completed successfully!")
+            return output_dir
+            
+        except Exception as e:
+            print(f"An error occurred during the update: {str(e)}")
+            raise
+
+    def _pad_missing_classes(self, X_train, y_train_cat, y_train_pri, padding_files, n_jobs):
+        """
+        Add stored rows of the classes a forest update would otherwise lack
+        
+        Warm-started trees are fitted on the training rows alone and the
+        forest takes its classes from them, so every category and priority
+        must be present. For each missing class, up to the batch's mean rows
+        per class are sampled from padding_files; the evaluation rows are
+        never padded. Without padding files, or without stored rows of a
+        class, the training rows are returned as they are and
+        _update_classifier refuses the update.
+        
+        Returns:
+            tuple, (X_train, y_train_cat, y_train_pri, number of rows added)
+        """
+        missing = {}
+        for column, pipeline, y_train in (('category', self.category_pipeline, y_train_cat),
+                                          ('priority', self.priority_pipeline, y_train_pri)):
+            classifier = pipeline.steps[-1][1]
+            if isinstance(classifier, RandomForestClassifier):
+                labels = set(classifier.classes_) - set(y_train)
+                if labels:
+                    missing[column] = labels
+        files = [file for file in padding_files if os.path.exists(file)]
+        if not missing or not files:
+            return X_train, y_train_cat, y_train_pri, 0
+        
+        stored = concat_incidents([read_incidents(file, ['description', 'category', 'priority'])
+                                   for file in files])
+        per_class = max(1, len(y_train_cat) // y_train_cat.nunique())
+        samples = []
+        for column, labels in missing.items():
+            for label in sorted(labels, key=str):
+                rows = stored[stored[column] == label]
+                samples.append(rows.sample(min(per_class, len(rows)), random_state=42))
+        padding = pd.concat(samples)
+        # A row sampled for a missing category can also carry a missing priority
+        padding = padding[~padding.index.duplicated()]
+        print(f"Padding the update with {len(padding)} stored rows of "
+              + ', '.join(f"{column} {sorted(map(str, labels))}"
+                          for column, labels in missing.items()))
+        
+        X_padding = self.preprocess_texts(padding['description'].tolist(), n_jobs=n_jobs,
+                                          learn=True)
+        return (pd.concat([X_train, pd.Series(X_padding)], ignore_index=True),
+                pd.concat([y_train_cat.astype(object),
+                           padding['category'].astype(object)], ignore_index=True),
+                pd.concat([y_train_pri, padding['priority']], ignore_index=True),
+                len(padding))
+
+    @staticmethod
+    def _update_classifier(classifier, name, features, y_train, class_counts,
+                           new_trees, max_trees):
+        """
+        Grow a forest with warm-started trees, or partial_fit an incremental model
+        
+        'balanced' class weights would be computed from the new rows alone;
+        the new trees get the weights of the whole corpus (class_counts,
+        label -> rows so far) instead.
+        """
+        unknown = set(y_train) - set(classifier.classes_)
+        if unknown:
+            raise ValueError(f"New {name} labels {sorted(map(str, unknown))} are not "
+                             "known to the model; retrain from scratch to add them")
+        
+        if isinstance(classifier, RandomForestClassifier):
+            # Warm-started trees are fitted on the new rows only, and the forest
+            # then takes its classes from them: every class must be present
+            # (update() pads the rows from the stored incidents when it can)
+            missing = set(classifier.classes_) - set(y_train)
+            if missing:
+                raise ValueError(f"The new incidents have no {name} "
+                                 f"{sorted(map(str, missing))}; a forest update needs "
+                                 "rows of every class (pass stored incidents with "
+                                 "--padding-data)")
+            if new_trees is None:
+                new_trees = max(1, len(classifier.estimators_) // 10)
+            if max_trees is not None:
+                if max_trees < 1:
+                    raise ValueError("max_trees must be at least 1")
+                new_trees = min(new_trees, max_trees)
+                # The oldest trees come first; keep <= 0 drops all of them
+                keep = max_trees - new_trees
+                classifier.estimators_ = classifier.estimators_[-keep:] if keep > 0 else []
+            class_weight = classifier.class_weight
+            if class_weight in ('balanced', 'balanced_subsample'):
+                total = sum(class_counts[str(label)] for label in classifier.classes_)
+                classifier.class_weight = {
+                    label: total / (len(classifier.classes_) * class_counts[str(label)])
+                    for label in classifier.classes_
+                }
+            classifier.set_params(warm_start=True,
+                                  n_estimators=len(classifier.estimators_) + new_trees)
+            try:
+                classifier.fit(features, y_train)
+            finally:
+                classifier.set_params(warm_start=False, class_weight=class_weight)
+            print(f"  {name}: +{new_trees} trees, {len(classifier.estimators_)} in total")
+        elif hasattr(classifier, 'partial_fit'):
+            classifier.partial_fit(features, y_train)
+            print(f"  {name}: partial_fit on {len(y_train)} rows")
+        else:
+            raise ValueError(f"Cannot update a {type(classifier).__name__} model")
+
+    @staticmethod
+    def _iter_data_chunks(data_files, chunk_size, usecols=None):
+        """
+        Yield chunks interleaved across data files
+        
+        Each step takes up to chunk_size rows from every file that still has
+        data. Chunks are indexed by a running row number that is identical on
+        every pass, so it can be used to pick held-out rows.
+        """
+        readers = [iter_incidents(file, chunk_size, columns=usecols) for file in data_files]
+        row_offset = 0
+        while readers:
+            parts = []
+            for reader in list(readers):
+                try:
+                    parts.append(next(reader))
+                except StopIteration:
+                    reader.close()
+                    readers.remove(reader)
+            if parts:
+                chunk = pd.concat(parts, ignore_index=True)
+                chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+                row_offset += len(chunk)
+                yield chunk
+
+    def enable_profiling(self, profile_dir=None):
+        """
+        Profile the training stages of the next train / train_streaming run
+
+        Besides wall time, each stage records the process's resident memory
+        at its start, its peak and its end in metadata['training_profile']
+        (sampled every 10 ms, Linux only; preprocessing workers are not
+        included). With profile_dir, a cProfile dump per stage is written
+        there as <stage>.prof.
+        """
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        self._profiling = {'dir': profile_dir}
+
+    @contextmanager
+    def _timed_stage(self, name):
+        """Record the wall time (and in profile mode, memory) of a training stage"""
+        sampler = profiler = None
+        if self._profiling is not None:
+            sampler = _RssSampler()
+            if self._profiling['dir']:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metadata['training_timings'][name] = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(os.path.join(self._profiling['dir'], f'{name}.prof'))
+            if sampler is not None:
+                self.metadata.setdefault('training_profile', {})[name] = sampler.stop()
+
+    def _fit_pipeline(self, pipeline, name, X_train, y_train):
+        """Fit a vectorizer + classifier pipeline as two timed stages"""
+        vectorizer = pipeline.steps[0][1]
+        classifier = pipeline.steps[-1][1]
+        with self._timed_stage(f'{name}_vectorizer_fit'):
+            features = vectorizer.fit_transform(X_train)
+        with self._timed_stage(f'{name}_forest_fit'):
+            classifier.fit(features, y_train)
+
+    def _print_stage_table(self):
+        """Print the wall time (and memory when profiled) of each training stage"""
+        profile = self.metadata.get('training_profile', {})
+        print("\nTraining time per stage:")
+        for stage, seconds in self.metadata['training_timings'].items():
+            line = f"  {stage:<24}{seconds:>10.2f}s"
+            memory = profile.get(stage)
+            if memory and memory['peak_rss_mib'] is not None:
+                line += (f"   peak {memory['peak_rss_mib']:>8.0f} MiB"
+                         f"   +{memory['peak_rss_mib'] - memory['start_rss_mib']:.0f} MiB")
+            print(line)
+
+    def preprocess_texts(self, texts, n_jobs=1, chunk_size=2000, learn=False):
+        """
+        Preprocess a list of descriptions, optionally across worker processes
+
+        Uses the batch preprocessor, whose output is identical to
+        preprocess_text for every description. With n_jobs > 1 the list is
+        split into chunks of chunk_size descriptions processed by worker
+        processes, and the results are returned in input order. With
+        learn=True the tokens seen are added to the lemma lookup table
+        (training).
+        """
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, -(-len(texts) // chunk_size))
+        if n_jobs <= 1:
+            return self.batch_preprocessor.transform(texts, update=learn)
+        
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_preprocess_worker,
+                                 initargs=(self.batch_preprocessor.table,)) as executor:
+            processed = []
+            for chunk_result, new_entries in executor.map(_preprocess_chunk, chunks):
+                processed.extend(chunk_result)
+                if learn:
+                    self.batch_preprocessor.table.update(new_entries)
+        return processed
+
+    def _train_shared(self, X_train, y_train_cat, y_train_pri):
+        """Fit one vectorizer and both forests on the same feature matrix"""
+        print("\nFitting shared vectorizer...")
+        with self._timed_stage('shared_vectorizer_fit'):
+            vectorizer = self.create_vectorizer('shared')
+            features = vectorizer.fit_transform(X_train)
+        
+        print("Training category classifier...")
+        with self._timed_stage('category_forest_fit'):
+            category_clf = self.create_classifier('category')
+            category_clf.fit(features, y_train_cat)
+        
+        print("Training priority classifier...")
+        with self._timed_stage('priority_forest_fit'):
+            priority_clf = self.create_classifier('priority')
+            priority_clf.fit(features, y_train_pri)
+        
+        # Both pipelines hold the same vectorizer object
+        self.category_pipeline = Pipeline([('tfidf', vectorizer), ('clf', category_clf)])
+        self.priority_pipeline = Pipeline([('tfidf', vectorizer), ('clf', priority_clf)])
+
+    def _train_parallel(self, X_train, y_train_cat, y_train_pri, X_test, cpu_budget=None):
+        """
+        Fit the category and priority pipelines concurrently in two processes
+
+        Each worker fits its vectorizer and forest and predicts the test rows,
+        so the single-threaded TF-IDF fits and test transforms of the two
+        models overlap. The forests share cpu_budget cores, split in
+        proportion to their number of trees, instead of each starting a
+        thread per core. Returns the test probabilities of both models.
+        
+        A budget below 2 cores cannot be shared by two processes: the models
+        are then trained one after the other on that core, and None is
+        returned (train evaluates them itself).
+        """
+        budget = max(1, cpu_budget or os.cpu_count() or 1)
+        pipelines = {name: self.create_pipeline(name) for name in ('category', 'priority')}
+        if budget < 2:
+            print(f"\nCPU budget of {budget} core: training the category and priority "
+                  "classifiers one after the other instead of in parallel...")
+            for (name, pipeline), y_train in zip(pipelines.items(), (y_train_cat, y_train_pri)):
+                classifier = pipeline.steps[-1][1]
+                classifier.n_jobs = budget
+                self._fit_pipeline(pipeline, name, X_train, y_train)
+                classifier.n_jobs = -1
+            self.category_pipeline = pipelines['category']
+            self.priority_pipeline = pipelines['priority']
+            self.metadata['parallel_training'] = {
+                'cpu_budget': budget,
+                'forest_jobs': {'category': budget, 'priority': budget},
+                'sequential': True
+            }
+            return None
+        
+        trees = {name: pipeline.steps[-1][1].n_estimators
+                 for name, pipeline in pipelines.items()}
+        # Each forest gets at least one core and together they get the budget
+        share = round(budget * trees['category'] / sum(trees.values()))
+        jobs = {'category': min(budget - 1, max(1, share))}
+        jobs['priority'] = budget - jobs['category']
+        
+        print(f"\nTraining category and priority classifiers in parallel "
+              f"({jobs['category']} + {jobs['priority']} of {budget} cores)...")
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=2, mp_context=worker_context()) as executor:
+            futures = {
+                name: executor.submit(_fit_and_predict, pipeline, X_train, y_train,
+                                      X_test, jobs[name])
+                for (name, pipeline), y_train in zip(pipelines.items(),
+                                                     (y_train_cat, y_train_pri))
+            }
+            results = {name: future.result() for name, future in futures.items()}
+        wall = time.perf_counter() - start
+        
+        model_seconds = {}
+        for name, (pipeline, _, timings) in results.items():
+            # Saved forests keep the default n_jobs; load_models can override it
+            pipeline.steps[-1][1].n_jobs = -1
+            for stage, seconds in timings.items():
+                self.metadata['training_timings'][f'{name}_{stage}'] = seconds
+            model_seconds[name] = sum(timings.values())
+        self.category_pipeline = results['category'][0]
+        self.priority_pipeline = results['priority'][0]
+        self.metadata['training_timings']['parallel_fit'] = wall
+        self.metadata['parallel_training'] = {
+            'cpu_budget': budget,
+            'forest_jobs': jobs,
+            'wall_seconds': wall,
+            'model_seconds': model_seconds
+        }
+        print(f"  category {model_seconds['category']:.2f}s, priority "
+              f"{model_seconds['priority']:.2f}s: {wall:.2f}s wall instead of "
+              f"{sum(model_seconds.values()):.2f}s one after the other")
+        return results['category'][1], results['priority'][1]
+
+    def save_models(self, models_dir='models'):
+        """
+        Save the trained pipelines to a models directory
+
+        Separate pipelines go to one file each; shared-vectorizer and
+        streaming pipelines are pickled together so the vectorizer is stored
+        once. Files are written uncompressed so that load_models can
+        memory-map their arrays, and each one replaces the previous file by a
+        rename (see replacing), so workers that mapped it are unaffected. The
+        preprocessing lemma table goes to lemma_table.json.
+        """
+        for pipeline in (self.category_pipeline, self.priority_pipeline):
+            # Terms dropped by min_df/max_features, kept only for introspection
+            # (scikit-learn < 1.7); they can outweigh the vocabulary itself
+            vectorizer = pipeline.steps[0][1]
+            if getattr(vectorizer, 'stop_words_', None) is not None:
+                vectorizer.stop_words_ = None
+        
+        if self.metadata.get('feature_mode', 'separate') != 'separate':
+            with replacing(os.path.join(models_dir, 'incident_classifier.joblib')) as path:
+                joblib.dump({
+                    'category_pipeline': self.category_pipeline,
+                    'priority_pipeline': self.priority_pipeline
+                }, path)
+        else:
+            with replacing(os.path.join(models_dir, 'category_classifier.joblib')) as path:
+                joblib.dump(self.category_pipeline, path)
+            with replacing(os.path.join(models_dir, 'priority_classifier.joblib')) as path:
+                joblib.dump(self.priority_pipeline, path)
+        
+        with replacing(os.path.join(models_dir, 'lemma_table.json')) as path, \
+                open(path, 'w') as f:
+            json.dump(self.batch_preprocessor.table, f)
+
+    def export_compact(self, models_dir='models'):
+        """
+        Flatten both random forests into compact arrays for fast inference
+
+        The arrays are written under models_dir/compact/<model>/ together
+        with the training date of the models they came from, so that
+        load_models can ignore an export left over from an older training.
+        Returns the CompactForest of each model.
+        """
+        forests = {}
+        for name, pipeline in (('category', self.category_pipeline),
+                               ('priority', self.priority_pipeline)):
+            forest = pipeline.steps[-1][1]
+            if not isinstance(forest, RandomForestClassifier):
+                raise ValueError(f"Cannot export {type(forest).__name__}: "
+                                 "only random forest models can be exported")
+            forests[name] = CompactForest.from_forest(forest)
+            forests[name].save(os.path.join(models_dir, 'compact', name))
+        
+        with replacing(os.path.join(models_dir, 'compact', 'export.json')) as path, \
+                open(path, 'w') as f:
+            json.dump({'training_date': self.metadata['training_date']}, f, indent=2)
+        return forests
+
+    def load_models(self, models_dir='models', mmap_mode=None, predict_n_jobs=None,
+                    compact=False):
+        """
+        Load trained pipelines and metadata from a models directory
+
+        Reads the two separate pipeline files or the single artifact written
+        by shared-vectorizer and streaming training, depending on how the
+        models were trained. With mmap_mode='r', numpy arrays kept as-is by
+        the estimators are memory-mapped read-only and shared through the
+        page cache by every process loading the same files. Tree nodes are
+        copied into scikit-learn's own buffers on load; to share those,
+        load before forking the worker processes.
+
+        predict_n_jobs overrides the forests' n_jobs at prediction time; a
+        server running several worker processes should use 1 so that each
+        request does not start a thread per core.
+
+        With compact=True the forests are replaced by their compact export
+        (see export_compact) when it matches the loaded models.
+        """
+        with open(os.path.join(models_dir, 'model_metadata.json'), 'r') as f:
+            self.metadata = json.load(f)
+        
+        if self.metadata.get('feature_mode', 'separate') != 'separate':
+            bundle = joblib.load(os.path.join(models_dir, 'incident_classifier.joblib'),
+                                 mmap_mode=mmap_mode)
+            self.category_pipeline = bundle['category_pipeline']
+            self.priority_pipeline = bundle['priority_pipeline']
+        else:
+            self.category_pipeline = joblib.load(
+                os.path.join(models_dir, 'category_classifier.joblib'), mmap_mode=mmap_mode)
+            self.priority_pipeline = joblib.load(
+                os.path.join(models_dir, 'priority_classifier.joblib'), mmap_mode=mmap_mode)
+        
+        # Models trained before the lookup table existed fall back to WordNet
+        try:
+            with open(os.path.join(models_dir, 'lemma_table.json'), 'r') as f:
+                self.batch_preprocessor.table = json.load(f)
+        except FileNotFoundError:
+            self.batch_preprocessor.table = {}
+        
+        if predict_n_jobs is not None:
+            for pipeline in (self.category_pipeline, self.priority_pipeline):
+                classifier = pipeline.steps[-1][1]
+                if hasattr(classifier, 'n_jobs'):
+                    classifier.n_jobs = predict_n_jobs
+        
+        if compact:
+            self._load_compact(models_dir, mmap_mode)
+        
+        return self.metadata
+
+    def _load_compact(self, models_dir, mmap_mode):
+        """Swap the forests for their compact export if it is up to date"""
+        compact_dir = os.path.join(models_dir, 'compact')
+        try:
+            with open(os.path.join(compact_dir, 'export.json'), 'r') as f:
+                exported = json.load(f)
+        except FileNotFoundError:
+            print("Warning: No compact export found, using the original forests")
+            return
+        if exported['training_date'] != self.metadata['training_date']:
+            print("Warning: Compact export is from an older training, "
+                  "using the original forests")
+            return
+        
+        # The vectorizer object is kept, so a shared one stays shared
+        self.category_pipeline = Pipeline([
+            self.category_pipeline.steps[0],
+            ('clf', CompactForest.load(os.path.join(compact_dir, 'category'), mmap_mode))
+        ])
+        self.priority_pipeline = Pipeline([
+            self.priority_pipeline.steps[0],
+            ('clf', CompactForest.load(os.path.join(compact_dir, 'priority'), mmap_mode))
+        ])
+
+    def _evaluate_models(self, X_test, y_test_cat, y_test_pri, probs=None,
+                         key='performance_metrics'):
+        """
+        Evaluate model performance and store metrics under metadata[key]
+
+        probs, the (category, priority) probabilities of X_test, skips the
+        predictions when they were already made (parallel training).
+        """
         def get_metrics(y_true, y_pred):
             report = classification_report(y_true, y_pred, output_dict=True)
             return {
@@ -187,11 +1052,12 @@ class IncidentClassifier:
             }
         
         # Evaluate each model
-        y_pred_cat = self.category_pipeline.predict(X_test)
-        y_pred_pri = self.priority_pipeline.predict(X_test)
+        category_probs, priority_probs = probs or self._predict_processed(X_test)
+        y_pred_cat = self.category_pipeline.classes_[category_probs.argmax(axis=1)]
+        y_pred_pri = self.priority_pipeline.classes_[priority_probs.argmax(axis=1)]
         
         # Store metrics
-        self.metadata['performance_metrics'] = {
+        self.metadata[key] = {
             'category': get_metrics(y_test_cat, y_pred_cat),
             'priority': get_metrics(y_test_pri, y_pred_pri)
         }
@@ -202,45 +1068,334 @@ class IncidentClassifier:
         print("\nPriority Classification Report:")
         print(classification_report(y_test_pri, y_pred_pri))
 
-    def predict(self, text):
-        """Make predictions for new incident descriptions"""
+    def predict(self, text, include_timings=False):
+        """
+        Make predictions for new incident descriptions
+
+        Each model vectorizes the text once and walks its forest once; the
+        predicted label is the argmax of predict_proba, exactly as the forest's
+        own predict would choose it. With include_timings=True the result also
+        carries a 'timings' dict of per-stage durations in milliseconds; the
+        same dict is passed to stage_observer when one is set.
+        """
         if not all([self.category_pipeline, self.priority_pipeline]):
             raise ValueError("Models not trained. Please train the models first.")
         
+        timings = {}
+        start = time.perf_counter()
         processed_text = self.preprocess_text(text)
+        timings['preprocess_ms'] = (time.perf_counter() - start) * 1000
         
-        # Get predictions and probabilities
-        category = self.category_pipeline.predict([processed_text])[0]
-        category_probs = self.category_pipeline.predict_proba([processed_text])[0]
-        priority = int(self.priority_pipeline.predict([processed_text])[0])
-        priority_probs = self.priority_pipeline.predict_proba([processed_text])[0]
-        
-        result = {
-            'category': category,
-            'category_confidence': {cat: float(prob) for cat, prob in 
-                                 zip(self.category_pipeline.classes_, category_probs)},
-            'priority': priority,
-            'priority_confidence': {str(pri): float(prob) for pri, prob in 
-                                 zip(self.priority_pipeline.classes_, priority_probs)},
-            'processed_text': processed_text
-        }
+        # Get probabilities; labels are derived from them
+        category_probs, priority_probs = self._predict_processed([processed_text], timings)
+        result = self._format_prediction(processed_text, category_probs[0], priority_probs[0])
+        
+        if include_timings or self.stage_observer is not None:
+            timings['total_ms'] = (time.perf_counter() - start) * 1000
+            if include_timings:
+                result['timings'] = timings
+            if self.stage_observer is not None:
+                self.stage_observer('predict', timings)
         
         return result
 
+    def predict_batch(self, texts):
+        """
+        Make predictions for a list of incident descriptions in one pass
+
+        Each model vectorizes the whole batch into a single sparse matrix and
+        runs its forest once. Results are returned in input order; an item
+        that cannot be processed gets an 'error' entry instead of a prediction.
+        """
+        if not all([self.category_pipeline, self.priority_pipeline]):
+            raise ValueError("Models not trained. Please train the models first.")
+
+        observer = self.stage_observer
+        timings = {} if observer is not None else None
+        start = time.perf_counter()
+        results = [None] * len(texts)
+        processed_texts = []
+        positions = []
+        for i, text in enumerate(texts):
+            try:
+                processed_texts.append(self.preprocess_text(text))
+                positions.append(i)
+            except Exception as e:
+                results[i] = {'error': f'Preprocessing error: {str(e)}'}
+
+        if not processed_texts:
+            return results
+        if observer is not None:
+            timings['preprocess_ms'] = (time.perf_counter() - start) * 1000
+
+        category_probs, priority_probs = self._predict_processed(processed_texts, timings)
+        for row, i in enumerate(positions):
+            results[i] = self._format_prediction(
+                processed_texts[row], category_probs[row], priority_probs[row])
+
+        if observer is not None:
+            timings['total_ms'] = (time.perf_counter() - start) * 1000
+            observer('predict_batch', timings)
+        return results
+
+    def _predict_processed(self, processed_texts, timings=None):
+        """
+        Return category and priority probabilities for preprocessed texts
+
+        When a timings dict is given, the vectorizer and forest durations of
+        each model are recorded in it (milliseconds). Pipelines trained with a
+        shared vectorizer transform the texts only once.
+        """
+        probs = []
+        features = None
+        last_vectorizer = None
+        for name, pipeline in (('category', self.category_pipeline),
+                               ('priority', self.priority_pipeline)):
+            start = time.perf_counter()
+            vectorizer = pipeline.steps[0][1]
+            if vectorizer is not last_vectorizer:
+                features = vectorizer.transform(processed_texts)
+                last_vectorizer = vectorizer
+            vectorized = time.perf_counter()
+            probs.append(pipeline.steps[-1][1].predict_proba(features))
+            if timings is not None:
+                timings[f'{name}_tfidf_ms'] = (vectorized - start) * 1000
+                timings[f'{name}_forest_ms'] = (time.perf_counter() - vectorized) * 1000
+        return probs[0], probs[1]
+
+    def _format_prediction(self, processed_text, category_probs, priority_probs):
+        """Build the prediction dict for one row of class probabilities"""
+        category_classes = self.category_pipeline.classes_
+        priority_classes = self.priority_pipeline.classes_
+        return {
+            'category': category_classes[category_probs.argmax()],
+            'category_confidence': {cat: float(prob) for cat, prob in
+                                 zip(category_classes, category_probs)},
+            'priority': int(priority_classes[priority_probs.argmax()]),
+            'priority_confidence': {str(pri): float(prob) for pri, prob in
+                                 zip(priority_classes, priority_probs)},
+            'processed_text': processed_text
+        }
+
+def _metrics_from_confusion(confusion):
+    """Compute accuracy and averaged F1 scores from a confusion matrix"""
+    true_positives = np.diag(confusion).astype(float)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    precision = np.divide(true_positives, predicted,
+                          out=np.zeros_like(true_positives), where=predicted > 0)
+    recall = np.divide(true_positives, support,
+                       out=np.zeros_like(true_positives), where=support > 0)
+    denominator = precision + recall
+    f1 = np.divide(2 * precision * recall, denominator,
+                   out=np.zeros_like(true_positives), where=denominator > 0)
+    total = support.sum()
+    return {
+        'accuracy': float(true_positives.sum() / total) if total else 0.0,
+        'macro_avg_f1': float(f1.mean()),
+        'weighted_avg_f1': float((f1 * support).sum() / total) if total else 0.0
+    }
+
+# Per-process classifier used by preprocess_texts workers
+_worker_classifier = None
+
+def _current_rss_mib():
+    """Resident memory of this process in MiB, or None where /proc is missing"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _RssSampler:
+    """Background thread tracking the peak resident memory until stopped"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_rss = self.peak_rss = _current_rss_mib()
+        self._done = threading.Event()
+        self._thread = None
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, _current_rss_mib())
+
+    def stop(self):
+        """Stop sampling and return start, peak and end memory in MiB"""
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+        end_rss = _current_rss_mib()
+        if end_rss is not None:
+            self.peak_rss = max(self.peak_rss, end_rss)
+        return {'start_rss_mib': self.start_rss, 'peak_rss_mib': self.peak_rss,
+                'end_rss_mib': end_rss}
+
+
+def worker_context():
+    """
+    Multiprocessing context for training worker pools
+
+    Forked workers start without re-importing pandas, scikit-learn and NLTK,
+    which costs seconds per worker when the default start method is spawn
+    (e.g. inside a spawned benchmark process). None where fork is missing.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+@contextmanager
+def replacing(path):
+    """
+    Write a file under a temporary name and rename it over path when done
+
+    A process that opened or memory-mapped the old file keeps reading it
+    intact, where rewriting it in place could change its arrays under it
+    (or SIGBUS it if the file shrinks). Yields the temporary path.
+    """
+    temp = path + '.tmp'
+    try:
+        yield temp
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    os.replace(temp, path)
+
+def promote_models(version_dir, models_dir='models'):
+    """
+    Copy a model version into the directory the API serves from
+
+    Each file is copied next to its target and renamed over it, so a server
+    that memory-maps the current files keeps reading intact ones, and
+    model_metadata.json goes last so that MODEL_WATCH_INTERVAL reloads only
+    once everything is in place.
+    """
+    metadata_file = None
+    for root, _, files in os.walk(version_dir):
+        target_root = os.path.join(models_dir, os.path.relpath(root, version_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            if root == version_dir and name == 'model_metadata.json':
+                metadata_file = name
+                continue
+            with replacing(os.path.join(target_root, name)) as path:
+                shutil.copy2(os.path.join(root, name), path)
+    if metadata_file is not None:
+        with replacing(os.path.join(models_dir, metadata_file)) as path:
+            shutil.copy2(os.path.join(version_dir, metadata_file), path)
+
+def _fit_and_predict(pipeline, X_train, y_train, X_test, n_jobs):
+    """
+    Fit a vectorizer + forest pipeline and predict the test rows (worker process)
+
+    Returns the fitted pipeline, the test probabilities and the seconds spent
+    in each stage.
+    """
+    vectorizer, classifier = pipeline.steps[0][1], pipeline.steps[-1][1]
+    classifier.n_jobs = n_jobs
+    timings = {}
+    start = time.perf_counter()
+    features = vectorizer.fit_transform(X_train)
+    timings['vectorizer_fit'] = time.perf_counter() - start
+    start = time.perf_counter()
+    classifier.fit(features, y_train)
+    timings['forest_fit'] = time.perf_counter() - start
+    start = time.perf_counter()
+    probs = classifier.predict_proba(vectorizer.transform(X_test))
+    timings['evaluate'] = time.perf_counter() - start
+    return pipeline, probs, timings
+
+def _init_preprocess_worker(lemma_table):
+    """Create the NLP tools once in each preprocessing worker process"""
+    global _worker_classifier
+    _worker_classifier = IncidentClassifier()
+    _worker_classifier.batch_preprocessor.table.update(lemma_table)
+
+def _preprocess_chunk(texts):
+    """
+    Preprocess one chunk of descriptions inside a worker process
+
+    Returns the processed texts and the lookup table entries the chunk added.
+    """
+    preprocessor = _worker_classifier.batch_preprocessor
+    known = len(preprocessor.table)
+    processed = preprocessor.transform(texts, update=True)
+    return processed, dict(islice(preprocessor.table.items(), known, None))
+
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Train the incident classifiers')
+    parser.add_argument('--shared-vectorizer', action='store_true',
+                        help='fit one TF-IDF vectorizer for both models')
+    parser.add_argument('--streaming', action='store_true',
+                        help='train incremental models reading the data files in chunks')
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help='rows read per file and step in streaming mode')
+    parser.add_argument('--export-compact', action='store_true',
+                        help='also export the forests to compact arrays for serving')
+    parser.add_argument('--preprocess-jobs', type=int, default=1,
+                        help='worker processes for text preprocessing (-1 for all CPUs)')
+    parser.add_argument('--profile', action='store_true',
+                        help='record peak memory per training stage')
+    parser.add_argument('--profile-dir',
+                        help='with --profile, write a cProfile dump per stage here')
+    parser.add_argument('--data', nargs='+',
+                        help='CSV, Parquet or Feather files (default: the five data/*.csv)')
+    parser.add_argument('--parallel', action='store_true',
+                        help='fit the category and priority models at the same time')
+    parser.add_argument('--cpu-budget', type=int,
+                        help='with --parallel, cores shared by both forests (default: all)')
+    parser.add_argument('--params',
+                        help='JSON of vectorizer/forest settings, e.g. the output of '
+                             'hyperparameter_search.py (its "best" entry is used)')
+    parser.add_argument('--update', action='store_true',
+                        help='update the models in --base with the --data incidents '
+                             'instead of training from scratch')
+    parser.add_argument('--base', default='models', help='models updated by --update')
+    parser.add_argument('--output', help='version directory written by --update '
+                                         '(default: model_versions/<timestamp>)')
+    parser.add_argument('--new-trees', type=int,
+                        help='trees added to each forest by --update (default: 10%%)')
+    parser.add_argument('--max-trees', type=int,
+                        help='with --update, drop the oldest trees beyond this many')
+    parser.add_argument('--padding-data', nargs='+',
+                        help='with --update, stored incidents sampled for classes the new '
+                             'ones lack (default: the base models\' training data)')
+    parser.add_argument('--promote', action='store_true',
+                        help='copy the updated version into models/ for the API')
+    args = parser.parse_args()
+    if args.update and not args.data:
+        parser.error('--update needs --data with the new incidents')
+    
     # Example usage
-    data_files = [
-        
-        'data/software_incidents.csv',
-        'data/hardware_incidents.csv',
-        'data/security_incidents.csv',
-        'data/network_incidents.csv',
-        'data/database_incidents.csv'
-        
-        
-        
-        
-    ]
+    data_files = args.data or DEFAULT_DATA_FILES
     
     classifier = IncidentClassifier()
-    classifier.train(data_files)
\ No newline at end of file
+    if args.params:
+        with open(args.params, 'r') as f:
+            params = json.load(f)
+        classifier.model_params = params.get('best', params)
+    if args.profile:
+        classifier.enable_profiling(args.profile_dir)
+    if args.update:
+        version_dir = classifier.update(args.data, base_dir=args.base, output_dir=args.output,
+                                        new_trees=args.new_trees, max_trees=args.max_trees,
+                                        n_jobs=args.preprocess_jobs,
+                                        export_compact=args.export_compact,
+                                        padding_files=args.padding_data)
+        if args.promote:
+            promote_models(version_dir, 'models')
+            print(f"Promoted {version_dir} to models/")
+    elif args.streaming:
+        classifier.train_streaming(data_files, chunk_size=args.chunk_size,
+                                   n_jobs=args.preprocess_jobs)
+    else:
+        classifier.train(data_files, shared_vectorizer=args.shared_vectorizer,
+                         n_jobs=args.preprocess_jobs, export_compact=args.export_compact,
+                         parallel=args.parallel, cpu_budget=args.cpu_budget)
\ No newline at end of file
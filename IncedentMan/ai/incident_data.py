@@ -0,0 +1,171 @@
+"""
+Reading and writing incident datasets as CSV, Parquet or Feather.
+
+The format is chosen by file extension (.csv, .parquet, .feather). The
+columnar formats store category and subcategory as dictionary-encoded
+(categorical) columns and priority as int8, so a multi-million-row corpus
+loads in a fraction of the time and memory of re-parsing CSV text. Large
+files are read and written in chunks.
+
+To convert existing CSVs (written next to them unless --output-dir is set):
+
+    python incident_data.py data/*.csv --format parquet --benchmark
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.feather': 'feather'}
+
+# Columns stored as categoricals / small integers in every format
+CATEGORICAL_COLUMNS = ('category', 'subcategory')
+INTEGER_COLUMNS = {'priority': 'int8'}
+
+
+def file_format(path):
+    """'csv', 'parquet' or 'feather' from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported data file {path}; use one of {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+
+def compact_dtypes(df):
+    """Cast label columns to categoricals and priority to int8, in place"""
+    for column in CATEGORICAL_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in df:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def read_incidents(path, columns=None):
+    """Read a whole dataset file into a DataFrame with compact dtypes"""
+    kind = file_format(path)
+    if kind == 'parquet':
+        df = pd.read_parquet(path, columns=columns)
+    elif kind == 'feather':
+        df = pd.read_feather(path, columns=columns)
+    else:
+        dtypes = {column: 'category' for column in CATEGORICAL_COLUMNS}
+        df = pd.read_csv(path, usecols=columns, dtype=dtypes)
+    return compact_dtypes(df)
+
+
+def concat_incidents(dfs):
+    """Concatenate datasets, keeping label columns categorical across files"""
+    for column in CATEGORICAL_COLUMNS:
+        if all(column in df for df in dfs):
+            categories = union_categoricals([df[column] for df in dfs]).categories
+            for df in dfs:
+                df[column] = df[column].cat.set_categories(categories)
+    return pd.concat(dfs, ignore_index=True)
+
+
+def iter_incidents(path, chunk_size, columns=None):
+    """Yield a dataset file as DataFrames of at most chunk_size rows"""
+    kind = file_format(path)
+    if kind == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if kind == 'parquet':
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns)
+    else:
+        # Memory-mapped, so only the rows of the current batch are materialized
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        batches = table.to_batches(max_chunksize=chunk_size)
+    for batch in batches:
+        yield batch.to_pandas()
+
+
+def write_incidents(chunks, path):
+    """
+    Write an iterable of DataFrames to one file, chunk by chunk
+
+    Every chunk must have the same columns. Returns the number of rows.
+    """
+    kind = file_format(path)
+    rows = 0
+    if kind == 'csv':
+        with open(path, 'w', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False)
+                rows += len(chunk)
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(compact_dtypes(chunk), preserve_index=False)
+            if schema is None:
+                # Chunks may see different label sets: use one index width for all
+                schema = pa.schema([
+                    field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+                    if pa.types.is_dictionary(field.type) else field
+                    for field in table.schema
+                ]).remove_metadata()
+                writer = (pq.ParquetWriter(path, schema) if kind == 'parquet'
+                          else pa.ipc.new_file(path, schema))
+            table = table.cast(schema)
+            if kind == 'parquet':
+                writer.write_table(table)
+            else:
+                writer.write(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert incident datasets between formats')
+    parser.add_argument('files', nargs='+', help='input files (.csv, .parquet or .feather)')
+    parser.add_argument('--format', choices=['parquet', 'feather', 'csv'], default='parquet')
+    parser.add_argument('--output-dir', help='default: next to each input file')
+    parser.add_argument('--chunk-size', type=int, default=500000,
+                        help='rows converted at a time')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='compare full read time and memory of input and output')
+    args = parser.parse_args()
+
+    for source in args.files:
+        directory = args.output_dir or os.path.dirname(source)
+        os.makedirs(directory or '.', exist_ok=True)
+        name = os.path.splitext(os.path.basename(source))[0]
+        target = os.path.join(directory, f'{name}.{args.format}')
+        if os.path.abspath(target) == os.path.abspath(source):
+            print(f"Skipping {source}: already {args.format}")
+            continue
+
+        start = time.perf_counter()
+        rows = write_incidents(iter_incidents(source, args.chunk_size), target)
+        print(f"{source} -> {target}: {rows} rows in {time.perf_counter() - start:.1f}s, "
+              f"{os.path.getsize(source) / 2 ** 20:.1f} MiB -> "
+              f"{os.path.getsize(target) / 2 ** 20:.1f} MiB")
+
+        if args.benchmark:
+            for path in (source, target):
+                start = time.perf_counter()
+                df = read_incidents(path)
+                seconds = time.perf_counter() - start
+                print(f"  read {path}: {seconds:.2f}s, "
+                      f"{df.memory_usage(deep=True).sum() / 2 ** 20:.1f} MiB in memory")
+
+
+if __name__ == '__main__':
+    main()
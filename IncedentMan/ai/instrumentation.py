@@ -0,0 +1,265 @@
+"""
+Request and inference metrics in the Prometheus text exposition format.
+
+Counters and latency histograms are kept in process memory and rendered on
+demand, so no client library or push gateway is needed. Each metric is
+registered once with its help text and label names; values are then added
+per label combination:
+
+    metrics = Metrics()
+    metrics.register_histogram('stage_seconds', 'Time per stage', ('stage',))
+    with metrics.timer('stage_seconds', stage='preprocess'):
+        ...
+    print(metrics.render())
+
+Values are per process. When a server runs several worker processes, give
+them one shared multiprocess_dir: each process writes its values there
+(metrics-<pid>-<id>.json, every flush_interval seconds and at exit) and
+render() adds up the files of all processes, so every scrape sees the same
+monotonic totals whichever worker answers it. The server must call
+mark_process_dead() when a worker exits (gunicorn's child_exit hook, see
+serve.py); it folds the worker's last values into archive.json so counters
+never go backwards, and removes its files.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from sub-millisecond preprocessing to slow forests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered as Prometheus text"""
+
+    def __init__(self, prefix='', multiprocess_dir=None, flush_interval=1.0):
+        """
+        Args:
+            prefix: str, prepended to every metric name
+            multiprocess_dir: str, directory shared by the worker processes of
+                       one server, or None to render this process only
+            flush_interval: float, seconds between writes of this process's
+                       values to multiprocess_dir
+        """
+        self.prefix = prefix
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._metrics = {}
+        # Process whose values are held, and its file in multiprocess_dir
+        self._pid = None
+        self._path = None
+
+    def register_counter(self, name, help_text, labels=()):
+        """Declare a counter; its values start at zero per label set"""
+        self._register(name, 'counter', help_text, labels)
+
+    def register_histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        """Declare a histogram with the given bucket upper bounds (seconds)"""
+        self._register(name, 'histogram', help_text, labels, tuple(sorted(buckets)))
+
+    def _register(self, name, kind, help_text, labels, buckets=None):
+        self._metrics[name] = {
+            'kind': kind,
+            'help': help_text,
+            'labels': tuple(labels),
+            'buckets': buckets,
+            'values': {}
+        }
+
+    def inc(self, name, amount=1, **labels):
+        """Add amount to a counter"""
+        if self.multiprocess_dir and self._pid != os.getpid():
+            self._start_process()
+        metric = self._metrics[name]
+        key = tuple(str(labels[label]) for label in metric['labels'])
+        with self._lock:
+            metric['values'][key] = metric['values'].get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram"""
+        if self.multiprocess_dir and self._pid != os.getpid():
+            self._start_process()
+        metric = self._metrics[name]
+        key = tuple(str(labels[label]) for label in metric['labels'])
+        # Index of the first bucket holding the value; the last one is +Inf
+        bucket = bisect_left(metric['buckets'], seconds)
+        with self._lock:
+            values = metric['values'].get(key)
+            if values is None:
+                values = metric['values'][key] = [[0] * (len(metric['buckets']) + 1), 0.0, 0]
+            values[0][bucket] += 1
+            values[1] += seconds
+            values[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with-block in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _start_process(self):
+        """Start writing this process's values to multiprocess_dir"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Values inherited from the parent process are the parent's
+            for metric in self._metrics.values():
+                metric['values'] = {}
+            self._pid = os.getpid()
+            self._path = os.path.join(self.multiprocess_dir,
+                                      f'metrics-{self._pid}-{time.time_ns()}.json')
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self):
+        pid = self._pid
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to its file in multiprocess_dir"""
+        if not self.multiprocess_dir or self._pid != os.getpid():
+            return
+        with self._lock:
+            snapshot = {name: [[list(key), value] for key, value in metric['values'].items()]
+                        for name, metric in self._metrics.items()}
+        _write_json(self._path, {'metrics': snapshot})
+
+    def _collect(self):
+        """Values of every metric, added up over all processes in multiprocess_dir"""
+        if self._pid != os.getpid():
+            self._start_process()
+        self.flush()
+        # An exited worker's file can be folded into the archive while the
+        # files are read: start over with the new archive then
+        for _ in range(5):
+            files = glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json'))
+            archive = _read_json(os.path.join(self.multiprocess_dir, 'archive.json')) or {}
+            merged = set(archive.get('merged', []))
+            totals = {name: {} for name in self._metrics}
+            _add_values(totals, self._metrics, archive.get('metrics', {}))
+            try:
+                for file in files:
+                    if os.path.basename(file) not in merged:
+                        with open(file) as f:
+                            _add_values(totals, self._metrics, json.load(f)['metrics'])
+            except FileNotFoundError:
+                continue
+            return totals
+        raise RuntimeError(f"Metrics in {self.multiprocess_dir} kept changing while read")
+
+    def render(self):
+        """Return every metric in the Prometheus text format"""
+        lines = []
+        collected = self._collect() if self.multiprocess_dir else None
+        with self._lock:
+            for name, metric in self._metrics.items():
+                full_name = self.prefix + name
+                lines.append(f"# HELP {full_name} {metric['help']}")
+                lines.append(f"# TYPE {full_name} {metric['kind']}")
+                values = metric['values'] if collected is None else collected[name]
+                for key, value in sorted(values.items()):
+                    labels = list(zip(metric['labels'], key))
+                    if metric['kind'] == 'counter':
+                        lines.append(f"{full_name}{_format_labels(labels)} {value}")
+                        continue
+                    bucket_counts, total, count = value
+                    cumulative = 0
+                    bounds = [repr(float(bound)) for bound in metric['buckets']] + ['+Inf']
+                    for bound, bucket_count in zip(bounds, bucket_counts):
+                        cumulative += bucket_count
+                        lines.append(f"{full_name}_bucket"
+                                     f"{_format_labels(labels + [('le', bound)])} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {total}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def mark_process_dead(pid, multiprocess_dir):
+    """
+    Fold the metric files of an exited process into archive.json
+
+    The archive lists the files it already holds, so a render that still
+    sees one of them does not count it twice; they are removed afterwards.
+    """
+    files = glob.glob(os.path.join(multiprocess_dir, f'metrics-{pid}-*.json'))
+    if not files:
+        return
+    archive_path = os.path.join(multiprocess_dir, 'archive.json')
+    archive = _read_json(archive_path) or {'metrics': {}, 'merged': []}
+    totals = {}
+    for values in [archive['metrics']] + [_read_json(file)['metrics'] for file in files]:
+        for name, entries in values.items():
+            metric = totals.setdefault(name, {})
+            for key, value in entries:
+                _add_value(metric, tuple(key), value)
+    names = [os.path.basename(file) for file in files]
+    # Entries of files removed by an earlier call are no longer needed
+    merged = [name for name in archive['merged']
+              if os.path.exists(os.path.join(multiprocess_dir, name))]
+    _write_json(archive_path, {
+        'metrics': {name: [[list(key), value] for key, value in metric.items()]
+                    for name, metric in totals.items()},
+        'merged': merged + names
+    })
+    for file in files:
+        os.remove(file)
+
+
+def _add_values(totals, metrics, values):
+    """Add serialized values (name -> [[key, value], ...]) into totals"""
+    for name, entries in values.items():
+        if name in metrics:
+            for key, value in entries:
+                _add_value(totals[name], tuple(key), value)
+
+
+def _add_value(values, key, value):
+    """Add one counter value or histogram [buckets, sum, count] into values"""
+    current = values.get(key)
+    if current is None:
+        values[key] = value if not isinstance(value, list) else [list(value[0]), value[1], value[2]]
+    elif isinstance(value, list):
+        current[0] = [a + b for a, b in zip(current[0], value[0])]
+        current[1] += value[1]
+        current[2] += value[2]
+    else:
+        values[key] = current + value
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(path, data):
+    """Write under a temporary name and rename, so readers never see half a file"""
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp, path)
+
+
+def _format_labels(labels):
+    """Render label pairs as {name="value",...}, escaping the values"""
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
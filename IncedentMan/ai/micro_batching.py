@@ -0,0 +1,128 @@
+"""
+Dynamic micro-batching for single-description predictions.
+
+Concurrent callers submit one description each; a background thread groups
+them and calls the classifier's batch prediction once per group, so the
+TF-IDF transform and the forest traversal are shared by the whole group.
+A group is flushed when it reaches max_batch_size or when its oldest item
+has waited max_wait_ms.
+
+Every description is submitted with the model that must predict it, taken
+once when its request arrived: descriptions queued around a model reload
+are predicted by the model the rest of their request used, in one call per
+model.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=5.0):
+        """
+        Args:
+            predict_batch: callable taking a model (as passed to submit) and
+                       a list of descriptions, and returning one result per
+                       description, in order
+            max_batch_size: int, largest number of descriptions per call
+            max_wait_ms: float, longest time the first queued description
+                       waits for others before its group is flushed
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        # Batch-size histogram buckets: powers of two up to max_batch_size
+        self._buckets = []
+        bound = 1
+        while bound < max_batch_size:
+            self._buckets.append(bound)
+            bound *= 2
+        self._buckets.append(max_batch_size)
+        self._histogram = [0] * len(self._buckets)
+        self._batches = 0
+        self._items = 0
+
+    def submit(self, text, model=None):
+        """Queue a description for model and return a Future for its prediction"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, model, future))
+        return future
+
+    def predict(self, text, model=None, timeout=None):
+        """Queue a description for model and wait for its prediction"""
+        return self.submit(text, model).result(timeout)
+
+    def stats(self):
+        """Return queue depth and batch-size counters"""
+        with self._lock:
+            batches, items = self._batches, self._items
+            # Batches of size in (previous bound, le]
+            histogram = [{'le': bound, 'count': count}
+                         for bound, count in zip(self._buckets, self._histogram)]
+        return {
+            'queue_depth': self._queue.qsize(),
+            'batches': batches,
+            'items': items,
+            'mean_batch_size': items / batches if batches else 0.0,
+            'batch_size_histogram': histogram,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+    def _ensure_worker(self):
+        """Start the flushing thread, again in a process forked after startup"""
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _run(self):
+        """Collect queued descriptions into batches and predict them"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    # Drain what is already queued even once the wait is over
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # One prediction per model; only a reload mixes models in a batch
+            groups = {}
+            for text, model, future in batch:
+                groups.setdefault(id(model), (model, []))[1].append((text, future))
+            for model, items in groups.values():
+                self._flush(model, items)
+
+    def _flush(self, model, batch):
+        """Run one batch prediction and resolve its futures"""
+        texts = [text for text, _ in batch]
+        try:
+            results = self.predict_batch(model, texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            for i, bound in enumerate(self._buckets):
+                if len(batch) <= bound:
+                    self._histogram[i] += 1
+                    break
@@ -0,0 +1,86 @@
+"""
+Time-limited LRU cache for API predictions.
+
+Monitoring systems re-send the same alert text every few minutes; caching
+the prediction for a normalized description skips the whole pipeline for
+those repeats. Keys include the model's training date, so predictions from
+a previous model are never served after new models are loaded.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    def __init__(self, max_size=10000, ttl_seconds=300):
+        """
+        Args:
+            max_size: int, number of predictions kept; the least recently
+                       used one is evicted first
+            ttl_seconds: float, age after which an entry is no longer served
+        """
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(description, model_version):
+        """
+        Cache key for a description under a given model version
+
+        Returns None for anything but a string: None or a number would share
+        the key of its text ("None", "nan"...) but is preprocessed differently,
+        so those requests are not cached.
+        """
+        if not isinstance(description, str):
+            return None
+        return (' '.join(description.lower().split()), model_version)
+
+    def get(self, key):
+        """Return the cached prediction for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store a prediction, evicting the least recently used if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after new models are loaded"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl
+            }
@@ -0,0 +1,142 @@
+"""
+Production entry point for the incident classification API.
+
+Runs app.py under gunicorn with pre-forked worker processes. By default the
+models are loaded once in the master before forking, so the workers share
+the forests' memory copy-on-write. Every option can be set on the command
+line or through the environment variable named in its help text:
+
+    python serve.py --workers 4 --threads 2 --port 5000
+
+Workers are always gunicorn's gthread class, even with one thread: the sync
+worker closes every connection after one response and ignores --keepalive.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+
+from instrumentation import mark_process_dead
+
+
+class IncidentAPIServer(BaseApplication):
+    """Gunicorn application serving the Flask app from app.py"""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import app
+        return app
+
+
+def parse_args():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description='Serve the incident classification API')
+    parser.add_argument('--host', default=env('HOST', '0.0.0.0'),
+                        help='bind address (HOST)')
+    parser.add_argument('--port', type=int, default=int(env('PORT', 5000)),
+                        help='bind port (PORT)')
+    parser.add_argument('--workers', type=int,
+                        default=int(env('WEB_WORKERS', os.cpu_count() or 1)),
+                        help='worker processes (WEB_WORKERS, default: CPU count)')
+    parser.add_argument('--threads', type=int, default=int(env('WEB_THREADS', 1)),
+                        help='threads per worker (WEB_THREADS)')
+    parser.add_argument('--keepalive', type=int, default=int(env('WEB_KEEPALIVE', 5)),
+                        help='seconds to hold idle keep-alive connections (WEB_KEEPALIVE)')
+    parser.add_argument('--timeout', type=int, default=int(env('WEB_TIMEOUT', 60)),
+                        help='seconds before a silent worker is restarted (WEB_TIMEOUT)')
+    parser.add_argument('--graceful-timeout', type=int,
+                        default=int(env('WEB_GRACEFUL_TIMEOUT', 30)),
+                        help='seconds to finish in-flight requests on shutdown '
+                             '(WEB_GRACEFUL_TIMEOUT)')
+    parser.add_argument('--max-requests', type=int, default=int(env('WEB_MAX_REQUESTS', 0)),
+                        help='restart a worker after this many requests, 0 to never '
+                             '(WEB_MAX_REQUESTS)')
+    return parser.parse_args()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def main():
+    args = parse_args()
+
+    # Models must be fully loaded in the master before it forks; a loading
+    # thread would not survive the fork
+    os.environ['MODEL_LOADING'] = 'eager'
+    # The master only loads; reload watchers run in the workers (post_fork)
+    os.environ['SERVE_PRELOAD'] = '1'
+    # Workers already use every core; one forest thread per request avoids
+    # oversubscribing the CPUs
+    os.environ.setdefault('PREDICT_N_JOBS', '1')
+    # Lets POST /admin/reload reach every worker, not just the one serving it
+    reload_marker = os.environ.setdefault(
+        'RELOAD_MARKER', os.path.join(tempfile.gettempdir(), f'incident-api-reload-{os.getpid()}'))
+    # With INSTRUMENTATION=1 the workers add their metrics up in one
+    # directory, so every scrape sees the totals of the whole server
+    metrics_dir = temporary_metrics_dir = None
+    if os.environ.get('INSTRUMENTATION') == '1':
+        metrics_dir = os.environ.get('METRICS_MULTIPROC_DIR')
+        if metrics_dir:
+            # Values of a previous run would be added to this one
+            os.makedirs(metrics_dir, exist_ok=True)
+            for name in ('metrics-*.json', 'archive.json'):
+                for path in glob.glob(os.path.join(metrics_dir, name)):
+                    os.remove(path)
+        else:
+            metrics_dir = temporary_metrics_dir = tempfile.mkdtemp(prefix='incident-api-metrics-')
+            os.environ['METRICS_MULTIPROC_DIR'] = metrics_dir
+
+    def post_fork(server, worker):
+        from app import start_watchers
+        start_watchers()
+
+    def child_exit(server, worker):
+        if metrics_dir:
+            mark_process_dead(worker.pid, metrics_dir)
+
+    def on_exit(server):
+        _remove(reload_marker)
+        if temporary_metrics_dir:
+            shutil.rmtree(temporary_metrics_dir, ignore_errors=True)
+
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        # sync workers ignore keepalive; gthread keeps connections open even
+        # with a single thread
+        'worker_class': 'gthread',
+        'keepalive': args.keepalive,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+        'preload_app': True,
+        'accesslog': '-',
+        'post_fork': post_fork,
+        'child_exit': child_exit,
+        'on_exit': on_exit,
+    }
+    # Reported on /health so benchmarks can record what they measured
+    os.environ['SERVE_CONFIG'] = json.dumps({
+        key: options[key] for key in ('worker_class', 'workers', 'threads', 'keepalive')})
+    IncidentAPIServer(options).run()
+
+
+if __name__ == '__main__':
+    main()
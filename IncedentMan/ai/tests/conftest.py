@@ -0,0 +1,29 @@
+"""Shared test setup: modules of the ai/ directory and NLTK corpora"""
+import os
+import sys
+
+import nltk
+import pytest
+from nltk.stem import WordNetLemmatizer
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_DIR)
+
+from incident_classifier import NLTK_RESOURCES
+
+
+def _nltk_available():
+    try:
+        for path in NLTK_RESOURCES.values():
+            nltk.data.find(path)
+        WordNetLemmatizer().lemmatize('tickets')
+    except (LookupError, OSError):
+        return False
+    return True
+
+
+@pytest.fixture(scope='session')
+def nltk_corpora():
+    """Skip tests that preprocess text when the NLTK corpora are missing"""
+    if not _nltk_available():
+        pytest.skip('NLTK stopwords/wordnet not installed')
@@ -0,0 +1,56 @@
+"""
+Tests for the compact forest engine (compact_forest.CompactForest)
+
+    python -m pytest tests
+"""
+import tracemalloc
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestClassifier
+
+from compact_forest import CompactForest
+
+
+def _sparse_data(n_rows=600, n_features=100000, seed=0):
+    """TF-IDF-like matrix: a wide vocabulary, a few non-zeros per row"""
+    rng = np.random.default_rng(seed)
+    X = sp.random(n_rows, n_features, density=20 / n_features, format='csr',
+                  random_state=seed, dtype=np.float64)
+    y = np.where(X[:, :5000].sum(axis=1).A1 > X[:, 5000:10000].sum(axis=1).A1, 'a', 'b')
+    y[rng.random(n_rows) < 0.1] = 'c'
+    return X, y
+
+
+def test_predict_proba_matches_sklearn_on_sparse_input():
+    X, y = _sparse_data()
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    compact = CompactForest.from_forest(forest)
+
+    np.testing.assert_allclose(compact.predict_proba(X), forest.predict_proba(X), atol=1e-9)
+    np.testing.assert_allclose(compact.predict_proba(X.toarray()), forest.predict_proba(X),
+                               atol=1e-9)
+    assert list(compact.predict(X)) == list(forest.predict(X))
+
+
+def test_predict_proba_does_not_densify_the_vocabulary(tmp_path):
+    X, y = _sparse_data()
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    forest_dir = tmp_path / 'forest'
+    CompactForest.from_forest(forest).save(forest_dir)
+    compact = CompactForest.load(forest_dir, mmap_mode='r')
+    columns, _ = compact.split_columns()
+    assert len(columns) < X.shape[1] // 10
+
+    chunk_size = 256
+    tracemalloc.start()
+    compact.predict_proba(X, chunk_size=chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Gathered chunks dominate (the previous one is still alive while the next
+    # is built); one chunk densified over the whole vocabulary would take
+    # dense_chunk bytes
+    gathered_chunk = chunk_size * len(columns) * 4
+    dense_chunk = chunk_size * X.shape[1] * 4
+    assert peak < 2.5 * gathered_chunk
+    assert peak < dense_chunk / 10
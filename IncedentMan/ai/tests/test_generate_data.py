@@ -0,0 +1,50 @@
+"""
+Tests for the sharded data generator (dataGenerating/generate_data.py)
+
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'dataGenerating'))
+
+import generate_data
+from incident_data import read_incidents
+
+
+def test_plan_shards_skips_zero_row_categories(tmp_path):
+    tasks = generate_data.plan_shards({'network': 0, 'security': 3}, 2, str(tmp_path), 1)
+    assert [(category, rows) for category, _, rows, _ in tasks] == [('security', 2),
+                                                                      ('security', 1)]
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'parquet', 'feather'])
+def test_zero_row_category_writes_no_file(file_format, tmp_path, monkeypatch):
+    if file_format != 'csv':
+        pytest.importorskip('pyarrow')
+    monkeypatch.setattr(sys, 'argv', [
+        'generate_data.py', '--category', 'network=0', '--category', 'security=3',
+        '--format', file_format, '--output-dir', str(tmp_path), '--seed', '1',
+        '--workers', '1'])
+    generate_data.main()
+
+    assert sorted(os.listdir(tmp_path)) == ['generation_manifest.json',
+                                           f'security_incidents.{file_format}']
+    assert len(read_incidents(str(tmp_path / f'security_incidents.{file_format}'))) == 3
+    with open(tmp_path / 'generation_manifest.json') as f:
+        manifest = json.load(f)
+    assert manifest['counts'] == {'network': 0, 'security': 3}
+    assert [entry['path'] for entry in manifest['files']] == [
+        f'security_incidents.{file_format}']
+
+
+def test_negative_row_count_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['generate_data.py', '--category', 'network=-1',
+                                      '--output-dir', str(tmp_path)])
+    with pytest.raises(SystemExit):
+        generate_data.main()
+    assert not os.listdir(tmp_path)
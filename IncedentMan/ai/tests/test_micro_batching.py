@@ -0,0 +1,31 @@
+"""
+Tests for dynamic micro-batching (micro_batching.MicroBatcher)
+
+    python -m pytest tests
+"""
+from micro_batching import MicroBatcher
+
+
+class _Model:
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def predict_batch(self, texts):
+        self.calls.append(list(texts))
+        return [{'model': self.name, 'text': text} for text in texts]
+
+
+def test_each_description_is_predicted_by_its_own_model():
+    old, new = _Model('old'), _Model('new')
+    batcher = MicroBatcher(lambda model, texts: model.predict_batch(texts),
+                           max_batch_size=8, max_wait_ms=200)
+    # A reload swaps the model while requests are still queued
+    futures = [batcher.submit(f'text{i}', old if i < 3 else new) for i in range(6)]
+    results = [future.result(5) for future in futures]
+
+    assert [result['model'] for result in results] == ['old'] * 3 + ['new'] * 3
+    assert [result['text'] for result in results] == [f'text{i}' for i in range(6)]
+    assert old.calls == [['text0', 'text1', 'text2']]
+    assert new.calls == [['text3', 'text4', 'text5']]
+    assert batcher.stats()['items'] == 6
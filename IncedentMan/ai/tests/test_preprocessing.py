@@ -0,0 +1,94 @@
+"""
+Tests for text preprocessing (preprocess_text, BatchPreprocessor)
+
+    python -m pytest tests
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from nltk.tokenize import RegexpTokenizer
+
+from batch_preprocessor import BatchPreprocessor
+from incident_classifier import TOKEN_PATTERN, IncidentClassifier
+
+TEXTS = [
+    'Database server DB01 is down',
+    'database   server db01 IS down',        # duplicate up to case and spacing
+    'Database server DB01 is down',          # exact duplicate
+    '',
+    '   ',
+    None,
+    float('nan'),
+    404,
+    'İstanbul office: VPN gateway unreachable',
+    'Café crème machine — réseau coupé',
+    'cafe\u0301 re\u0301seau',                # combining accents: \w differs in re
+    'Ｆｕｌｌｗｉｄｔｈ ＤＮＳ failure',
+    '数据库 连接 超时',
+    'Ünïcödé ticket ÆØÅ ß straße',
+    'a I x 7 of the',                       # single characters and stop words only
+    'new tokens zyxwv host4711 10.0.0.7 inc0001234',
+]
+STOP_WORDS = {'is', 'the', 'of', 'on', 'a', 'i'}
+
+
+def _lemmatize(token):
+    return token[:-1] if token.endswith('s') and len(token) > 3 else token
+
+
+def _reference(text, tokenize):
+    """preprocess_text with the same tokenizer, stop words and lemmatizer"""
+    if pd.isna(text):
+        return ''
+    tokens = tokenize(' '.join(str(text).lower().split()))
+    return ' '.join(_lemmatize(token) for token in tokens
+                    if token not in STOP_WORDS and len(token) > 1)
+
+
+def test_batch_matches_reference_without_corpora():
+    tokenize = RegexpTokenizer(TOKEN_PATTERN).tokenize
+    expected = [_reference(text, tokenize) for text in TEXTS]
+    fitted = BatchPreprocessor(TOKEN_PATTERN, tokenize, _lemmatize, STOP_WORDS)
+    fitted.fit(TEXTS[:3])
+    table = dict(fitted.table)
+
+    assert fitted.transform(TEXTS) == expected
+    # Unseen tokens are resolved without growing the table
+    assert fitted.table == table
+    assert BatchPreprocessor(TOKEN_PATTERN, tokenize, _lemmatize, STOP_WORDS).transform(
+        TEXTS, update=True) == expected
+    assert fitted.transform([]) == []
+
+
+@pytest.mark.parametrize('fit_rows', [0, 3, len(TEXTS)])
+def test_batch_matches_preprocess_text(nltk_corpora, fit_rows):
+    reference = IncidentClassifier()
+    expected = [reference.preprocess_text(text) for text in TEXTS]
+
+    classifier = IncidentClassifier()
+    classifier.batch_preprocessor.fit(TEXTS[:fit_rows])
+    assert classifier.batch_preprocessor.transform(TEXTS) == expected
+    assert classifier.preprocess_texts(TEXTS, n_jobs=2, chunk_size=5) == expected
+
+
+def test_streaming_training_keeps_lemma_table_empty(nltk_corpora, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    # Every row carries tokens seen nowhere else (hosts, addresses, tickets)
+    rows = [{'description': f"{words} on host{i}x{rng.integers(10 ** 9)} "
+                            f"ip 10.{i % 250}.{i // 250}.7 ticket inc{i:07d}",
+             'category': category, 'priority': int(i % 3) + 1}
+            for i, (category, words) in enumerate(
+                [('NETWORK', 'router packet loss'), ('DATABASE', 'query deadlock table'),
+                 ('SECURITY', 'phishing malware login')] * 400)]
+    pd.DataFrame(rows).to_csv('incidents.csv', index=False)
+
+    classifier = IncidentClassifier(lemma_cache_size=100)
+    classifier.train_streaming('incidents.csv', chunk_size=200, n_features=2 ** 12)
+
+    assert classifier.batch_preprocessor.table == {}
+    assert classifier._lemmatize.cache_info().currsize <= 100
+    with open('models/lemma_table.json') as f:
+        assert json.load(f) == {}
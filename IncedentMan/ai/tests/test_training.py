@@ -0,0 +1,49 @@
+"""
+Tests for model training (IncidentClassifier.train and its helpers)
+
+    python -m pytest tests
+"""
+import pytest
+
+from incident_classifier import IncidentClassifier
+
+WORDS = {'NETWORK': 'router switch packet loss', 'DATABASE': 'query index table deadlock',
+         'SECURITY': 'phishing malware login breach'}
+
+
+def _rows():
+    texts, categories, priorities = [], [], []
+    for i in range(90):
+        category = list(WORDS)[i % 3]
+        texts.append(f"{WORDS[category]} host{i % 7}")
+        categories.append(category)
+        priorities.append(i % 3 + 1)
+    return texts, categories, priorities
+
+
+@pytest.mark.parametrize('budget, expected', [
+    (1, {'category': 1, 'priority': 1}),  # one core: sequential, 1 job each
+    (2, {'category': 1, 'priority': 1}),
+    (3, {'category': 2, 'priority': 1}),
+])
+def test_parallel_training_stays_within_cpu_budget(nltk_corpora, budget, expected):
+    texts, categories, priorities = _rows()
+    classifier = IncidentClassifier()
+    classifier.model_params = {'category': {'classifier': {'n_estimators': 20}},
+                               'priority': {'classifier': {'n_estimators': 10}}}
+    classifier.metadata['training_timings'] = {}
+
+    probs = classifier._train_parallel(texts, categories, priorities, texts[:10],
+                                       cpu_budget=budget)
+
+    info = classifier.metadata['parallel_training']
+    assert info['forest_jobs'] == expected
+    assert info.get('sequential', False) == (budget < 2)
+    if budget < 2:
+        assert probs is None
+    else:
+        assert sum(info['forest_jobs'].values()) == budget
+        assert probs[0].shape == (10, 3)
+    for pipeline in (classifier.category_pipeline, classifier.priority_pipeline):
+        assert pipeline.steps[-1][1].n_jobs == -1
+        assert len(pipeline.steps[-1][1].estimators_) > 0
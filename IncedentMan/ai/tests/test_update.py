@@ -0,0 +1,113 @@
+"""
+Tests for incremental model updates (IncidentClassifier.update)
+
+    python -m pytest tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from incident_classifier import IncidentClassifier
+
+
+def _forest(n_estimators=200):
+    rng = np.random.default_rng(0)
+    features = rng.random((60, 4))
+    labels = np.repeat(['a', 'b', 'c'], 20)
+    forest = RandomForestClassifier(n_estimators=n_estimators, max_depth=3,
+                                    class_weight='balanced', random_state=0)
+    return forest.fit(features, labels), features, labels
+
+
+def _counts(labels):
+    return {str(label): int(count) for label, count in zip(*np.unique(labels, return_counts=True))}
+
+
+@pytest.mark.parametrize('new_trees, max_trees, expected', [
+    (None, 5, 5),       # default new_trees (20) is capped at max_trees
+    (None, None, 220),  # default: +10%
+    (10, 50, 50),
+    (10, 10, 10),
+    (30, 10, 10),
+])
+def test_update_classifier_max_trees(new_trees, max_trees, expected):
+    forest, features, labels = _forest()
+    IncidentClassifier._update_classifier(forest, 'category', features, labels,
+                                          _counts(labels), new_trees, max_trees)
+    assert len(forest.estimators_) == expected
+    assert forest.n_estimators == expected
+    assert forest.class_weight == 'balanced'
+
+
+def test_update_classifier_rejects_zero_max_trees():
+    forest, features, labels = _forest()
+    with pytest.raises(ValueError):
+        IncidentClassifier._update_classifier(forest, 'category', features, labels,
+                                              _counts(labels), None, 0)
+
+
+def test_update_respects_max_trees(nltk_corpora, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    words = {'NETWORK': 'router switch packet loss vlan', 'DATABASE': 'query index table deadlock',
+             'SECURITY': 'phishing malware login breach'}
+    rows = [{'description': ' '.join(rng.choice(text.split(), 3)) + f' host{i % 7}',
+             'category': category, 'priority': int(i % 3) + 1}
+            for category, text in words.items() for i in range(60)]
+    pd.DataFrame(rows).to_csv('train.csv', index=False)
+    pd.DataFrame(rows[::2]).to_csv('new.csv', index=False)
+
+    IncidentClassifier().train('train.csv')
+    classifier = IncidentClassifier()
+    output = classifier.update('new.csv', base_dir='models', output_dir='updated', max_trees=5)
+
+    updated = IncidentClassifier()
+    updated.load_models(output)
+    for pipeline in (updated.category_pipeline, updated.priority_pipeline):
+        assert len(pipeline.steps[-1][1].estimators_) == 5
+
+
+def _write_datasets(rng):
+    words = {'NETWORK': 'router switch packet loss vlan', 'DATABASE': 'query index table deadlock',
+             'SECURITY': 'phishing malware login breach'}
+    rows = [{'description': ' '.join(rng.choice(text.split(), 3)) + f' host{i % 7}',
+             'category': category, 'priority': int(i % 3) + 1}
+            for category, text in words.items() for i in range(60)]
+    pd.DataFrame(rows).to_csv('train.csv', index=False)
+    # No SECURITY rows in the new batch
+    pd.DataFrame([row for row in rows[::2] if row['category'] != 'SECURITY']).to_csv(
+        'new.csv', index=False)
+
+
+def test_update_pads_missing_classes_from_training_data(nltk_corpora, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write_datasets(np.random.default_rng(0))
+    IncidentClassifier().train('train.csv')
+    base = IncidentClassifier()
+    base.load_models('models')
+    base_metrics = base.metadata['performance_metrics']
+
+    classifier = IncidentClassifier()
+    output = classifier.update('new.csv', base_dir='models', output_dir='updated', new_trees=5)
+
+    updated = IncidentClassifier()
+    metadata = updated.load_models(output)
+    forest = updated.category_pipeline.steps[-1][1]
+    assert list(forest.classes_) == ['DATABASE', 'NETWORK', 'SECURITY']
+    assert all(list(tree.classes_) == [0, 1, 2] for tree in forest.estimators_[-5:])
+    assert metadata['update_history'][-1]['padding_rows'] > 0
+    # Batch metrics do not replace the full-corpus ones
+    assert metadata['performance_metrics'] == base_metrics
+    assert metadata['update_metrics'] == metadata['update_history'][-1]['performance_metrics']
+
+
+def test_update_refuses_missing_classes_without_padding(nltk_corpora, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write_datasets(np.random.default_rng(0))
+    IncidentClassifier().train('train.csv')
+
+    with pytest.raises(ValueError, match='rows of every class'):
+        IncidentClassifier().update('new.csv', base_dir='models', output_dir='updated',
+                                    padding_files=[])
+    assert not (tmp_path / 'updated' / 'model_metadata.json').exists()